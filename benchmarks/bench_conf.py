@@ -0,0 +1,33 @@
+"""ConfUtil：读取走内存快照，逐个 set_value 与 batch 批量写入"""
+import os
+import shutil
+import tempfile
+
+
+def run(runner):
+    from wlfutil import ConfUtil
+    base = tempfile.mkdtemp(prefix='wlfutil-bench-')
+    try:
+        conf = os.path.join(base, 'config.ini')
+        with open(conf, 'w', encoding='utf-8') as f:
+            for s in range(20):
+                f.write(f'[s{s}]\n' + ''.join(f'k{k} = {k}\n' for k in range(50)))
+        n = runner.n(100000, 10000)
+        runner.bench('conf.get_value', lambda: [ConfUtil.get_value(conf, 's3', 'k7') for _ in range(n)], ops=n, memory=False)
+        runner.bench('conf.get_items', lambda: [ConfUtil.get_items(conf, 's3') for _ in range(n // 10)], ops=n // 10, memory=False)
+
+        writes = runner.n(200, 50)
+
+        def each():
+            for i in range(writes):
+                ConfUtil.set_value(conf, 'img', f'k{i}', i)
+
+        def batch():
+            with ConfUtil.batch(conf):
+                each()
+
+        runner.bench('conf.set_value_each', each, ops=writes, memory=False)
+        runner.bench('conf.set_value_batch', batch, ops=writes, memory=False)
+    finally:
+        ConfUtil._FILES.clear()
+        shutil.rmtree(base, ignore_errors=True)
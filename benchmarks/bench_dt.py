@@ -0,0 +1,22 @@
+"""DtUtil：逐个 strptime / strftime、convert_str_to_date / convert_date_to_str 与批量 parse_many / format_many"""
+import datetime as dt
+
+
+def run(runner):
+    from wlfutil import DtUtil
+    n = runner.n(100000, 10000)
+    base = dt.datetime(2022, 1, 1)
+    strs = [(base + dt.timedelta(seconds=i * 7)).strftime(DtUtil.DF_STD_SEC) for i in range(n)]
+    # 大量重复的时间字符串，如按分钟聚合后的结果
+    repeated = [strs[i % 1440] for i in range(n)]
+
+    runner.bench('dt.strptime_loop', lambda: [dt.datetime.strptime(s, DtUtil.DF_STD_SEC) for s in strs], ops=n, baseline=True)
+    runner.bench('dt.convert_str_to_date_loop', lambda: [DtUtil.convert_str_to_date(s) for s in strs], ops=n)
+    runner.bench('dt.parse_many_nocache', lambda: DtUtil.parse_many(strs, cache=False), ops=n)
+    runner.bench('dt.parse_many_cached_repeated', lambda: DtUtil.parse_many(repeated), ops=n)
+    runner.bench('dt.parse_many_epoch', lambda: DtUtil.parse_many(strs, out='epoch', cache=False), ops=n)
+    runner.bench('dt.parse_many_datetime64', lambda: DtUtil.parse_many(strs, out='datetime64', cache=False), ops=n)
+    dts = DtUtil.parse_many(strs, cache=False)
+    runner.bench('dt.strftime_loop', lambda: [d.strftime(DtUtil.DF_STD_SEC) for d in dts], ops=n, baseline=True)
+    runner.bench('dt.convert_date_to_str_loop', lambda: [DtUtil.convert_date_to_str(d) for d in dts], ops=n)
+    runner.bench('dt.format_many', lambda: DtUtil.format_many(dts), ops=n)
@@ -0,0 +1,58 @@
+"""FileUtil：目录大小扫描（对比 os.walk、带缓存的重复扫描、get_file_size）以及同步 / 后台清空目录"""
+import os
+import shutil
+import tempfile
+
+
+def make_tree(root: str, dirs: int, files: int, size: int = 100):
+    """两层目录，共 dirs 个目录、每个目录 files 个文件"""
+    data = b'x' * size
+    width = max(1, int(dirs ** 0.5))
+    for i in range(dirs):
+        path = os.path.join(root, f'd{i // width}', f'e{i % width}')
+        os.makedirs(path, exist_ok=True)
+        for j in range(files):
+            with open(os.path.join(path, f'f{j}'), 'wb') as f:
+                f.write(data)
+    return dirs * files
+
+
+def walk_size(root: str):
+    """旧写法：os.walk 后逐个 getsize"""
+    total = 0
+    for path, _, names in os.walk(root):
+        for name in names:
+            total += os.path.getsize(os.path.join(path, name))
+    return total
+
+
+def run(runner):
+    from wlfutil import FileUtil
+    base = tempfile.mkdtemp(prefix='wlfutil-bench-')
+    try:
+        root = os.path.join(base, 'tree')
+        files = make_tree(root, runner.n(400, 40), 25)
+        cache = os.path.join(base, 'size.json')
+        runner.bench('file.walk_getsize', lambda: walk_size(root), ops=files, baseline=True)
+        runner.bench('file.scan_size_1worker', lambda: FileUtil.scan_size(root, workers=1), ops=files)
+        runner.bench('file.scan_size_8workers', lambda: FileUtil.scan_size(root), ops=files)
+        FileUtil.scan_size(root, cache_file=cache)
+        runner.bench('file.scan_size_cached', lambda: FileUtil.scan_size(root, cache_file=cache), ops=files)
+        runner.bench('file.get_file_size', lambda: FileUtil.get_file_size(root), ops=files)
+
+        # 清空目录：只统计调用方等待的时间，后台删除在下一轮准备数据前等完
+        target = os.path.join(base, 'clear')
+        count = runner.n(2000, 200)
+
+        def prepare():
+            FileUtil.wait_deletes()
+            FileUtil.clear_dir(target)
+            make_tree(target, count // 20, 20, 10)
+
+        repeat = 3 if runner.quick else 5
+        runner.bench('file.clear_dir_sync', lambda: FileUtil.clear_dir(target), ops=count, setup=prepare, repeat=repeat, memory=False)
+        runner.bench('file.clear_dir_background', lambda: FileUtil.clear_dir(target, background=True), ops=count, setup=prepare,
+                     repeat=repeat, memory=False)
+        FileUtil.wait_deletes()
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
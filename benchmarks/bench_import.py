@@ -0,0 +1,45 @@
+"""导入耗时：每种导入方式在全新的解释器中执行，按 -X importtime 统计 wlfutil 相关模块的累计耗时"""
+import os
+import re
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 各工具类对应的驱动，导入某个工具类时不应带入其他驱动
+DRIVERS = ('numpy', 'paramiko', 'influxdb', 'pymysql', 'minio', 'redis', 'colorlog')
+# import time: self [us] | cumulative | 模块名，模块名前的缩进表示嵌套层级
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def import_cost(stmt: str):
+    """执行 stmt 的导入耗时（纳秒）以及导入过程中带入的驱动"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt], env=env, capture_output=True, text=True, check=True)
+    total, drivers = 0, set()
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        name = m.group(4)
+        if not m.group(3) and name.startswith('wlfutil'):
+            total += int(m.group(2))
+        if name.split('.')[0] in DRIVERS:
+            drivers.add(name.split('.')[0])
+    return total * 1000, sorted(drivers)
+
+
+def run(runner):
+    from wlfutil import _UTILS
+    cases = {'package': 'import wlfutil', 'all.LogUtil': 'from wlfutil.all import LogUtil; LogUtil'}
+    seen = set()
+    for name, module in _UTILS.items():
+        if module not in seen:
+            seen.add(module)
+            cases[name] = f'from wlfutil import {name}; {name}'
+    repeat = 3 if runner.quick else 7
+    for case, stmt in cases.items():
+        samples, drivers = [], []
+        for _ in range(repeat):
+            cost, drivers = import_cost(stmt)
+            samples.append(cost)
+        runner.record(f'import.{case}', samples, drivers=drivers)
@@ -0,0 +1,47 @@
+"""InfluxUtil / InfluxWriter / FanoutUtil，对接本地的 FakeInflux"""
+import datetime as dt
+from fakes import FakeInflux
+
+
+def legacy_points(tbl: str, data_list: list):
+    """write_data 改为行协议之前的写法：每个点先构造 dict，再由客户端序列化"""
+    res = []
+    for data in data_list:
+        fields = {f'v{i}': round(v, 3) for i, v in enumerate(data[2:], 1)}
+        res.append({'measurement': tbl, 'time': str(data[0]).replace(' ', 'T') + '+08:00', 'tags': {'tid': str(data[1])}, 'fields': fields})
+    return res
+
+
+def run(runner):
+    from influxdb.line_protocol import make_lines
+    from wlfutil import InfluxUtil, InfluxWriter, FanoutUtil, DtUtil
+    n = runner.n(20000, 2000)
+    base = dt.datetime(2022, 1, 1)
+    rows = [((base + dt.timedelta(seconds=i // 10)).strftime(DtUtil.DF_STD_SEC), i % 10, i * 0.1, i * 0.01, float(i)) for i in range(n)]
+
+    runner.bench('influx.encode_legacy_make_lines', lambda: make_lines({'points': legacy_points('tbl', rows)}), ops=n, baseline=True)
+    runner.bench('influx.encode_lines', lambda: InfluxUtil.encode_lines('tbl', rows), ops=n)
+
+    with FakeInflux(series=10, points=runner.n(10000, 1000), fields=3) as fake:
+        conf = fake.conf
+        runner.bench('influx.write_legacy_points', lambda: InfluxUtil.write_points(conf, legacy_points('tbl', rows)), ops=n, baseline=True)
+        runner.bench('influx.write_data', lambda: InfluxUtil.write_data(conf, 'tbl', rows), ops=n)
+
+        def writer():
+            with InfluxWriter(conf, batch_size=5000) as w:
+                for i in range(0, n, 100):
+                    w.write('tbl', rows[i:i + 100])
+
+        runner.bench('influx.writer_small_batches', writer, ops=n, memory=False)
+
+        total = len(fake.series) * len(fake.series[0]['values'])
+        runner.bench('influx.exec_sql', lambda: InfluxUtil.exec_sql(conf, 'select * from tbl'), ops=total)
+        runner.bench('influx.iter_sql', lambda: sum(1 for _ in InfluxUtil.iter_sql(conf, 'select * from tbl', chunk_size=1000)), ops=total)
+        runner.bench('influx.query_columns', lambda: InfluxUtil.query_columns(conf, 'select * from tbl', chunk_size=1000), ops=total)
+
+        # 每段查询都返回完整的回放数据，这里只比较并发切片与串行执行的调度开销
+        tpl = "select * from tbl where time >= '{start}' and time < '{end}'"
+        for workers in (1, 4):
+            runner.bench(f'fanout.influx_{workers}workers', lambda workers=workers: sum(
+                1 for _ in FanoutUtil.influx(conf, tpl, '2022-01-01 00:00:00', '2022-01-02 00:00:00', slices=8, workers=workers)),
+                         ops=total * 8, memory=False)
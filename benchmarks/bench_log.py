@@ -0,0 +1,33 @@
+"""LogUtil：同步写文件、异步队列、关闭调用方信息以及被级别过滤掉的调用的单次耗时"""
+import os
+import logging
+import tempfile
+
+
+def run(runner):
+    from wlfutil import LogUtil
+    if LogUtil.logger is None:
+        LogUtil.init(os.path.join(tempfile.mkdtemp(), 'bench.log'))
+    n = runner.n(5000, 500)
+
+    def emit():
+        for i in range(n):
+            LogUtil.info('bench', 'message', i)
+
+    def suppressed():
+        for i in range(n):
+            LogUtil.debug('bench', 'message', i)
+
+    runner.bench('log.info_sync', emit, ops=n)
+    LogUtil.set_caller(False)
+    runner.bench('log.info_sync_nocaller', emit, ops=n)
+    LogUtil.set_caller(True)
+    LogUtil.set_level(logging.INFO)
+    runner.bench('log.debug_suppressed', suppressed, ops=n, memory=False)
+    LogUtil.set_level(logging.DEBUG)
+    # 异步模式只统计调用方的耗时，每次调用前先等上一轮的日志写完
+    LogUtil.start_async(queue_size=n * 4)
+    try:
+        runner.bench('log.info_async', emit, ops=n, setup=LogUtil.flush, memory=False)
+    finally:
+        LogUtil.shutdown()
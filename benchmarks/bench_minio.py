@@ -0,0 +1,64 @@
+"""MinioUtil，对接本地的 FakeS3：整文件上传下载、流式上传、区间读取以及目录并发同步"""
+import os
+import shutil
+import tempfile
+import warnings
+from fakes import FakeS3
+
+MB = 1024 * 1024
+
+
+def run(runner):
+    from wlfutil import MinioUtil
+    # 本地 http 服务，屏蔽 urllib3 的非 https 警告
+    warnings.filterwarnings('ignore', module='urllib3')
+    base = tempfile.mkdtemp(prefix='wlfutil-bench-')
+    try:
+        with FakeS3() as fake:
+            conf = fake.conf
+            MinioUtil.create_bucket(conf, 'bench')
+            size = runner.n(16, 4) * MB
+            data = os.urandom(size)
+            src, dst = os.path.join(base, 'src.bin'), os.path.join(base, 'dst.bin')
+            with open(src, 'wb') as f:
+                f.write(data)
+
+            runner.bench('minio.upload', lambda: MinioUtil.upload(conf, 'bench', src, 'obj.bin'), ops=1, mb=size / MB)
+            runner.bench('minio.download', lambda: MinioUtil.download(conf, 'bench', dst, 'obj.bin'), ops=1, mb=size / MB)
+            chunks = [data[i:i + MB] for i in range(0, size, MB)]
+            runner.bench('minio.put_stream', lambda: MinioUtil.put_stream(conf, 'bench', 'stream.bin', iter(chunks), part_size=5 * MB),
+                         ops=1, mb=size / MB)
+
+            reads = runner.n(500, 50)
+            buf = bytearray(4096)
+            runner.bench('minio.get_range_4k', lambda: [MinioUtil.get_range(conf, 'bench', 'obj.bin', i * 4096, 4096) for i in range(reads)],
+                         ops=reads, memory=False)
+            runner.bench('minio.get_range_4k_buf', lambda: [MinioUtil.get_range(conf, 'bench', 'obj.bin', i * 4096, 4096, buf=buf)
+                                                             for i in range(reads)], ops=reads, memory=False)
+            runner.bench('minio.iter_object', lambda: sum(len(c) for c in MinioUtil.iter_object(conf, 'bench', 'obj.bin')), ops=1,
+                         mb=size / MB)
+
+            # 目录同步：许多小文件
+            local = os.path.join(base, 'dir')
+            files = runner.n(200, 40)
+            os.makedirs(local)
+            for i in range(files):
+                with open(os.path.join(local, f'f{i}.bin'), 'wb') as f:
+                    f.write(data[i * 1024:(i + 1) * 1024])
+
+            def fresh():
+                manifest = os.path.join(local, MinioUtil.MANIFEST)
+                if os.path.exists(manifest):
+                    os.remove(manifest)
+
+            for workers in (1, 8):
+                runner.bench(f'minio.upload_dir_{workers}workers', lambda workers=workers: MinioUtil.upload_dir(conf, 'bench', local, 'dir/',
+                                                                                                                workers=workers),
+                             ops=files, setup=fresh, memory=False)
+            MinioUtil.upload_dir(conf, 'bench', local, 'dir/')
+            runner.bench('minio.upload_dir_unchanged', lambda: MinioUtil.upload_dir(conf, 'bench', local, 'dir/'), ops=files, memory=False)
+            out = os.path.join(base, 'out')
+            runner.bench('minio.download_dir', lambda: MinioUtil.download_dir(conf, 'bench', out, 'dir/'), ops=files,
+                         setup=lambda: shutil.rmtree(out, ignore_errors=True), memory=False)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
@@ -0,0 +1,33 @@
+"""MysqlUtil：pymysql.connect 替换为本地 sqlite，比较连接池复用、全量读取与流式读取、逐条与批量写入
+sqlite 没有网络往返，这里的差距主要体现 python 侧的开销和内存占用，真实 mysql 上批量写入的收益更大
+"""
+from fakes import SqliteMysql
+
+
+def run(runner):
+    from wlfutil import MysqlUtil
+    n = runner.n(200000, 20000)
+    with SqliteMysql() as db:
+        conf = db.conf
+        db.execute('create table t (id integer primary key, name text, v real);')
+        db.execute('insert into t (id, name, v) values (?, ?, ?)', ((i, f'name{i}', i * 0.5) for i in range(n)))
+
+        calls = runner.n(5000, 500)
+        runner.bench('mysql.get_small', lambda: [MysqlUtil.get(conf, 'select id from t where id = 1') for _ in range(calls)], ops=calls,
+                     memory=False)
+        runner.bench('mysql.get_all', lambda: len(MysqlUtil.get(conf, 'select * from t')), ops=n)
+        runner.bench('mysql.iter_rows', lambda: sum(1 for _ in MysqlUtil.iter_rows(conf, 'select * from t')), ops=n)
+        runner.bench('mysql.iter_rows_batches', lambda: sum(len(b) for b in MysqlUtil.iter_rows(conf, 'select * from t', batches=True)),
+                     ops=n)
+
+        writes = runner.n(5000, 500)
+        db.execute('create table w (id integer, name text);')
+
+        def save_loop():
+            for i in range(writes):
+                MysqlUtil.save(conf, f"insert into w (id, name) values ({i}, 'x{i}')")
+
+        runner.bench('mysql.save_loop', save_loop, ops=writes, setup=lambda: db.execute('delete from w;'), memory=False)
+        runner.bench('mysql.save_many', lambda: MysqlUtil.save_many(conf, 'insert into w (id, name) values (%s, %s)',
+                                                                    ((i, f'x{i}') for i in range(writes))),
+                     ops=writes, setup=lambda: db.execute('delete from w;'), memory=False)
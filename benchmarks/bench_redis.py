@@ -0,0 +1,44 @@
+"""RedisUtil / CacheUtil，对接本地的 FakeRedis：逐条往返与 pipeline 批量命令，以及两级缓存的命中开销"""
+from fakes import FakeRedis
+
+
+def run(runner):
+    from wlfutil import RedisUtil, CacheUtil
+    n = runner.n(5000, 500)
+    keys = [f'bench:{i}' for i in range(n)]
+    mapping = {k: str(i) for i, k in enumerate(keys)}
+    with FakeRedis() as fake:
+        RedisUtil.connect(fake.conf(decode_responses=True))
+
+        def set_each():
+            for k, v in mapping.items():
+                RedisUtil.set(k, v)
+
+        runner.bench('redis.set_each', set_each, ops=n, memory=False)
+        runner.bench('redis.mset', lambda: RedisUtil.mset(mapping), ops=n, memory=False)
+        runner.bench('redis.get_each', lambda: [RedisUtil.get(k) for k in keys], ops=n, memory=False)
+        runner.bench('redis.mget', lambda: RedisUtil.mget(keys), ops=n, memory=False)
+        runner.bench('redis.exists_each', lambda: [RedisUtil.exist(k) for k in keys], ops=n, memory=False)
+        runner.bench('redis.exists_many', lambda: RedisUtil.exists_many(keys), ops=n, memory=False)
+
+        lists = {f'bench:list:{i}': [str(j) for j in range(10)] for i in range(n // 10)}
+        RedisUtil.lpush_many(lists)
+        runner.bench('redis.lget_each', lambda: [RedisUtil.lget(k) for k in lists], ops=len(lists), memory=False)
+        runner.bench('redis.lget_many', lambda: RedisUtil.lget_many(list(lists)), ops=len(lists), memory=False)
+
+        calls = runner.n(20000, 2000)
+
+        @CacheUtil.cached(ttl=60, local_maxsize=1024)
+        def cached_local(i):
+            return {'i': i, 'data': list(range(20))}
+
+        @CacheUtil.cached(ttl=60, local_maxsize=0)
+        def cached_redis(i):
+            return {'i': i, 'data': list(range(20))}
+
+        for i in range(100):
+            cached_local(i), cached_redis(i)
+        runner.bench('cache.local_hit', lambda: [cached_local(i % 100) for i in range(calls)], ops=calls, memory=False)
+        runner.bench('cache.redis_hit', lambda: [cached_redis(i % 100) for i in range(n)], ops=n, memory=False)
+        RedisUtil.CONN = None
+        RedisUtil.REGISTRY.clear()
@@ -0,0 +1,19 @@
+"""ShellUtil，对接本地的 FakeSSH：复用连接的单条命令、大输出的全量与流式读取、多主机并发执行
+python 实现的 ssh 服务端每条命令有几十毫秒的固定延迟，只比较同一次运行中各用例的相对差距
+"""
+from fakes import FakeSSH
+
+
+def run(runner):
+    from wlfutil import ShellUtil
+    with FakeSSH() as fake:
+        conf = fake.conf
+        calls = runner.n(200, 20)
+        runner.bench('shell.exec_small', lambda: [ShellUtil.exec(conf, 'echo hi') for _ in range(calls)], ops=calls, memory=False)
+        size = runner.n(8 * 1024 * 1024, 1024 * 1024)
+        runner.bench('shell.exec_large_output', lambda: ShellUtil.exec(conf, f'bytes {size}'), ops=1, mb=size / 1024 / 1024)
+        runner.bench('shell.stream_large_output', lambda: sum(len(line) for line in ShellUtil.stream(conf, f'bytes {size}')), ops=1,
+                     mb=size / 1024 / 1024)
+        hosts = runner.n(16, 4)
+        runner.bench('shell.exec_loop_hosts', lambda: [ShellUtil.exec(conf, 'echo x') for _ in range(hosts)], ops=hosts, memory=False)
+        runner.bench('shell.exec_many_hosts', lambda: ShellUtil.exec_many([conf] * hosts, 'echo x'), ops=hosts, memory=False)
@@ -0,0 +1,55 @@
+"""UniUtil / ResampleUtil 的批量计算，以及 time_cost / MetricsUtil 埋点的单次开销"""
+import random
+import datetime as dt
+
+
+def run(runner):
+    import numpy as np
+    from wlfutil import UniUtil, ResampleUtil, MetricsUtil, DtUtil
+    n = runner.n(1000000, 100000)
+    rnd = random.Random(0)
+    values = [rnd.random() * 1000 for _ in range(n)]
+    arr = np.array(values)
+
+    def loop_histogram():
+        # 旧写法：逐个数据遍历区间
+        labels = UniUtil.range_partition(1000, 20)
+        starts = [i * 50 for i in range(20)]
+        counts = dict.fromkeys(labels, 0)
+        for v in values:
+            for k in range(len(starts) - 1, -1, -1):
+                if v >= starts[k]:
+                    counts[labels[k]] += 1
+                    break
+        return counts
+
+    runner.bench('uni.histogram_loop', loop_histogram, ops=n, repeat=3, memory=False, baseline=True)
+    runner.bench('uni.range_histogram_list', lambda: UniUtil.range_histogram(values, 1000, 20), ops=n)
+    runner.bench('uni.range_histogram_array', lambda: UniUtil.range_histogram(arr, 1000, 20, sums=True), ops=n)
+    runner.bench('uni.range_histogram_iter', lambda: UniUtil.range_histogram(iter(values), 1000, 20, chunk_size=100000), ops=n)
+
+    # 一天的秒级数据重采样到分钟
+    m = runner.n(86400, 8640)
+    times = np.arange(1640966400, 1640966400 + m, dtype=np.int64) - 8 * 3600
+    data = np.array(values[:m]) if m <= n else np.resize(arr, m)
+    end = (dt.datetime(2022, 1, 1) + dt.timedelta(seconds=m)).strftime(DtUtil.DF_STD_SEC)
+    for agg in (ResampleUtil.AGG_MEAN, ResampleUtil.AGG_MAX):
+        runner.bench(f'resample.{agg}', lambda agg=agg: ResampleUtil.resample(times, data, 60, '2022-01-01 00:00:00', end, agg), ops=m)
+    runner.bench('resample.mean_ffill', lambda: ResampleUtil.resample(times, data, 60, '2022-01-01 00:00:00', end, fill='ffill'), ops=m)
+
+    # 埋点开销：与空函数对比
+    calls = runner.n(200000, 20000)
+
+    def plain():
+        return None
+
+    timed = MetricsUtil.timer('bench_uni_timer')(plain)
+    counter = MetricsUtil.counter('bench_uni_counter')
+
+    def loop(fn):
+        return lambda: [fn() for _ in range(calls)]
+
+    runner.bench('metrics.baseline_call', loop(plain), ops=calls, memory=False, baseline=True)
+    runner.bench('metrics.timer_decorator', loop(timed), ops=calls, memory=False)
+    runner.bench('metrics.counter_inc', loop(counter.inc), ops=calls, memory=False)
+    MetricsUtil.reset()
@@ -0,0 +1,603 @@
+"""基准测试用的本地服务替身，都在当前进程内的后台线程中运行，不需要联网
+
+FakeInflux    influxdb HTTP 接口：/ping、/write、/query（回放预先生成的查询响应，支持 chunked）
+FakeRedis     redis RESP 协议的常用命令子集
+SqliteMysql   用 sqlite3 替换 pymysql.connect 的连接
+FakeS3        minio 客户端用到的 S3 接口子集：桶、单次和分片上传、Range 下载、ListObjectsV2
+FakeSSH       paramiko 实现的 ssh 服务端，exec 时按命令返回输出
+"""
+import io
+import re
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import threading
+import socketserver
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+import paramiko
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分开写，不关闭 Nagle 时小请求会被延迟确认拖慢几十毫秒
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        n = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(n) if n else b''
+
+    def _send(self, code: int, body: bytes = b'', headers: dict = None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+
+class _Background:
+    """在后台线程运行的服务，with 退出时关闭"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _serve(self, server):
+        self.server = server
+        self.port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeInflux(_Background):
+    """influxdb 1.x HTTP 接口
+    :param series 查询响应中的序列数，每个序列 points 个点，每个点 fields 个数值字段
+    """
+
+    def __init__(self, series: int = 10, points: int = 1000, fields: int = 3):
+        self.written_lines, self.write_requests = 0, 0
+        # 最近一次写入的 (查询参数, 请求体)，测试用来核对编码结果
+        self.last_write = None
+        self.lock = threading.Lock()
+        self.series = self._record(series, points, fields)
+        fake = self
+
+        class Handler(_Handler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == '/ping':
+                    return self._send(204, headers={'X-Influxdb-Version': '1.8.10'})
+                if url.path == '/query':
+                    return fake._query(self, parse_qs(url.query))
+                self._send(404)
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                body = self._body()
+                if url.path == '/write':
+                    with fake.lock:
+                        fake.write_requests += 1
+                        fake.written_lines += body.count(b'\n') + (0 if body.endswith(b'\n') or not body else 1)
+                        fake.last_write = (parse_qs(url.query), body)
+                    return self._send(204)
+                if url.path == '/query':
+                    return self._send(200, b'{"results":[{"statement_id":0}]}', {'Content-Type': 'application/json'})
+                self._send(404)
+
+        self._serve(_Server(('127.0.0.1', 0), Handler))
+
+    @property
+    def conf(self):
+        return {'host': '127.0.0.1', 'port': self.port, 'username': 'u', 'password': 'p', 'database': 'bench'}
+
+    @staticmethod
+    def _record(series: int, points: int, fields: int):
+        """生成固定的查询结果，每次查询都回放它"""
+        columns = ['time'] + [f'v{i}' for i in range(1, fields + 1)]
+        res = []
+        for s in range(series):
+            values = [[1640966400 + i * 60] + [round(s + i * 0.001 * (f + 1), 3) for f in range(fields)] for i in range(points)]
+            res.append({'name': 'tbl', 'tags': {'tid': str(s)}, 'columns': columns, 'values': values})
+        return res
+
+    def _query(self, handler, params: dict):
+        chunked = params.get('chunked', ['false'])[0] == 'true'
+        if not chunked:
+            body = json.dumps({'results': [{'statement_id': 0, 'series': self.series}]}).encode()
+            return handler._send(200, body, {'Content-Type': 'application/json'})
+        size = int(params.get('chunk_size', ['10000'])[0])
+        chunks = []
+        for series in self.series:
+            values = series['values']
+            for i in range(0, len(values), size):
+                part = dict(series, values=values[i:i + size])
+                if i + size < len(values):
+                    part['partial'] = True
+                chunks.append(json.dumps({'results': [{'statement_id': 0, 'series': [part]}]}).encode() + b'\n')
+        handler._send(200, b''.join(chunks), {'Content-Type': 'application/json'})
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """RESP 协议，命令由 FakeRedis.run 执行"""
+    disable_nagle_algorithm = True
+
+    def _read(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            n = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    def handle(self):
+        fake, multi = self.server.fake, None
+        while True:
+            args = self._read()
+            if args is None:
+                return
+            cmd = args[0].upper()
+            if cmd == b'MULTI':
+                multi = []
+                self.wfile.write(b'+OK\r\n')
+            elif cmd == b'EXEC':
+                with fake.lock:
+                    res = [fake.run(a) for a in multi or []]
+                multi = None
+                self.wfile.write(b'*%d\r\n' % len(res) + b''.join(_encode(r) for r in res))
+            elif multi is not None:
+                multi.append(args)
+                self.wfile.write(b'+QUEUED\r\n')
+            else:
+                with fake.lock:
+                    res = fake.run(args)
+                self.wfile.write(_encode(res))
+
+
+_OK = object()
+
+
+def _encode(v):
+    if v is _OK:
+        return b'+OK\r\n'
+    if v is None:
+        return b'$-1\r\n'
+    if isinstance(v, Exception):
+        return b'-ERR %s\r\n' % str(v).encode()
+    if isinstance(v, bool):
+        v = int(v)
+    if isinstance(v, int):
+        return b':%d\r\n' % v
+    if isinstance(v, bytes):
+        return b'$%d\r\n%s\r\n' % (len(v), v)
+    return b'*%d\r\n' % len(v) + b''.join(_encode(x) for x in v)
+
+
+class FakeRedis(_Background):
+    """redis 常用命令：字符串、列表、哈希、集合、过期时间"""
+
+    def __init__(self):
+        self.data, self.expire = {}, {}
+        self.lock = threading.Lock()
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        server = Server(('127.0.0.1', 0), _RespHandler)
+        server.fake = self
+        self._serve(server)
+
+    def conf(self, **kwargs):
+        return dict({'host': '127.0.0.1', 'port': self.port}, **kwargs)
+
+    def _alive(self, key):
+        exp = self.expire.get(key)
+        if exp is not None and exp < time.time():
+            self.data.pop(key, None)
+            self.expire.pop(key, None)
+        return key in self.data
+
+    def run(self, args):
+        cmd, a, d = args[0].upper().decode(), args[1:], self.data
+        if a:
+            self._alive(a[0])
+        if cmd in ('PING', 'SELECT', 'CLIENT'):
+            return _OK
+        if cmd == 'GET':
+            return d.get(a[0])
+        if cmd == 'SET':
+            d[a[0]] = a[1]
+            self.expire.pop(a[0], None)
+            if len(a) > 3 and a[2].upper() == b'EX':
+                self.expire[a[0]] = time.time() + int(a[3])
+            return _OK
+        if cmd == 'MGET':
+            return [d.get(k) if self._alive(k) else None for k in a]
+        if cmd == 'MSET':
+            for i in range(0, len(a), 2):
+                d[a[i]] = a[i + 1]
+            return _OK
+        if cmd == 'EXISTS':
+            return sum(self._alive(k) for k in a)
+        if cmd == 'DEL':
+            n = sum(1 for k in a if self._alive(k))
+            for k in a:
+                d.pop(k, None)
+                self.expire.pop(k, None)
+            return n
+        if cmd == 'EXPIRE':
+            if not self._alive(a[0]):
+                return 0
+            self.expire[a[0]] = time.time() + int(a[1])
+            return 1
+        if cmd == 'TTL':
+            if not self._alive(a[0]):
+                return -2
+            exp = self.expire.get(a[0])
+            return -1 if exp is None else max(0, int(exp - time.time() + 0.5))
+        if cmd in ('LPUSH', 'RPUSH'):
+            lst = d.setdefault(a[0], [])
+            for v in a[1:]:
+                if cmd == 'LPUSH':
+                    lst.insert(0, v)
+                else:
+                    lst.append(v)
+            return len(lst)
+        if cmd in ('LRANGE', 'LTRIM'):
+            lst, s, e = d.get(a[0], []), int(a[1]), int(a[2])
+            part = lst[s:] if e == -1 else lst[s:e + 1]
+            if cmd == 'LRANGE':
+                return part
+            if part:
+                d[a[0]] = part
+            else:
+                d.pop(a[0], None)
+            return _OK
+        if cmd in ('HSET', 'HMSET'):
+            h = d.setdefault(a[0], {})
+            for i in range(1, len(a), 2):
+                h[a[i]] = a[i + 1]
+            return _OK if cmd == 'HMSET' else 1
+        if cmd == 'HMGET':
+            h = d.get(a[0], {})
+            return [h.get(f) for f in a[1:]]
+        if cmd == 'HGETALL':
+            return [x for kv in d.get(a[0], {}).items() for x in kv]
+        if cmd == 'SADD':
+            s = d.setdefault(a[0], set())
+            n = len(s)
+            s.update(a[1:])
+            return len(s) - n
+        if cmd == 'SMEMBERS':
+            return sorted(d.get(a[0], set()))
+        if cmd == 'FLUSHDB':
+            d.clear()
+            self.expire.clear()
+            return _OK
+        return Exception(f'unknown command {cmd}')
+
+
+class SqliteMysql:
+    """把 wlfutil.mysql_util 使用的 pymysql.connect 换成 sqlite3 连接，sql 中的 %s 占位符换成 ?
+
+    with SqliteMysql(path) as db:
+        MysqlUtil.get(db.conf, 'select ...')
+    """
+
+    def __init__(self, path: str = None):
+        import tempfile
+        self.path = path or tempfile.mktemp(suffix='.db')
+        self.conf = {'host': 'sqlite', 'database': self.path}
+
+    def __enter__(self):
+        from wlfutil import mysql_util
+        self._module = mysql_util.pymysql
+        self._connect = self._module.connect
+        self._module.connect = lambda **conf: _SqliteConn(sqlite3.connect(conf['database'], check_same_thread=False))
+        return self
+
+    def __exit__(self, *exc):
+        from wlfutil.mysql_util import MysqlUtil
+        MysqlUtil.close()
+        self._module.connect = self._connect
+
+    def execute(self, sql: str, rows=None):
+        """直接在 sqlite 上执行，用于建表和准备数据"""
+        db = sqlite3.connect(self.path)
+        try:
+            if rows is None:
+                db.executescript(sql)
+            else:
+                db.executemany(sql, rows)
+            db.commit()
+        finally:
+            db.close()
+
+
+class _SqliteConn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, cursorclass=None):
+        return _SqliteCursor(self.db.cursor(), dict_rows=cursorclass is not None and 'Dict' in cursorclass.__name__)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.db.close()
+
+
+class _SqliteCursor:
+    """dict_rows 为 True 时模拟 DictCursor / SSDictCursor，每行返回 {列名: 值}"""
+
+    def __init__(self, cur, dict_rows: bool = False):
+        self.cur, self.dict_rows = cur, dict_rows
+
+    def _rows(self, rows):
+        if not self.dict_rows:
+            return rows
+        names = [d[0] for d in self.cur.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def execute(self, sql: str, params=None):
+        return self.cur.execute(sql.replace('%s', '?'), params or ())
+
+    def executemany(self, sql: str, rows):
+        return self.cur.executemany(sql.replace('%s', '?'), rows)
+
+    def fetchall(self):
+        return self._rows(self.cur.fetchall())
+
+    def fetchmany(self, size: int):
+        return self._rows(self.cur.fetchmany(size))
+
+    def close(self):
+        self.cur.close()
+
+
+class FakeS3(_Background):
+    """S3 接口子集，对象保存在内存中，minio 客户端需要使用 path-style、http 并指定 region"""
+
+    def __init__(self):
+        self.buckets, self.uploads = {}, {}
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(_Handler):
+            def _split(self):
+                url = urlsplit(self.path)
+                parts = unquote(url.path).lstrip('/').split('/', 1)
+                return parts[0], parts[1] if len(parts) > 1 else '', parse_qs(url.query, keep_blank_values=True)
+
+            def do_HEAD(self):
+                fake.handle(self, 'HEAD', *self._split())
+
+            def do_GET(self):
+                fake.handle(self, 'GET', *self._split())
+
+            def do_PUT(self):
+                fake.handle(self, 'PUT', *self._split())
+
+            def do_POST(self):
+                fake.handle(self, 'POST', *self._split())
+
+            def do_DELETE(self):
+                fake.handle(self, 'DELETE', *self._split())
+
+        self._serve(_Server(('127.0.0.1', 0), Handler))
+
+    @property
+    def conf(self):
+        return {'endpoint': f'127.0.0.1:{self.port}', 'access_key': 'bench', 'secret_key': 'benchbench', 'secure': False, 'region': 'us-east-1'}
+
+    @staticmethod
+    def _error(h, code: int, name: str):
+        body = f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{name}</Code><Message>{name}</Message></Error>'.encode()
+        h._send(code, body, {'Content-Type': 'application/xml'})
+
+    @staticmethod
+    def _xml(h, body: str):
+        h._send(200, ('<?xml version="1.0" encoding="UTF-8"?>' + body).encode(), {'Content-Type': 'application/xml'})
+
+    def handle(self, h, method: str, bucket: str, key: str, q: dict):
+        body = h._body() if method in ('PUT', 'POST') else b''
+        with self.lock:
+            objects = self.buckets.get(bucket)
+        if not key:
+            return self._bucket(h, method, bucket, objects, q)
+        if objects is None:
+            return self._error(h, 404, 'NoSuchBucket')
+        if method == 'POST' and 'uploads' in q:
+            upload_id = uuid.uuid4().hex
+            with self.lock:
+                self.uploads[upload_id] = {}
+            return self._xml(h, f'<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                                f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+        if method == 'PUT' and 'uploadId' in q:
+            etag = hashlib.md5(body).hexdigest()
+            with self.lock:
+                self.uploads[q['uploadId'][0]][int(q['partNumber'][0])] = body
+            return h._send(200, headers={'ETag': f'"{etag}"'})
+        if method == 'POST' and 'uploadId' in q:
+            with self.lock:
+                parts = self.uploads.pop(q['uploadId'][0])
+            data = b''.join(parts[n] for n in sorted(parts))
+            etag = self._put(objects, key, data, len(parts))
+            return self._xml(h, f'<CompleteMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                                f'<ETag>"{etag}"</ETag></CompleteMultipartUploadResult>')
+        if method == 'PUT':
+            etag = self._put(objects, key, body)
+            return h._send(200, headers={'ETag': f'"{etag}"'})
+        with self.lock:
+            obj = objects.get(key)
+        if obj is None:
+            return self._error(h, 404, 'NoSuchKey')
+        data, etag, mtime = obj
+        headers = {'ETag': f'"{etag}"', 'Last-Modified': formatdate(mtime, usegmt=True), 'Content-Type': 'application/octet-stream',
+                   'Accept-Ranges': 'bytes'}
+        if method == 'DELETE':
+            with self.lock:
+                objects.pop(key, None)
+            return h._send(204)
+        if method == 'HEAD':
+            headers['Content-Length'] = str(len(data))
+            h.send_response(200)
+            for k, v in headers.items():
+                h.send_header(k, v)
+            return h.end_headers()
+        rng = re.match(r'bytes=(\d+)-(\d*)', h.headers.get('Range') or '')
+        if rng:
+            start = int(rng.group(1))
+            end = int(rng.group(2)) if rng.group(2) else len(data) - 1
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+            return h._send(206, data[start:end + 1], headers)
+        h._send(200, data, headers)
+
+    def _put(self, objects: dict, key: str, data: bytes, parts: int = 0):
+        etag = hashlib.md5(data).hexdigest() + (f'-{parts}' if parts else '')
+        with self.lock:
+            objects[key] = (data, etag, time.time())
+        return etag
+
+    def _bucket(self, h, method: str, bucket: str, objects, q: dict):
+        if method == 'PUT':
+            if 'policy' not in q:
+                with self.lock:
+                    self.buckets.setdefault(bucket, {})
+            return h._send(200)
+        if objects is None:
+            return self._error(h, 404, 'NoSuchBucket')
+        if method == 'HEAD':
+            return h._send(200)
+        if 'location' in q:
+            return self._xml(h, '<LocationConstraint>us-east-1</LocationConstraint>')
+        prefix = q.get('prefix', [''])[0]
+        with self.lock:
+            items = sorted((k, v) for k, v in objects.items() if k.startswith(prefix))
+        contents = ''.join(
+            f'<Contents><Key>{k}</Key><LastModified>{time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(m))}</LastModified>'
+            f'<ETag>"{e}"</ETag><Size>{len(d)}</Size><StorageClass>STANDARD</StorageClass></Contents>'
+            for k, (d, e, m) in items)
+        self._xml(h, f'<ListBucketResult><Name>{bucket}</Name><Prefix>{prefix}</Prefix><KeyCount>{len(items)}</KeyCount>'
+                     f'<MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated>{contents}</ListBucketResult>')
+
+
+class FakeSSH(_Background):
+    """ssh 服务端，任意用户名密码都能登录
+    exec 的命令为 'bytes N' 时输出 N 字节（每 100 字节一行），其他命令原样回显
+    """
+
+    def __init__(self):
+        self.key = paramiko.RSAKey.generate(1024)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(100)
+        self.port = self.sock.getsockname()[1]
+        self.transports = []
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def conf(self):
+        return {'hostname': '127.0.0.1', 'port': self.port, 'username': 'bench', 'password': 'bench', 'timeout': 10,
+                'look_for_keys': False, 'allow_agent': False}
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.key)
+            self.transports.append(transport)
+            transport.start_server(server=_SSHServer())
+
+    def close(self):
+        self._closed = True
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
+
+
+class _SSHServer(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == 'session' else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=_ssh_exec, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+def _ssh_exec(channel, command: str):
+    # 等服务端回复 exec 请求之后再发送输出，否则客户端可能先收到数据
+    time.sleep(0.005)
+    try:
+        m = re.fullmatch(r'bytes (\d+)', command.strip())
+        if m:
+            n, line = int(m.group(1)), b'x' * 99 + b'\n'
+            buf = io.BytesIO(line * (n // 100) + b'x' * (n % 100))
+            while True:
+                chunk = buf.read(32768)
+                if not chunk:
+                    break
+                channel.sendall(chunk)
+        else:
+            channel.sendall(command.encode() + b'\n')
+        channel.send_exit_status(0)
+    except OSError:
+        # 客户端提前关闭了通道（如 stream 超时）
+        pass
+    finally:
+        channel.close()
+
+
+@contextmanager
+def patched(obj, name: str, value):
+    """临时替换属性"""
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, old)
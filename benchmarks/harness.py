@@ -0,0 +1,133 @@
+"""基准测试的计时、内存统计以及结果比较"""
+import gc
+import json
+import time
+import tracemalloc
+
+# 比较两次结果时使用的指标：(字段, 越大越好)
+COMPARE_KEYS = (('ops_per_sec', True), ('p95_ms', False), ('peak_kb', False))
+# 峰值内存低于该值时不参与比较，太小的值波动比例很大
+MIN_PEAK_KB = 256
+
+
+def _percentile(sorted_vals: list, q: float):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+class Runner:
+    """运行并记录各个用例
+
+    runner.bench('dt.parse_many', lambda: DtUtil.parse_many(strs), ops=len(strs))
+    :param quick 为 True 时减少数据量和运行时间，用于快速检查
+    :param scale 数据量倍数，大于 1 时跑更大的数据量
+    :param memory 是否额外跑一次 tracemalloc 统计峰值内存
+    """
+
+    def __init__(self, quick: bool = False, scale: float = 1.0, memory: bool = True, min_time: float = None):
+        self.quick, self.scale, self.memory = quick, scale, memory
+        self.min_time = min_time if min_time is not None else (0.2 if quick else 1.0)
+        self.results = {}
+
+    def n(self, full: int, quick: int = None):
+        """按运行模式缩放的数据量"""
+        if self.quick:
+            return max(1, quick if quick is not None else full // 10)
+        return max(1, int(full * self.scale))
+
+    def bench(self, name: str, fn, ops: int = 1, setup=None, repeat: int = None, warmup: int = 1, memory: bool = None, **extra):
+        """重复调用 fn 统计吞吐、单次调用延迟分位数和峰值内存
+        :param fn 一次调用完成 ops 次操作
+        :param setup 每次调用前执行且不计时，如重建被 fn 修改的数据
+        :param repeat 固定调用次数，为空时至少跑 min_time 秒、至少 3 次
+        :param extra 一并记录到结果中的其他信息，baseline=True 表示旧写法的参照用例，compare 时跳过
+        """
+        for _ in range(warmup):
+            if setup:
+                setup()
+            fn()
+        samples, total = [], 0
+        while True:
+            if setup:
+                setup()
+            gc.collect()
+            start = time.perf_counter_ns()
+            fn()
+            cost = time.perf_counter_ns() - start
+            samples.append(cost)
+            total += cost
+            if repeat is not None:
+                if len(samples) >= repeat:
+                    break
+            elif len(samples) >= 3 and total >= self.min_time * 1e9:
+                break
+        peak = None
+        if self.memory if memory is None else memory:
+            if setup:
+                setup()
+            peak = self.peak_kb(fn)
+        return self.record(name, samples, ops, peak, **extra)
+
+    @staticmethod
+    def peak_kb(fn):
+        """单次调用期间 python 分配内存的峰值（KB）"""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+
+    def record(self, name: str, samples: list, ops: int = 1, peak: float = None, **extra):
+        """记录一组单次调用耗时（纳秒）"""
+        vals = sorted(samples)
+        total = sum(vals)
+        res = {
+            'calls': len(vals),
+            'ops': ops * len(vals),
+            'ops_per_sec': round(ops * len(vals) / (total / 1e9), 2) if total else 0.0,
+            'us_per_op': round(total / 1e3 / (ops * len(vals)), 3) if vals else 0.0,
+            'p50_ms': round(_percentile(vals, 0.5) / 1e6, 4),
+            'p95_ms': round(_percentile(vals, 0.95) / 1e6, 4),
+            'p99_ms': round(_percentile(vals, 0.99) / 1e6, 4),
+            'max_ms': round(vals[-1] / 1e6, 4) if vals else 0.0,
+        }
+        if peak is not None:
+            res['peak_kb'] = peak
+        res.update(extra)
+        self.results[name] = res
+        print(f'  {name:<48} {res["ops_per_sec"]:>14,.1f} ops/s  p50 {res["p50_ms"]:>10.4f}ms  p95 {res["p95_ms"]:>10.4f}ms'
+              + (f'  peak {peak:>10,.1f}KB' if peak is not None else ''), flush=True)
+        return res
+
+
+def compare(base: dict, new: dict, threshold: float = 0.2):
+    """比较两次结果，变差超过 threshold 比例的记为回退；baseline 用例是旧写法的参照，不参与比较
+    :return (各用例的比较行, 回退的行)
+    """
+    rows, regressions = [], []
+    base_res, new_res = base.get('results', {}), new.get('results', {})
+    for name in sorted(set(base_res) & set(new_res)):
+        b, n = base_res[name], new_res[name]
+        if b.get('baseline') or n.get('baseline'):
+            continue
+        for key, higher_better in COMPARE_KEYS:
+            if key not in b or key not in n or not b[key]:
+                continue
+            if key == 'peak_kb' and max(b[key], n[key]) < MIN_PEAK_KB:
+                continue
+            change = (n[key] - b[key]) / b[key]
+            worse = -change if higher_better else change
+            row = (name, key, b[key], n[key], change, worse > threshold)
+            rows.append(row)
+            if row[-1]:
+                regressions.append(row)
+    return rows, regressions
+
+
+def load(path: str):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
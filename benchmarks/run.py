@@ -0,0 +1,106 @@
+"""wlfutil 基准测试入口，所有外部服务都由 fakes.py 在本地模拟，不需要网络
+
+python benchmarks/run.py                        # 跑全部用例，结果写入 benchmarks/results/<时间>.json
+python benchmarks/run.py --quick --only dt,log  # 小数据量快速检查部分模块
+python benchmarks/run.py --scale 10             # 10 倍数据量
+python benchmarks/run.py compare base.json new.json --threshold 0.2  # 有回退时退出码为 1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import importlib
+import subprocess
+import traceback
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, HERE]
+
+from harness import Runner, compare, load  # noqa: E402
+
+MODULES = ('import', 'log', 'dt', 'uni', 'file', 'conf', 'influx', 'mysql', 'redis', 'minio', 'shell')
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def cmd_run(args):
+    names = args.only.split(',') if args.only else list(MODULES)
+    unknown = [n for n in names if n not in MODULES]
+    if unknown:
+        sys.exit(f'unknown modules: {", ".join(unknown)}, choose from {", ".join(MODULES)}')
+    runner = Runner(quick=args.quick, scale=args.scale, memory=not args.no_memory, min_time=args.min_time)
+    failed = []
+    for name in names:
+        print(f'[{name}]', flush=True)
+        try:
+            importlib.import_module(f'bench_{name}').run(runner)
+        except Exception:
+            # 缺少驱动或某个模块出错时继续跑其他模块
+            traceback.print_exc()
+            failed.append(name)
+    out = args.out or os.path.join(HERE, 'results', time.strftime('%Y%m%d-%H%M%S') + ('-quick' if args.quick else '') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    meta = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'quick': args.quick,
+        'scale': args.scale,
+        'failed': failed,
+    }
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': runner.results}, f, ensure_ascii=False, indent=2)
+    print(f'{len(runner.results)} results written to {out}' + (f', failed modules: {", ".join(failed)}' if failed else ''))
+    return 1 if failed else 0
+
+
+def _num(v: float):
+    return f'{v:,.1f}' if v >= 100 else f'{v:.4f}'
+
+
+def cmd_compare(args):
+    base, new = load(args.base), load(args.new)
+    for label, data in (('base', base), ('new', new)):
+        meta = data.get('meta', {})
+        print(f'{label}: {meta.get("time")} commit {meta.get("commit")} python {meta.get("python")} quick {meta.get("quick")}')
+    rows, regressions = compare(base, new, args.threshold)
+    print(f'{"case":<48} {"metric":<12} {"base":>14} {"new":>14} {"change":>9}')
+    for name, key, b, n, change, bad in rows:
+        print(f'{name:<48} {key:<12} {_num(b):>14} {_num(n):>14} {change:>+8.1%}' + ('  REGRESSION' if bad else ''))
+    missing = sorted(set(base.get('results', {})) ^ set(new.get('results', {})))
+    if missing:
+        print(f'only in one run: {", ".join(missing)}')
+    print(f'{len(regressions)} regressions over {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['compare']:
+        parser = argparse.ArgumentParser(prog='run.py compare', description='比较两次基准测试结果')
+        parser.add_argument('base')
+        parser.add_argument('new')
+        parser.add_argument('--threshold', type=float, default=0.2, help='变差超过该比例记为回退')
+        return cmd_compare(parser.parse_args(argv[1:]))
+    parser = argparse.ArgumentParser(prog='run.py', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', help=f'逗号分隔的模块：{",".join(MODULES)}')
+    parser.add_argument('--quick', action='store_true', help='小数据量、短时间，用于快速检查')
+    parser.add_argument('--scale', type=float, default=1.0, help='数据量倍数')
+    parser.add_argument('--min-time', type=float, default=None, help='每个用例至少运行的秒数')
+    parser.add_argument('--no-memory', action='store_true', help='不统计峰值内存')
+    parser.add_argument('--out', help='结果文件路径')
+    return cmd_run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
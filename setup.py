@@ -21,7 +21,9 @@ setup(name="wlfutil",
       include_package_data=True,
       platforms="any",
       python_requires='>=3.7',
-      install_requires=['colorlog==6.6.0', 'influxdb==5.3.1', 'PyMySQL==1.0.2', 'paramiko==2.11.0', 'minio==7.1.9', 'redis==3.2.0'])
+      install_requires=['colorlog==6.6.0', 'influxdb==5.3.1', 'PyMySQL==1.0.2', 'paramiko==2.11.0', 'minio==7.1.9', 'redis==3.2.0'],
+      # ResampleUtil、DtUtil.parse_many 等的批量/按列接口需要 numpy：pip3 install wlfutil[numpy]
+      extras_require={'numpy': ['numpy>=1.17']})
 
 # 每次更新记得修改版本号
 # python3 setup.py sdist bdist_wheel
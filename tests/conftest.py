@@ -0,0 +1,19 @@
+"""测试直接复用 benchmarks/fakes.py 中的本地服务替身，不需要网络"""
+import os
+import sys
+import warnings
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+# 本地 http 服务，屏蔽 urllib3 的非 https 警告
+warnings.filterwarnings('ignore', module='urllib3')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def log_file(tmp_path_factory):
+    """各工具类出错时会写 LogUtil，测试中写到临时目录"""
+    from wlfutil import LogUtil
+    LogUtil.init(str(tmp_path_factory.mktemp('log') / 'test.log'))
+    return LogUtil
@@ -0,0 +1,25 @@
+import time
+from fakes import FakeRedis
+from wlfutil import CacheUtil
+
+TAG_KEY = b'wlfutil:cache:tag:t'
+
+
+def test_tag_set_expires_and_is_not_shortened():
+    with FakeRedis() as fake:
+        conf = fake.conf()
+
+        @CacheUtil.cached(ttl=100, tags=('t',), conf=conf)
+        def slow(x):
+            return x
+
+        @CacheUtil.cached(ttl=10, tags=('t',), conf=conf)
+        def fast(x):
+            return x
+
+        slow(1)
+        remain = fake.expire[TAG_KEY] - time.time()
+        assert 100 <= remain <= 200
+        fast(1)
+        assert fake.expire[TAG_KEY] - time.time() >= remain - 1
+        assert CacheUtil.invalidate_tags('t', conf=conf)
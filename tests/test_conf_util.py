@@ -0,0 +1,66 @@
+import time
+import configparser
+import threading
+import pytest
+from wlfutil import ConfUtil
+
+
+@pytest.fixture
+def conf(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfUtil, 'CHECK_INTERVAL', 0.05)
+    path = str(tmp_path / 'c.ini')
+    with open(path, 'w') as f:
+        f.write('[a]\nk = 1\n')
+    return path
+
+
+def test_batch_rollback_on_error(conf):
+    with pytest.raises(ValueError):
+        with ConfUtil.batch(conf):
+            ConfUtil.set_value(conf, 'a', 'k', 9)
+            raise ValueError
+    assert ConfUtil.get_value(conf, 'a', 'k') == '1'
+    with open(conf) as f:
+        assert '9' not in f.read()
+
+
+def test_batch_commits_on_success(conf):
+    with ConfUtil.batch(conf):
+        ConfUtil.set_value(conf, 'a', 'k', 2)
+        ConfUtil.set_value(conf, 'a', 'x', 3)
+    with open(conf) as f:
+        text = f.read()
+    assert 'k = 2' in text and 'x = 3' in text
+
+
+def test_reads_do_not_block_behind_batch(conf):
+    ConfUtil.get_value(conf, 'a', 'k')
+    entered, release = threading.Event(), threading.Event()
+
+    def _batch():
+        with ConfUtil.batch(conf):
+            ConfUtil.set_value(conf, 'a', 'k', 2)
+            entered.set()
+            release.wait(5)
+
+    th = threading.Thread(target=_batch)
+    th.start()
+    entered.wait(5)
+    time.sleep(0.1)
+    start = time.monotonic()
+    ConfUtil.get_value(conf, 'a', 'k')
+    assert time.monotonic() - start < 0.5
+    release.set()
+    th.join()
+
+
+def test_literal_percent_does_not_break_other_keys(conf):
+    with open(conf, 'w') as f:
+        f.write('[DEFAULT]\nbase = /opt\n[a]\nk = 1\nurl = http://x/%20y\nhome = %(base)s/app\nrate = 100%%\n')
+    assert ConfUtil.get_value(conf, 'a', 'k') == '1'
+    assert ConfUtil.get_value(conf, 'a', 'home') == '/opt/app'
+    assert ConfUtil.get_value(conf, 'a', 'rate') == '100%'
+    assert ConfUtil.get_value(conf, 'a', 'missing') is None
+    # 与 ConfigParser.get 一样，只有读到写错的值时才报错
+    with pytest.raises(configparser.InterpolationSyntaxError):
+        ConfUtil.get_value(conf, 'a', 'url')
@@ -0,0 +1,41 @@
+import time
+import threading
+from wlfutil import ConnRegistry
+
+
+def test_leased_client_closed_only_after_release():
+    closed = []
+    registry = ConnRegistry(lambda conf: object(), closed.append, capacity=1)
+    with registry.lease({'a': 1}) as client:
+        # 超出容量淘汰了正在使用的连接，只能等归还后再关闭
+        registry.get({'a': 2})
+        assert closed == []
+    assert closed == [client]
+
+
+def test_idle_eviction_skips_leased_client():
+    closed = []
+    registry = ConnRegistry(lambda conf: object(), closed.append, idle_timeout=0.05)
+    with registry.lease({'a': 1}) as client:
+        time.sleep(0.1)
+        registry.get({'a': 2})
+        assert client not in closed
+    assert client not in closed
+
+
+def test_concurrent_get_creates_one_client():
+    made, closed, got = [], [], []
+
+    def factory(conf):
+        time.sleep(0.01)
+        made.append(object())
+        return made[-1]
+
+    registry = ConnRegistry(factory, closed.append)
+    threads = [threading.Thread(target=lambda: got.append(registry.get({'a': 1}))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in got}) == 1
+    assert len(made) - len(closed) == 1
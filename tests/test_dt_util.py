@@ -0,0 +1,79 @@
+import re
+import datetime as dt
+import pytest
+from wlfutil import DtUtil
+
+FORMATS = (DtUtil.DF_STD_SEC, DtUtil.DF_STD_MIC, DtUtil.DF_INFLUX, DtUtil.DF_TRIM_DAY)
+INPUTS = ('2022-01-01 00:00:00', '2022-01-01 00:00:00.123456', '2022-01-01T00:00:00Z', '20220101',
+          '2022-01-01 00:00+08', '2022-W01-1 00:00:00', '2022-01-01T00:00:00', '+022-01-01 00:00:00',
+          '2022-01-01 00:00:0１', '2022-13-01 00:00:00', '2022-1-1 0:0:0', '2022010１', '2022-01-01 00:00:00.5')
+
+
+def _strptime(s, df):
+    try:
+        res = dt.datetime.strptime(s, df)
+    except ValueError as e:
+        return None, str(e)
+    return res + (dt.timedelta(hours=8) if df == DtUtil.DF_INFLUX else dt.timedelta()), None
+
+
+def _convert(s, df):
+    try:
+        return DtUtil.convert_str_to_date(s, df), None
+    except ValueError as e:
+        return None, str(e)
+
+
+@pytest.mark.parametrize('df', FORMATS)
+@pytest.mark.parametrize('s', INPUTS)
+def test_fast_parse_matches_strptime(s, df):
+    assert _convert(s, df) == _strptime(s, df)
+
+
+DATES = (dt.datetime(2022, 1, 1), dt.datetime(2022, 1, 1, 10, 0, 0, 123456), dt.datetime(2022, 12, 31, 23, 59, 59, 1),
+         dt.datetime(2022, 1, 1, 10, tzinfo=dt.timezone(dt.timedelta(hours=8))), dt.datetime(2022, 1, 1, 2, tzinfo=dt.timezone.utc),
+         dt.datetime(999, 1, 2, 3, 4, 5), dt.datetime(1, 1, 1))
+
+
+@pytest.mark.parametrize('df', FORMATS + (DtUtil.DF_CHN_DAY,))
+def test_format_many_matches_convert_date_to_str(df):
+    assert DtUtil.format_many(DATES, df) == [DtUtil.convert_date_to_str(d, df) for d in DATES]
+
+
+@pytest.mark.parametrize('src_df', FORMATS)
+@pytest.mark.parametrize('s', INPUTS)
+def test_convert_date_str_format_matches_strptime(s, src_df):
+    try:
+        expected = dt.datetime.strptime(s, src_df).strftime(DtUtil.DF_STD_MIC)
+    except ValueError as e:
+        with pytest.raises(ValueError, match=re.escape(str(e))):
+            DtUtil.convert_date_str_format(s, src_df, DtUtil.DF_STD_MIC)
+    else:
+        assert DtUtil.convert_date_str_format(s, src_df, DtUtil.DF_STD_MIC) == expected
+
+
+def test_parse_many_matches_per_call():
+    strings = ['2022-01-01 00:00:00', '2022-06-30 12:34:56'] * 3
+    expected = [DtUtil.convert_str_to_date(s) for s in strings]
+    assert DtUtil.parse_many(strings) == expected
+    assert DtUtil.parse_many(strings, cache=False) == expected
+
+
+def test_parse_many_epoch_and_datetime64():
+    np = pytest.importorskip('numpy')
+    strings = ['1970-01-01 08:00:00', '2022-01-01 00:00:00', '2022-01-01 00:00:01']
+    assert DtUtil.parse_many(strings, out='epoch').tolist() == [0, 1640966400, 1640966401]
+    assert DtUtil.parse_many(strings, out='epoch', tz_hours=0).tolist() == [28800, 1640995200, 1640995201]
+    arr = DtUtil.parse_many(strings, out='datetime64')
+    assert arr.dtype == np.dtype('datetime64[us]')
+    assert arr.tolist() == DtUtil.parse_many(strings)
+
+
+def test_format_many_epochs():
+    np = pytest.importorskip('numpy')
+    stamps = [0, 1640966400, 1640966401]
+    expected = ['1970-01-01 08:00:00', '2022-01-01 00:00:00', '2022-01-01 00:00:01']
+    assert DtUtil.format_many(stamps) == expected
+    assert DtUtil.format_many(np.array(stamps, dtype=np.int64)) == expected
+    assert DtUtil.format_many(np.array(stamps), tz_hours=0)[0] == '1970-01-01 00:00:00'
+    assert DtUtil.format_many(DtUtil.parse_many(expected, out='datetime64')) == expected
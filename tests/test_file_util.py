@@ -0,0 +1,75 @@
+import os
+from wlfutil import FileUtil
+
+
+def _tree(base):
+    target = os.path.join(base, 'target')
+    os.makedirs(os.path.join(target, 'sub'))
+    for name in ('a.txt', os.path.join('sub', 'b.txt')):
+        with open(os.path.join(target, name), 'w') as f:
+            f.write('x')
+    return target
+
+
+def test_background_delete_symlink_keeps_target(tmp_path):
+    target = _tree(str(tmp_path))
+    link = os.path.join(str(tmp_path), 'link')
+    os.symlink(target, link)
+    assert FileUtil.del_dir_or_file(link, background=True).wait(5)
+    assert not os.path.lexists(link)
+    assert sorted(os.listdir(target)) == ['a.txt', 'sub']
+    assert os.listdir(os.path.join(target, 'sub')) == ['b.txt']
+
+
+def test_background_delete_nested_symlink_keeps_target(tmp_path):
+    target = _tree(str(tmp_path))
+    victim = os.path.join(str(tmp_path), 'victim')
+    os.makedirs(victim)
+    os.symlink(target, os.path.join(victim, 'link'))
+    assert FileUtil.del_dir_or_file(victim, background=True).wait(5)
+    assert not os.path.lexists(victim)
+    assert sorted(os.listdir(target)) == ['a.txt', 'sub']
+
+
+def _sized_tree(base):
+    """root/a(3B) root/d1/b(5B) root/d1/d2/c(7B) root/d3/(空目录)"""
+    root = os.path.join(base, 'root')
+    os.makedirs(os.path.join(root, 'd1', 'd2'))
+    os.makedirs(os.path.join(root, 'd3'))
+    for name, size in (('a', 3), (os.path.join('d1', 'b'), 5), (os.path.join('d1', 'd2', 'c'), 7)):
+        with open(os.path.join(root, name), 'wb') as f:
+            f.write(b'x' * size)
+    return root
+
+
+def test_scan_size_counts_tree(tmp_path):
+    root = _sized_tree(str(tmp_path))
+    for workers in (1, 4):
+        res = FileUtil.scan_size(root, workers=workers)
+        assert (res['bytes'], res['files'], res['dirs'], res['errors'], res['cached']) == (15, 3, 4, 0, 0)
+    assert FileUtil.scan_size(os.path.join(root, 'a'))['bytes'] == 3
+    assert FileUtil.scan_size(os.path.join(root, 'missing'))['files'] == 0
+    assert FileUtil.get_file_size(root) == '15B'
+
+
+def test_scan_size_cache_tracks_changed_dirs(tmp_path):
+    root = _sized_tree(str(tmp_path))
+    cache = str(tmp_path / 'size.json')
+    assert FileUtil.scan_size(root, cache_file=cache)['cached'] == 0
+    res = FileUtil.scan_size(root, cache_file=cache)
+    assert (res['bytes'], res['files'], res['cached']) == (15, 3, 4)
+    # 新增文件改变了目录的修改时间，只有该目录重新统计
+    with open(os.path.join(root, 'd1', 'd2', 'new'), 'wb') as f:
+        f.write(b'x' * 100)
+    # 文件系统的时间精度可能不够区分两次修改，显式改掉目录的修改时间
+    os.utime(os.path.join(root, 'd1', 'd2'), ns=(1, 1))
+    res = FileUtil.scan_size(root, cache_file=cache)
+    assert (res['bytes'], res['files'], res['cached']) == (115, 4, 3)
+
+
+def test_format_size():
+    assert FileUtil.format_size(0) == '0B'
+    assert FileUtil.format_size(1023) == '1023B'
+    assert FileUtil.format_size(1536) == '1.5KB'
+    assert FileUtil.format_size(3 * 1024 ** 3) == '3.0GB'
+    assert FileUtil.format_size(2 * 1024 ** 5) == '2.0PB'
@@ -0,0 +1,31 @@
+import os
+import sys
+import subprocess
+import pytest
+import wlfutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRIVERS = ('influxdb', 'pymysql', 'paramiko', 'minio', 'redis', 'numpy')
+
+
+def _loaded(stmt: str):
+    """在全新的解释器中执行 stmt，返回其中已导入的驱动"""
+    code = f'{stmt}\nimport sys\nprint(" ".join(m for m in sys.modules if m.split(".")[0] in {DRIVERS!r}))'
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return {m.split('.')[0] for m in proc.stdout.split()}
+
+
+@pytest.mark.parametrize('stmt', ['import wlfutil', 'from wlfutil.all import LogUtil; LogUtil', 'from wlfutil import DtUtil; DtUtil'])
+def test_import_loads_no_driver(stmt):
+    assert _loaded(stmt) == set()
+
+
+def test_import_loads_only_own_driver():
+    assert _loaded('from wlfutil import RedisUtil; RedisUtil') == {'redis'}
+
+
+def test_unknown_util():
+    with pytest.raises(AttributeError):
+        wlfutil.NoSuchUtil
+    with pytest.raises(ImportError):
+        exec('from wlfutil.all import NoSuchUtil')
@@ -0,0 +1,178 @@
+import os
+import socket
+import time
+import datetime as dt
+import pytest
+from fakes import FakeInflux
+from wlfutil import InfluxUtil, InfluxWriter
+
+
+def test_write_data_keeps_sub_second_timestamps():
+    base = dt.datetime(2022, 1, 1, 8, 30)
+    times = [base + dt.timedelta(microseconds=us) for us in (0, 1, 250000, 999999)]
+    with FakeInflux(series=1, points=1) as fake:
+        InfluxUtil.write_data(fake.conf, 'tbl', [(t, 1, 1.0) for t in times])
+        query, body = fake.last_write
+    assert query['precision'] == ['n']
+    stamps = [int(line.rsplit(b' ', 1)[1]) for line in body.splitlines()]
+    assert len(set(stamps)) == len(times)
+    assert [InfluxUtil.EPOCH + dt.timedelta(microseconds=ns // 1000) for ns in stamps] == times
+
+
+def test_write_data_string_time_round_trip():
+    with FakeInflux(series=1, points=1) as fake:
+        InfluxUtil.write_data(fake.conf, 'tbl', [('1970-01-01 08:00:01.500000', 1, 1.0)])
+        _, body = fake.last_write
+    assert body.strip().endswith(b' 1500000000')
+
+
+@pytest.mark.parametrize('text, offset_ns', [
+    ('2022-01-01 00:00:00', 0),
+    ('2022-01-01T00:00:00.5', 500000000),
+    ('2022-01-01 00:00:00.12', 120000000),
+    ('2022-01-01 00:00:00.123456', 123456000),
+    ('2021-12-31T16:00:00Z', 0),
+    ('2021-12-31T16:00:00.25Z', 250000000),
+    ('2022-01-01T01:00:00+09:00', 0),
+    ('2021-12-31 11:00:00-0500', 0),
+    ('2022-01-01', 0),
+])
+def test_string_times_without_fromisoformat(text, offset_ns):
+    # 东八区 2022-01-01 00:00:00
+    assert int(InfluxUtil._epoch(text, 10 ** 9)) == 1640966400 * 10 ** 9 + offset_ns
+
+
+def _rows(n: int):
+    base = dt.datetime(2022, 1, 1)
+    return [((base + dt.timedelta(seconds=i // 3)).strftime('%Y-%m-%d %H:%M:%S'), i % 3, i * 0.1, i * 0.01, -1234.56789, i) for i in range(n)]
+
+
+def test_encode_lines_matches_make_lines():
+    from influxdb.line_protocol import make_lines
+    from bench_influx import legacy_points
+    rows = _rows(20) + [('2022-01-01 00:00:00', 'a b,c', 1.0, 2.0, 3.0, 4)]
+    assert InfluxUtil.encode_lines('my tbl', rows).splitlines() == make_lines({'points': legacy_points('my tbl', rows)}).splitlines()
+
+
+def test_encode_columns_matches_encode_lines():
+    np = pytest.importorskip('numpy')
+    rows = [r[:5] for r in _rows(20)]
+    times = np.array([r[0] for r in rows], dtype='datetime64[ns]')
+    lines = InfluxUtil.encode_columns('tbl', times, [r[1] for r in rows], [r[2:] for r in rows])
+    assert lines.splitlines() == InfluxUtil.encode_lines('tbl', rows).splitlines()
+    # 整数数组按整数字段写入
+    assert InfluxUtil.encode_columns('tbl', [1, 2], [0, 1], np.array([5, 6]), precision='s').splitlines() == ['tbl,tid=0 v1=5i 1', 'tbl,tid=1 v1=6i 2']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 10000])
+def test_iter_sql_matches_exec_sql(chunk_size):
+    with FakeInflux(series=3, points=20, fields=2) as fake:
+        points = list(InfluxUtil.iter_sql(fake.conf, 'select * from tbl', chunk_size=chunk_size))
+        assert points == InfluxUtil.exec_sql(fake.conf, 'select * from tbl')
+    assert len(points) == 60
+
+
+def test_query_columns():
+    np = pytest.importorskip('numpy')
+    with FakeInflux(series=3, points=20, fields=2) as fake:
+        cols = InfluxUtil.query_columns(fake.conf, 'select * from tbl', chunk_size=7)
+        points = InfluxUtil.exec_sql(fake.conf, 'select * from tbl')
+    assert sorted(cols) == ['tid', 'time', 'v1', 'v2']
+    assert cols['time'].dtype == np.int64 and cols['v1'].dtype == np.float64
+    assert cols['time'].tolist() == [p['time'] for p in points]
+    assert cols['v2'].tolist() == [p['v2'] for p in points]
+    assert cols['tid'].tolist() == [str(i) for i in range(3) for _ in range(20)]
+
+
+def _dead_conf():
+    """一个没有服务监听的端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return {'host': '127.0.0.1', 'port': port, 'database': 'bench'}
+
+
+def _points(n: int):
+    return [(dt.datetime(2022, 1, 1, 0, 0, i), 1, float(i)) for i in range(n)]
+
+
+def test_writer_merges_into_batches():
+    with FakeInflux(series=1, points=1) as fake:
+        with InfluxWriter(fake.conf, batch_size=10, flush_interval=10) as writer:
+            for _ in range(5):
+                writer.write('tbl', _points(5))
+            writer.flush()
+            stats = writer.stats()
+        assert (fake.write_requests, fake.written_lines) == (3, 25)
+    assert (stats['queued'], stats['written'], stats['buffered']) == (25, 25, 0)
+
+
+def test_writer_flushes_after_interval():
+    with FakeInflux(series=1, points=1) as fake:
+        with InfluxWriter(fake.conf, batch_size=100, flush_interval=0.05) as writer:
+            writer.write('tbl', _points(3))
+            deadline = time.monotonic() + 2
+            while writer.stats()['written'] < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert writer.stats()['written'] == 3
+            assert fake.write_requests == 1
+
+
+def test_writer_backpressure_drops_when_not_blocking():
+    with FakeInflux(series=1, points=1) as fake:
+        # 攒批等待时间很长，入队的数据一直留在队列中
+        with InfluxWriter(fake.conf, batch_size=100, flush_interval=10, max_queued=5) as writer:
+            assert writer.write('tbl', _points(4))
+            assert not writer.write('tbl', _points(2), block=False)
+            assert not writer.write('tbl', _points(2), timeout=0.05)
+            assert writer.write('tbl', _points(1), block=False)
+            writer.flush()
+            stats = writer.stats()
+        assert fake.written_lines == 5
+    assert (stats['queued'], stats['written'], stats['dropped']) == (5, 5, 4)
+
+
+def test_writer_rejects_writes_after_close():
+    with FakeInflux(series=1, points=1) as fake:
+        writer = InfluxWriter(fake.conf)
+        writer.close()
+        with pytest.raises(RuntimeError):
+            writer.write('tbl', _points(1))
+
+
+def test_writer_spills_and_replays_after_restart(tmp_path):
+    spill_dir = str(tmp_path)
+    rows = [(dt.datetime(2022, 1, 1, 0, 0, i), 1, float(i)) for i in range(5)]
+    with InfluxWriter(_dead_conf(), retries=0, spill_dir=spill_dir) as writer:
+        writer.write('tbl', rows)
+        writer.flush()
+        assert writer.stats()['spilled'] == 5
+    assert len([f for f in os.listdir(spill_dir) if f.endswith('.lp')]) == 1
+
+    with FakeInflux(series=1, points=1) as fake:
+        with InfluxWriter(fake.conf, spill_dir=spill_dir) as writer:
+            # 新进程启动时就把遗留的点数计入 spilled
+            assert writer.stats()['spilled'] == 5
+            writer.write('tbl', rows[:1])
+            writer.flush()
+            stats = writer.stats()
+        assert fake.written_lines == 6
+    assert (stats['queued'], stats['written'], stats['spilled']) == (1, 6, 0)
+    assert os.listdir(spill_dir) == []
+
+
+def test_writer_recovers_file_left_mid_replay(tmp_path):
+    spill_dir = str(tmp_path)
+    # 上次补写到一半退出时留下的文件
+    name = f'1-abcd1234-n-2.lp{InfluxWriter.REPLAYING}'
+    with open(os.path.join(spill_dir, name), 'w', encoding='utf-8') as f:
+        f.write('tbl,tid=1 v=1 1000000000\ntbl,tid=1 v=2 2000000000')
+    with FakeInflux(series=1, points=1) as fake:
+        with InfluxWriter(fake.conf, spill_dir=spill_dir) as writer:
+            assert writer.stats()['spilled'] == 2
+            writer.write_lines(['tbl,tid=1 v=3 3000000000'])
+            writer.flush()
+            stats = writer.stats()
+        assert fake.written_lines == 3
+    assert (stats['written'], stats['spilled']) == (3, 0)
+    assert os.listdir(spill_dir) == []
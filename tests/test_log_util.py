@@ -0,0 +1,164 @@
+import io
+import re
+import logging
+import threading
+import pytest
+from wlfutil import LogUtil
+
+
+@pytest.fixture
+def async_log(monkeypatch):
+    logger = logging.getLogger('wlfutil-test')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    monkeypatch.setattr(LogUtil, 'logger', logger)
+    monkeypatch.setattr(LogUtil, 'file_handler', None)
+    monkeypatch.setattr(LogUtil, 'console_handler', None)
+    handled = []
+    monkeypatch.setattr(LogUtil, '_handle', classmethod(lambda cls, *item: handled.append(item)))
+    LogUtil.start_async()
+    yield handled
+    LogUtil.shutdown()
+
+
+def test_async_snapshots_mutable_message(async_log):
+    msg = [1]
+    LogUtil.info('title', msg)
+    msg.append(2)
+    LogUtil.flush()
+    assert async_log[0][1:3] == ('title', '([1],)')
+
+
+def test_concurrent_shutdown_does_not_break_callers(async_log):
+    errors = []
+
+    def _spam():
+        try:
+            for i in range(5000):
+                LogUtil.info('t', i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_spam) for _ in range(4)]
+    for t in threads:
+        t.start()
+    LogUtil.shutdown()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    """日志写到内存中，去掉时间前缀后比较"""
+    buf = io.StringIO()
+    # 用独立的 logger，避免 pytest 的日志捕获 handler 参与格式化
+    logger = logging.getLogger('wlfutil-capture')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    monkeypatch.setattr(LogUtil, 'logger', logger)
+    monkeypatch.setattr(LogUtil, 'file_handler', logging.StreamHandler(buf))
+    monkeypatch.setattr(LogUtil, 'console_handler', None)
+    return lambda: re.sub(r'^\S+ \S+ ', '', buf.getvalue(), flags=re.M)
+
+
+def _emit():
+    LogUtil.info('title', 'message', 1)
+    LogUtil.error(None, {'k': 'v'})
+    LogUtil.warn('only title')
+
+
+def test_async_output_matches_sync(capture):
+    _emit()
+    sync = capture()
+    LogUtil.start_async()
+    try:
+        _emit()
+        LogUtil.flush()
+    finally:
+        LogUtil.shutdown()
+    assert LogUtil.log_queue is None
+    assert capture() == sync * 2
+
+
+def _blocked_worker(monkeypatch, overflow):
+    """后台线程卡在第一条日志上，队列最多放 2 条"""
+    release, handled = threading.Event(), []
+
+    def _handle(cls, *item):
+        release.wait(5)
+        handled.append(item[2])
+
+    monkeypatch.setattr(LogUtil, '_handle', classmethod(_handle))
+    LogUtil.start_async(queue_size=2, overflow=overflow, batch_size=1)
+    LogUtil.info(None, 0)
+    while LogUtil.log_queue.qsize():
+        pass
+    for i in range(1, 10):
+        LogUtil.info(None, i)
+    release.set()
+    LogUtil.shutdown()
+    return handled
+
+
+def test_overflow_drop_newest(monkeypatch):
+    handled = _blocked_worker(monkeypatch, LogUtil.OF_DROP_NEWEST)
+    assert handled == ['(0,)', '(1,)', '(2,)']
+    assert LogUtil.dropped == 7
+
+
+def test_overflow_drop_oldest(monkeypatch):
+    handled = _blocked_worker(monkeypatch, LogUtil.OF_DROP_OLDEST)
+    assert handled == ['(0,)', '(8,)', '(9,)']
+    assert LogUtil.dropped == 7
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        LogUtil.start_async(overflow='spill')
+
+
+class _Counted:
+    """记录被转成字符串的次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'counted'
+
+
+def test_suppressed_call_does_no_work(capture, monkeypatch):
+    monkeypatch.setattr(LogUtil, 'caller', True)
+    LogUtil.set_level(logging.INFO)
+    try:
+        arg = _Counted()
+        monkeypatch.setattr(LogUtil, '_log', classmethod(lambda cls, *a: pytest.fail('suppressed call reached _log')))
+        LogUtil.debug('title', arg)
+    finally:
+        LogUtil.set_level(logging.DEBUG)
+    assert arg.calls == 0
+    assert capture() == ''
+
+
+def test_caller_line_can_be_turned_off(capture, monkeypatch):
+    monkeypatch.setattr(LogUtil, 'caller', True)
+    LogUtil.info('title', 'message')
+    assert 'test_caller_line_can_be_turned_off' in capture()
+    LogUtil.set_caller(False)
+    LogUtil.info('other', 'message')
+    assert capture().count('test_caller_line_can_be_turned_off') == 1
+    assert '< other >' in capture()
+
+
+def test_formatting_waits_for_a_handler(capture, monkeypatch):
+    # pytest 在测试开始时会把捕获 handler 挂到所有不向上传递的 logger 上，这里再清掉
+    monkeypatch.setattr(LogUtil.logger, 'handlers', [])
+    title = _Counted()
+    LogUtil.file_handler.setLevel(logging.ERROR)
+    LogUtil.info(title, 'message')
+    assert title.calls == 0
+    LogUtil.file_handler.setLevel(logging.NOTSET)
+    LogUtil.info(title, 'message')
+    assert title.calls == 1
@@ -0,0 +1,128 @@
+import threading
+import pytest
+from wlfutil import MetricsUtil
+
+
+def _threads(fn, n: int = 4):
+    threads = [threading.Thread(target=fn) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_counter_across_threads():
+    counter = MetricsUtil.counter('t_counter_total', kind='a')
+    assert MetricsUtil.counter('t_counter_total', kind='a') is counter
+    _threads(lambda: [counter.inc() for _ in range(1000)])
+    counter.dec(5)
+    assert counter.snapshot() == {'value': 3995}
+
+    @MetricsUtil.counter('t_counter_calls')
+    def f():
+        pass
+
+    for _ in range(3):
+        f()
+    assert MetricsUtil.counter('t_counter_calls').snapshot() == {'value': 3}
+
+
+def test_counter_keeps_counts_of_finished_threads():
+    counter = MetricsUtil.counter('t_counter_pruned')
+    # 超过 64 个线程后结束线程的分片被合并，计数不丢
+    for _ in range(100):
+        _threads(counter.inc, 1)
+    assert counter.snapshot() == {'value': 100}
+    assert len(counter._shards) < 64
+
+
+def test_timer_quantiles():
+    timer = MetricsUtil.timer('t_timer_seconds')
+    for ms in range(1, 101):
+        timer.observe(ms / 1000)
+    snap = timer.snapshot()
+    assert snap['count'] == 100
+    assert snap['sum'] == pytest.approx(5.05)
+    assert snap['max'] == pytest.approx(0.1)
+    for q in (50, 95, 99):
+        assert snap[f'p{q}'] == pytest.approx(q / 1000, rel=1 / 16)
+
+
+def test_timer_counts_errors():
+    timer = MetricsUtil.timer('t_timer_errors')
+
+    @timer
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        fail()
+    with pytest.raises(KeyError):
+        with timer:
+            raise KeyError
+    with timer:
+        with timer:
+            pass
+    snap = timer.snapshot()
+    assert (snap['count'], snap['errors']) == (4, 2)
+
+
+def test_timer_generator_early_close_is_not_an_error():
+    timer = MetricsUtil.timer('t_timer_gen')
+
+    @timer
+    def gen():
+        yield from range(10)
+
+    assert list(gen()) == list(range(10))
+    it = gen()
+    next(it)
+    it.close()
+    snap = timer.snapshot()
+    assert (snap['count'], snap['errors']) == (2, 0)
+
+
+def test_gauge():
+    gauge = MetricsUtil.gauge('t_gauge')
+    gauge.set(3)
+    gauge.inc(2)
+    assert gauge.snapshot() == {'value': 5}
+    gauge.set(lambda: 42)
+    assert gauge.snapshot() == {'value': 42}
+    with pytest.raises(TypeError):
+        gauge(lambda: None)
+    with pytest.raises(ValueError):
+        MetricsUtil.counter('t_gauge')
+
+
+def test_disabled(monkeypatch):
+    timer = MetricsUtil.timer('t_timer_disabled')
+    monkeypatch.setattr(MetricsUtil, 'ENABLED', False)
+    assert timer(lambda x: x + 1)(1) == 2
+    assert timer.snapshot()['count'] == 0
+
+
+def test_reset_keeps_metrics():
+    counter = MetricsUtil.counter('t_counter_reset')
+    timer = MetricsUtil.timer('t_timer_reset')
+    counter.inc(3)
+    timer.observe(0.5)
+    MetricsUtil.reset()
+    assert counter.snapshot() == {'value': 0}
+    assert timer.snapshot()['count'] == 0
+    assert MetricsUtil.counter('t_counter_reset') is counter
+    counter.inc()
+    assert counter.snapshot() == {'value': 1}
+
+
+def test_to_prometheus():
+    MetricsUtil.counter('t_prom_total', 'rows written', table='a"b').inc(7)
+    MetricsUtil.timer('t_prom_seconds', step='load').observe(0.25)
+    MetricsUtil.timer('t_prom_idle_seconds')
+    text = MetricsUtil.to_prometheus()
+    assert '# HELP t_prom_total rows written\n# TYPE t_prom_total counter\nt_prom_total{table="a\\"b"} 7\n' in text
+    assert '# TYPE t_prom_seconds summary\n' in text
+    assert 't_prom_seconds{step="load",quantile="0.5"} ' in text
+    assert 't_prom_seconds_count{step="load"} 1\n' in text
+    # 没有调用过的计时器不导出
+    assert 't_prom_idle_seconds' not in text
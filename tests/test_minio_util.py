@@ -0,0 +1,60 @@
+import os
+from fakes import FakeS3
+from wlfutil import MinioUtil
+
+
+def test_download_dir_rejects_escaping_object_names(tmp_path):
+    local_dir = str(tmp_path / 'a' / 'b' / 'out')
+    with FakeS3() as fake:
+        MinioUtil.create_bucket(fake.conf, 'bkt')
+        # 直接写入服务端，绕过客户端对对象名的处理
+        objects = fake.buckets['bkt']
+        fake._put(objects, 'p/ok.txt', b'ok')
+        fake._put(objects, 'p/../../evil.txt', b'x')
+        fake._put(objects, 'p//a/../../../evil2.txt', b'x')
+        res = MinioUtil.download_dir(fake.conf, 'bkt', local_dir, prefix='p/')
+    assert res['files'] == 1 and res['failed'] == 2
+    assert all('escapes local_dir' in err for _, err in res['errors'])
+    assert not os.path.exists(str(tmp_path / 'a' / 'evil.txt'))
+    assert not os.path.exists(str(tmp_path / 'evil2.txt'))
+    with open(os.path.join(local_dir, 'ok.txt')) as f:
+        assert f.read() == 'ok'
+
+
+def test_put_stream_and_ranged_reads():
+    data = bytes(range(256)) * 4096
+    with FakeS3() as fake:
+        MinioUtil.create_bucket(fake.conf, 'bkt')
+        etag = MinioUtil.put_stream(fake.conf, 'bkt', 'bytes.bin', memoryview(data))
+        assert fake.buckets['bkt']['bytes.bin'][:2] == (data, etag)
+        assert MinioUtil.get_range(fake.conf, 'bkt', 'bytes.bin') == data
+        assert MinioUtil.get_range(fake.conf, 'bkt', 'bytes.bin', offset=1000, length=300) == data[1000:1300]
+        buf = bytearray(500)
+        assert MinioUtil.get_range(fake.conf, 'bkt', 'bytes.bin', offset=len(data) - 200, buf=buf) == 200
+        assert bytes(buf[:200]) == data[-200:]
+
+
+def test_put_stream_unknown_length_uses_parts():
+    part = 5 * 1024 * 1024
+    chunks = [bytes([i]) * (part // 2 + 7) for i in range(5)]
+    with FakeS3() as fake:
+        MinioUtil.create_bucket(fake.conf, 'bkt')
+        etag = MinioUtil.put_stream(fake.conf, 'bkt', 'gen.bin', iter(chunks), part_size=part)
+        # 分片上传的 etag 以 -分片数 结尾
+        assert etag.endswith('-3')
+        assert MinioUtil.get_range(fake.conf, 'bkt', 'gen.bin') == b''.join(chunks)
+
+
+def test_iter_object_chunks_and_buffer():
+    data = os.urandom(100000)
+    with FakeS3() as fake:
+        MinioUtil.create_bucket(fake.conf, 'bkt')
+        MinioUtil.put_stream(fake.conf, 'bkt', 'obj', data)
+        assert b''.join(MinioUtil.iter_object(fake.conf, 'bkt', 'obj', chunk_size=4096)) == data
+        buf = bytearray(30000)
+        sizes, out = [], bytearray()
+        for view in MinioUtil.iter_object(fake.conf, 'bkt', 'obj', offset=10, buf=buf):
+            sizes.append(len(view))
+            out += view
+        assert sizes == [30000, 30000, 30000, 9990]
+        assert bytes(out) == data[10:]
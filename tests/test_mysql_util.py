@@ -0,0 +1,95 @@
+import time
+import pytest
+from fakes import SqliteMysql
+from wlfutil import MysqlUtil, MysqlPool
+
+
+@pytest.fixture
+def db():
+    with SqliteMysql() as db:
+        db.execute('create table t (a int, b text)')
+        db.execute('insert into t values (?, ?)', [(i, f'x{i}') for i in range(25)])
+        yield db
+
+
+def test_iter_rows_matches_get(db):
+    rows = list(MysqlUtil.iter_rows(db.conf, 'select a, b from t order by a', batch_size=7))
+    assert rows == list(MysqlUtil.get(db.conf, 'select a, b from t order by a'))
+
+
+def test_iter_rows_batches(db):
+    batches = list(MysqlUtil.iter_rows(db.conf, 'select a from t order by a', batch_size=10, batches=True))
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [r[0] for b in batches for r in b] == list(range(25))
+
+
+def test_iter_rows_dict_rows(db):
+    rows = MysqlUtil.iter_rows(db.conf, 'select a, b from t where a < %s order by a', params=(2,), dict_rows=True)
+    assert list(rows) == [{'a': 0, 'b': 'x0'}, {'a': 1, 'b': 'x1'}]
+
+
+def test_iter_rows_early_close_drops_connection(db):
+    rows = MysqlUtil.iter_rows(db.conf, 'select a from t', batch_size=5)
+    next(rows)
+    pool = MysqlUtil.REGISTRY.get(db.conf)
+    assert pool.stats()['in_use'] == 1
+    rows.close()
+    # 未读完的连接直接断开，不会回到空闲队列
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 0
+
+
+def test_save_many_from_generator(db):
+    db.execute('create table w (id int primary key, name text)')
+    result = MysqlUtil.save_many(db.conf, 'insert into w (id, name) values (%s, %s)', ((i, f'y{i}') for i in range(23)), batch_size=5)
+    assert result['rows'] == 23
+    assert MysqlUtil.get(db.conf, 'select count(*), max(name) from w') == [(23, 'y9')]
+
+
+def test_save_many_keeps_committed_batches(db):
+    db.execute('create table w (id int primary key)')
+    # 第 3 批出现主键冲突，前两批已经提交，第 3 批回滚
+    rows = [(i,) for i in range(24)] + [(0,)]
+    with pytest.raises(Exception):
+        MysqlUtil.save_many(db.conf, 'insert into w (id) values (%s)', rows, batch_size=10, commit_every=2)
+    assert MysqlUtil.get(db.conf, 'select count(*) from w') == [(20,)]
+
+
+def test_iter_rows_survives_pool_eviction(monkeypatch):
+    monkeypatch.setattr(MysqlUtil.REGISTRY, 'capacity', 2)
+    with SqliteMysql() as db:
+        db.execute('create table t (a int)')
+        db.execute('insert into t values (?)', [(i,) for i in range(1000)])
+        rows = MysqlUtil.iter_rows(db.conf, 'select a from t', batch_size=10)
+        first = next(rows)
+        # 其他配置挤占容量，淘汰了 iter_rows 正在使用的连接池
+        for i in range(5):
+            MysqlUtil.get(dict(db.conf, extra=i), 'select 1')
+        assert 1 + sum(1 for _ in rows) == 1000
+        assert first[0] == 0
+
+
+def test_pool_reclaims_idle_connections_under_light_use():
+    with SqliteMysql() as db:
+        pool = MysqlPool(db.conf, idle_timeout=0.1)
+        conns = [pool.checkout() for _ in range(3)]
+        for conn in conns:
+            pool.checkin(conn)
+        # 持续有少量请求，每次都取到最近归还的那个连接
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            pool.checkin(pool.checkout())
+            time.sleep(0.01)
+        assert pool.stats()['size'] == 1
+        pool.close()
+
+
+def test_connect_keeps_legacy_conn():
+    with SqliteMysql() as db:
+        db.execute('create table t (a int); insert into t values (1);')
+        pool = MysqlUtil.connect(db.conf)
+        cursor = MysqlUtil.CONN.cursor()
+        cursor.execute('select a from t')
+        assert cursor.fetchall() == [(1,)]
+        assert pool is MysqlUtil.REGISTRY.get(db.conf)
+        MysqlUtil.CONN.close()
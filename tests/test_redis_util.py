@@ -0,0 +1,74 @@
+import pytest
+from fakes import FakeRedis
+from wlfutil import RedisUtil
+
+
+@pytest.fixture(scope='module')
+def redis():
+    with FakeRedis() as fake:
+        RedisUtil.connect(fake.conf(decode_responses=True))
+        yield fake
+
+
+def test_lpop_many(redis):
+    RedisUtil.lpush_many({'l1': ['3', '2', '1'], 'l2': ['x']})
+    assert RedisUtil.lpop_many(['l1', 'l2', 'none'], 2) == {'l1': ['1', '2'], 'l2': ['x'], 'none': []}
+    assert RedisUtil.lget('l1') == ['3']
+
+
+@pytest.mark.parametrize('count', [0, -1])
+def test_lpop_many_non_positive_count_pops_nothing(redis, count):
+    key = f'l{count}'
+    RedisUtil.lpush_many({key: ['b', 'a']})
+    assert RedisUtil.lpop_many([key], count) == {key: []}
+    assert RedisUtil.lget(key) == ['a', 'b']
+
+
+def test_mset_mget_exists_many(redis):
+    mapping = {f's{i}': str(i) for i in range(25)}
+    RedisUtil.mset(mapping, chunk_size=10)
+    assert RedisUtil.mget(list(mapping) + ['missing'], chunk_size=7) == dict(mapping, missing=None)
+    assert RedisUtil.exists_many(['s0', 's24', 'missing'], chunk_size=2) == {'s0': True, 's24': True, 'missing': False}
+
+
+def test_mset_with_ttl(redis):
+    RedisUtil.mset({'t1': 'a', 't2': 'b'}, ttl=100)
+    assert RedisUtil.mget(['t1', 't2']) == {'t1': 'a', 't2': 'b'}
+    assert 0 < RedisUtil.CONN.ttl('t1') <= 100
+
+
+def test_lget_many(redis):
+    RedisUtil.lpush_many({'g1': ['b', 'a'], 'g2': ['c'], 'g3': []})
+    assert RedisUtil.lget_many(['g1', 'g2', 'g3'], chunk_size=1) == {'g1': ['a', 'b'], 'g2': ['c'], 'g3': []}
+
+
+def test_hash_batches(redis):
+    RedisUtil.hset_many({'h1': {'a': '1', 'b': '2'}, 'h2': {'c': '3'}, 'h3': {}})
+    assert RedisUtil.hget_many('h1', ['a', 'x']) == {'a': '1', 'x': None}
+    assert RedisUtil.hget_many('h1', []) == {}
+    assert RedisUtil.hgetall_many(['h1', 'h2', 'h3']) == {'h1': {'a': '1', 'b': '2'}, 'h2': {'c': '3'}, 'h3': {}}
+
+
+def test_pipeline_sends_in_chunks(redis):
+    with RedisUtil.pipeline(chunk_size=3) as pipe:
+        idx = [pipe.set(f'p{i}', i) for i in range(7)]
+        # 每攒够 3 条就发送一次，剩余的退出 with 时发送
+        assert len(pipe.results) == 6
+        idx.append(pipe.get('p6'))
+    assert idx == list(range(8))
+    assert pipe.results == [True] * 7 + ['6']
+
+
+def test_pipeline_discards_pending_on_error(redis):
+    with pytest.raises(ValueError):
+        with RedisUtil.pipeline(chunk_size=10) as pipe:
+            pipe.set('never', 1)
+            raise ValueError
+    assert RedisUtil.get('never') is None
+
+
+def test_transaction_pipeline(redis):
+    with RedisUtil.pipeline(transaction=True) as pipe:
+        pipe.rpush('tx', 'a', 'b')
+        pipe.lrange('tx', 0, -1)
+    assert pipe.results == [2, ['a', 'b']]
@@ -0,0 +1,89 @@
+import random
+import datetime as dt
+import pytest
+from wlfutil import ResampleUtil, UniUtil
+
+np = pytest.importorskip('numpy')
+
+DAY = '2022-01-01 00:00:00'
+BEGIN = 1640966400  # 东八区 2022-01-01 00:00:00
+
+
+def _points(n: int = 500, seed: int = 1):
+    """一天内随机分布、乱序的点，部分桶为空"""
+    rnd = random.Random(seed)
+    times = [BEGIN + rnd.randrange(0, 86400, 7) for _ in range(n)]
+    values = [rnd.uniform(-10, 10) for _ in range(n)]
+    return times, values
+
+
+def _naive(times, values, freq: int, agg: str):
+    """逐个桶用 python 计算，空桶为 None"""
+    pairs = sorted(zip(times, values), key=lambda p: p[0])
+    res = []
+    for b in range(BEGIN, BEGIN + 86400, freq):
+        vs = [v for t, v in pairs if b <= t < b + freq]
+        if agg == 'count':
+            res.append(len(vs))
+        elif not vs:
+            res.append(None)
+        else:
+            res.append({'first': vs[0], 'last': vs[-1], 'mean': sum(vs) / len(vs), 'min': min(vs), 'max': max(vs), 'sum': sum(vs)}[agg])
+    return res
+
+
+def test_buckets_match_date_partition():
+    expected = list(UniUtil.date_partition(600, DAY, DAY))
+    starts = ResampleUtil.buckets(600, DAY, DAY)
+    assert [dt.datetime(1970, 1, 1, 8) + dt.timedelta(seconds=int(s)) for s in starts] == expected
+    assert np.concatenate(list(ResampleUtil.iter_buckets(600, DAY, DAY, block=7))).tolist() == starts.tolist()
+
+
+@pytest.mark.parametrize('agg', ['first', 'last', 'mean', 'min', 'max', 'sum', 'count'])
+def test_resample_matches_naive(agg):
+    times, values = _points()
+    starts, res = ResampleUtil.resample(times, values, 600, DAY, DAY, agg=agg)
+    assert starts.tolist() == list(range(BEGIN, BEGIN + 86400, 600))
+    expected = _naive(times, values, 600, agg)
+    assert [None if v != v else v for v in res.tolist()] == pytest.approx(expected)
+
+
+def test_resample_as_dict_has_date_partition_shape():
+    times, values = _points(50)
+    res = ResampleUtil.resample(times, values, 3600, DAY, DAY, as_dict=True)
+    assert list(res) == list(UniUtil.date_partition(3600, DAY, DAY))
+    assert list(res.values()) == pytest.approx(_naive(times, values, 3600, 'mean'))
+
+
+def test_datetime64_times_are_local():
+    times = np.array(['2022-01-01T00:00:30', '2022-01-01T00:01:30'], dtype='datetime64[s]')
+    starts, res = ResampleUtil.resample(times, [1.0, 2.0], 60, DAY, DAY, agg='sum')
+    assert res[:2].tolist() == [1.0, 2.0]
+    assert np.isnan(res[2])
+
+
+def test_fill():
+    times = [BEGIN + 30, BEGIN + 3 * 60 + 30]
+    _, ffill = ResampleUtil.resample(times, [1.0, 4.0], 60, DAY, DAY, fill='ffill')
+    assert ffill[:6].tolist() == [1.0, 1.0, 1.0, 4.0, 4.0, 4.0]
+    _, linear = ResampleUtil.resample(times, [1.0, 4.0], 60, DAY, DAY, fill='linear')
+    assert linear[:4].tolist() == [1.0, 2.0, 3.0, 4.0]
+    # 两侧都有值的空桶才插值
+    assert np.isnan(linear[4])
+
+
+@pytest.mark.parametrize('fill', [None, 'ffill', 'linear'])
+def test_iter_resample_blocks_match_resample(fill):
+    times, values = _points(30)
+    starts, res = ResampleUtil.resample(times, values, 60, DAY, DAY, fill=fill)
+    blocks = list(ResampleUtil.iter_resample(times, values, 60, DAY, DAY, fill=fill, block=100))
+    assert len(blocks) == 15
+    assert np.concatenate([b[0] for b in blocks]).tolist() == starts.tolist()
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in blocks]), res)
+
+
+def test_unknown_agg_and_fill():
+    with pytest.raises(ValueError):
+        ResampleUtil.resample([BEGIN], [1.0], 60, DAY, DAY, agg='median')
+    with pytest.raises(ValueError):
+        ResampleUtil.resample([BEGIN], [1.0], 60, DAY, DAY, fill='bfill')
@@ -0,0 +1,39 @@
+import time
+import pytest
+from fakes import FakeSSH
+from wlfutil import ShellUtil
+
+
+@pytest.fixture(scope='module')
+def ssh():
+    with FakeSSH() as fake:
+        yield fake
+    ShellUtil.REGISTRY.clear()
+
+
+@pytest.mark.parametrize('lines', [True, False])
+def test_stream_timeout_while_output_keeps_arriving(ssh, lines):
+    start = time.monotonic()
+    stream = ShellUtil.stream(ssh.conf, 'bytes 50000000', timeout=0.3, lines=lines)
+    for _ in stream:
+        time.sleep(0.01)
+        # 超时不生效时主动结束，避免把整段输出读完
+        if time.monotonic() - start > 3:
+            stream.close()
+            break
+    assert stream.timed_out
+    assert time.monotonic() - start < 3
+
+
+def test_stream_survives_idle_eviction(ssh, monkeypatch):
+    monkeypatch.setattr(ShellUtil.REGISTRY, 'idle_timeout', 0.2)
+    stream = ShellUtil.stream(ssh.conf, 'bytes 2000000', lines=False)
+    size = 0
+    for i, (_, data) in enumerate(stream):
+        size += len(data)
+        if i == 2:
+            time.sleep(0.4)
+            # 其他配置的调用会触发空闲淘汰，正在读取的连接不能被关闭
+            ShellUtil.exec(dict(ssh.conf, timeout=11), 'echo x')
+    assert size == 2000000
+    assert stream.exit_status == 0
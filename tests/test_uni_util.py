@@ -0,0 +1,65 @@
+import random
+import pytest
+from wlfutil import UniUtil
+
+np = pytest.importorskip('numpy')
+
+
+def _naive(values, max, partitions, min=0):
+    """逐个数据按 range_partition 的区间归类，返回 (各区间个数, 各区间总和, 小于 min 的个数)"""
+    starts, interval = [], max / partitions
+    start = min
+    while len(starts) < partitions:
+        starts.append(start)
+        start += interval
+    counts, sums, underflow = [0] * partitions, [0.0] * partitions, 0
+    for v in values:
+        if v != v:
+            continue
+        if v < starts[0]:
+            underflow += 1
+            continue
+        k = partitions - 1
+        for i in range(partitions - 1):
+            if v < starts[i + 1]:
+                k = i
+                break
+        counts[k] += 1
+        sums[k] += v
+    return counts, sums, underflow
+
+
+def test_histogram_matches_naive():
+    rnd = random.Random(1)
+    values = [rnd.uniform(-5, 120) for _ in range(2000)] + [0, 10, 99.99, 100, float('nan')]
+    hist = UniUtil.range_histogram(values, 100, 10, sums=True)
+    counts, sums, underflow = _naive(values, 100, 10)
+    assert hist.labels == UniUtil.range_partition(100, 10)
+    assert hist.counts.tolist() == counts
+    assert hist.sums.tolist() == pytest.approx(sums)
+    assert hist.underflow == underflow
+    assert hist.to_dict() == dict(zip(hist.labels, counts))
+
+
+def test_histogram_boundaries_follow_range_partition():
+    # 0.1 的累加误差下，区间起点与 range_partition 完全一致
+    hist = UniUtil.range_histogram([0.3, 0.30000000000000004, 0.7], 1, 10, sums=False)
+    assert hist.labels == UniUtil.range_partition(1, 10)
+    assert hist.sums is None
+    assert hist.counts.tolist() == _naive([0.3, 0.30000000000000004, 0.7], 1, 10)[0]
+    idx = hist.add([-1, 0, 2, float('nan')], return_indices=True)
+    assert idx.tolist() == [-1, 0, 9, -1]
+    assert hist.underflow == 1
+
+
+def test_histogram_chunks_iterables_and_merges():
+    values = [i % 37 for i in range(1000)]
+    whole = UniUtil.range_histogram(values, 36, 6, sums=True)
+    chunked = UniUtil.range_histogram(iter(values), 36, 6, sums=True, chunk_size=64)
+    assert chunked.counts.tolist() == whole.counts.tolist()
+    assert chunked.sums.tolist() == whole.sums.tolist()
+    left = UniUtil.range_histogram(values[:300], 36, 6, sums=True)
+    right = UniUtil.range_histogram(np.array(values[300:]), 36, 6, sums=True)
+    assert left.merge(right).counts.tolist() == whole.counts.tolist()
+    with pytest.raises(ValueError):
+        left.merge(UniUtil.range_histogram(values, 36, 5))
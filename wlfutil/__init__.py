@@ -0,0 +1,53 @@
+"""Common utils for python.
+
+各工具类放在独立的子模块中，首次使用时才导入对应的驱动（influxdb、pymysql、paramiko 等）
+"""
+import importlib
+
+# 工具类名 -> 所在子模块
+_UTILS = {
+    'UniUtil': 'wlfutil.uni_util',
+    'RangeHistogram': 'wlfutil.uni_util',
+    'ConfUtil': 'wlfutil.conf_util',
+    'FileUtil': 'wlfutil.file_util',
+    'DeleteHandle': 'wlfutil.file_util',
+    'DtUtil': 'wlfutil.dt_util',
+    'LogUtil': 'wlfutil.log_util',
+    'InfluxUtil': 'wlfutil.influx_util',
+    'InfluxWriter': 'wlfutil.influx_util',
+    'MysqlUtil': 'wlfutil.mysql_util',
+    'MysqlPool': 'wlfutil.mysql_util',
+    'ShellUtil': 'wlfutil.shell_util',
+    'ShellStream': 'wlfutil.shell_util',
+    'MinioUtil': 'wlfutil.minio_util',
+    'RedisUtil': 'wlfutil.redis_util',
+    'RedisPipeline': 'wlfutil.redis_util',
+    'CacheUtil': 'wlfutil.cache_util',
+    'FanoutUtil': 'wlfutil.fanout_util',
+    'ConnRegistry': 'wlfutil.conn_util',
+    'ResampleUtil': 'wlfutil.resample_util',
+    'MetricsUtil': 'wlfutil.metrics_util',
+    'Metric': 'wlfutil.metrics_util',
+}
+
+__all__ = list(_UTILS)
+
+
+def _load(name: str):
+    """按名字导入工具类，未知名字返回 None"""
+    module = _UTILS.get(name)
+    if module is None:
+        return None
+    return getattr(importlib.import_module(module), name)
+
+
+def __getattr__(name: str):
+    util = _load(name)
+    if util is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = util
+    return util
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
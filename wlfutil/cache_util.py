@@ -0,0 +1,312 @@
+import time
+import uuid
+import zlib
+import pickle
+import inspect
+import threading
+from functools import wraps
+from collections import OrderedDict
+from wlfutil.log_util import LogUtil
+
+# 本地缓存中表示"没有"的标记，区分缓存的 None 结果
+_MISS = object()
+
+
+class CacheUtil:
+    """两级缓存工具类：先查进程内 LRU，再查 redis，都没有才真正执行函数
+
+    @CacheUtil.cached(ttl=600, local_maxsize=256, tags=('report',))
+    def query_report(day, kind='all'):
+        ...
+    query_report.cache_stats()           # 命中 / 未命中 / 耗时统计
+    query_report.invalidate('2022-01-01')  # 删除某组参数的缓存
+    CacheUtil.invalidate_tags('report')  # 删除带该标签的所有缓存
+    """
+    # redis 中缓存 key 的前缀
+    PREFIX = 'wlfutil:cache:'
+    # 序列化后超过该字节数才压缩
+    COMPRESS_MIN = 1024
+    # 已装饰的函数，invalidate_tags 时同步清理它们的本地缓存
+    _MEMOS = []
+    _MEMOS_LOCK = threading.Lock()
+
+    @classmethod
+    def cached(cls, ttl: int = 300, local_maxsize: int = 1024, local_ttl: float = None, tags=(), conf: dict = None, key=None):
+        """缓存装饰器
+        :param ttl redis 中的过期秒数，None 表示不使用 redis，只用本地缓存
+        :param local_maxsize 本地 LRU 最多缓存的结果数，0 表示不使用本地缓存
+        :param local_ttl 本地缓存的过期秒数，默认同 ttl；其他进程执行 invalidate 后本进程最多还会读到这么久的旧值
+        :param tags 标签，可以是固定的元组，也可以是 tags(*args, **kwargs) 返回标签的函数
+        :param conf redis 配置，为空时使用 RedisUtil 最近一次 connect 的配置
+        :param key 自定义 key 的函数 key(*args, **kwargs)，默认按参数生成，同 UniUtil.get_uuid
+        """
+
+        def decorator(fn):
+            memo = _Memo(cls, fn, ttl, local_maxsize, local_ttl, tags, conf, key)
+            with cls._MEMOS_LOCK:
+                cls._MEMOS.append(memo)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                return memo.call(args, kwargs)
+
+            wrapper.cache_stats = memo.stats
+            wrapper.cache_clear = memo.clear
+            wrapper.invalidate = memo.invalidate
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def invalidate_tags(cls, *tags, conf: dict = None):
+        """删除带这些标签的所有缓存，包括 redis 和本进程的本地缓存
+        :return 删除的 redis key 数
+        """
+        with cls._MEMOS_LOCK:
+            memos = list(cls._MEMOS)
+        for memo in memos:
+            memo.drop_local_tags(tags)
+        client = _client(conf)
+        if client is None:
+            return 0
+        tag_keys = [cls._tag_key(tag) for tag in tags]
+        pipe = client.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        keys = set()
+        for members in pipe.execute():
+            keys.update(members)
+        pipe = client.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(*tag_keys)
+        return pipe.execute()[0] if keys else 0
+
+    @classmethod
+    def _tag_key(cls, tag: str):
+        return f'{cls.PREFIX}tag:{tag}'
+
+    @classmethod
+    def dumps(cls, value):
+        """紧凑序列化，首字节标记是否压缩"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) >= cls.COMPRESS_MIN:
+            return b'z' + zlib.compress(data, 1)
+        return b'p' + data
+
+    @staticmethod
+    def loads(data: bytes):
+        if data[:1] == b'z':
+            return pickle.loads(zlib.decompress(data[1:]))
+        return pickle.loads(data[1:])
+
+
+def _client(conf: dict = None):
+    """缓存使用的 redis 客户端，与 RedisUtil 共用连接注册表，但不解码返回值（缓存的值是二进制）"""
+    from wlfutil.redis_util import RedisUtil
+    if conf is None:
+        if RedisUtil.CONN is None:
+            return None
+        conf = RedisUtil.CONN.connection_pool.connection_kwargs
+    if conf.get('decode_responses'):
+        conf = _binary_conf(conf)
+    return RedisUtil.REGISTRY.get(conf)
+
+
+# 配置 -> 去掉 decode_responses 后的配置，保持同一个对象，避免每次都重新计算配置指纹
+_BINARY_CONFS = {}
+
+
+def _binary_conf(conf: dict):
+    entry = _BINARY_CONFS.get(id(conf))
+    if entry is None or entry[0] is not conf:
+        entry = _BINARY_CONFS[id(conf)] = (conf, dict(conf, decode_responses=False))
+    return entry[1]
+
+
+class _Memo:
+    """单个被装饰函数的缓存状态"""
+
+    def __init__(self, util, fn, ttl, local_maxsize, local_ttl, tags, conf, key):
+        self.util, self.fn = util, fn
+        self.ttl, self.local_maxsize = ttl, local_maxsize
+        self.local_ttl = ttl if local_ttl is None else local_ttl
+        self.tags, self.conf, self.key_fn = tags, conf, key
+        self.name = f'{fn.__module__}.{fn.__qualname__}'
+        try:
+            self.sig = inspect.signature(fn)
+        except (TypeError, ValueError):
+            self.sig = None
+        self._lock = threading.Lock()
+        # key -> (结果, 过期时间, 标签)
+        self._local = OrderedDict()
+        # key -> 正在计算该 key 时持有的锁，同一 key 同时只算一次
+        self._inflight = {}
+        self.local_hits, self.redis_hits, self.misses, self.errors = 0, 0, 0, 0
+        self.compute_time, self.redis_time = 0.0, 0.0
+
+    def key(self, args: tuple, kwargs: dict):
+        """按参数生成确定的 key，f(1) 与 f(x=1)、省略默认值与显式传入默认值得到相同的 key"""
+        if self.key_fn is not None:
+            return f'{self.util.PREFIX}{self.name}:{self.key_fn(*args, **kwargs)}'
+        params = None
+        if self.sig is not None:
+            try:
+                bound = self.sig.bind(*args, **kwargs)
+                bound.apply_defaults()
+                params = sorted(bound.arguments.items())
+            except TypeError:
+                pass
+        if params is None:
+            params = [repr(args), sorted(kwargs.items())]
+        return f'{self.util.PREFIX}{self.name}:{uuid.uuid3(uuid.NAMESPACE_OID, repr(params))}'
+
+    def call(self, args: tuple, kwargs: dict):
+        key = self.key(args, kwargs)
+        value = self._get_local(key)
+        if value is not _MISS:
+            return value
+        with self._lock:
+            inflight = self._inflight.setdefault(key, threading.Lock())
+        with inflight:
+            # 等到锁时可能别的线程已经算好了
+            value = self._get_local(key, count=False)
+            if value is not _MISS:
+                with self._lock:
+                    self.local_hits += 1
+                return value
+            try:
+                return self._load(key, args, kwargs)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def _load(self, key: str, args: tuple, kwargs: dict):
+        """查 redis，没有则执行函数并写入两级缓存"""
+        client = self._redis()
+        if client is not None:
+            start = time.perf_counter()
+            try:
+                data = client.get(key)
+                if data is not None:
+                    value = self.util.loads(data)
+                    with self._lock:
+                        self.redis_hits += 1
+                        self.redis_time += time.perf_counter() - start
+                    self._put_local(key, value, self._tags(args, kwargs))
+                    return value
+            except Exception as e:
+                self._error('cache get failed', key, e)
+        start = time.perf_counter()
+        value = self.fn(*args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self.compute_time += time.perf_counter() - start
+        tags = self._tags(args, kwargs)
+        self._put_local(key, value, tags)
+        if client is not None:
+            start = time.perf_counter()
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.set(key, self.util.dumps(value), ex=self.ttl)
+                for tag in tags:
+                    pipe.sadd(self.util._tag_key(tag), key)
+                    pipe.ttl(self.util._tag_key(tag))
+                remains = pipe.execute()[2::2]
+                self._extend_tags([tag for tag, remain in zip(tags, remains) if remain < self.ttl], client)
+                with self._lock:
+                    self.redis_time += time.perf_counter() - start
+            except Exception as e:
+                self._error('cache set failed', key, e)
+        return value
+
+    def _extend_tags(self, tags: list, client):
+        """标签集合的剩余时间不足 ttl 时延长到 2 * ttl，只延长不缩短
+        集合不会比其中任何 key 先过期，持续写入时每个 ttl 周期最多多一次往返，不再写入的标签集合最终会过期
+        """
+        if not tags:
+            return
+        pipe = client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.expire(self.util._tag_key(tag), self.ttl * 2)
+        pipe.execute()
+
+    def _redis(self):
+        if self.ttl is None:
+            return None
+        try:
+            return _client(self.conf)
+        except Exception as e:
+            self._error('cache redis unavailable', self.name, e)
+            return None
+
+    def _error(self, title: str, key: str, e: Exception):
+        """redis 出错时退化为直接执行函数，不影响调用方"""
+        with self._lock:
+            self.errors += 1
+        # 未初始化日志时只计数，不能因为写日志失败影响调用方
+        if LogUtil.logger:
+            LogUtil.warn(title, key, e)
+
+    def _tags(self, args: tuple, kwargs: dict):
+        tags = self.tags(*args, **kwargs) if callable(self.tags) else self.tags
+        return tuple(tags or ())
+
+    def _get_local(self, key: str, count: bool = True):
+        if not self.local_maxsize:
+            return _MISS
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISS
+            if entry[1] is not None and entry[1] < time.monotonic():
+                del self._local[key]
+                return _MISS
+            self._local.move_to_end(key)
+            if count:
+                self.local_hits += 1
+            return entry[0]
+
+    def _put_local(self, key: str, value, tags: tuple):
+        if not self.local_maxsize:
+            return
+        expire = None if self.local_ttl is None else time.monotonic() + self.local_ttl
+        with self._lock:
+            self._local[key] = (value, expire, tags)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_maxsize:
+                self._local.popitem(last=False)
+
+    def drop_local_tags(self, tags: tuple):
+        tags = set(tags)
+        with self._lock:
+            for key in [k for k, entry in self._local.items() if tags.intersection(entry[2])]:
+                del self._local[key]
+
+    def invalidate(self, *args, **kwargs):
+        """删除这组参数对应的缓存"""
+        key = self.key(args, kwargs)
+        with self._lock:
+            self._local.pop(key, None)
+        client = self._redis()
+        if client is not None:
+            client.delete(key)
+
+    def clear(self):
+        """清空本地缓存，redis 中的缓存按 ttl 过期或用 invalidate / invalidate_tags 删除"""
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        with self._lock:
+            calls = self.local_hits + self.redis_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hit_rate': round((self.local_hits + self.redis_hits) / calls, 4) if calls else 0.0,
+                'local_size': len(self._local),
+                'avg_compute': round(self.compute_time / self.misses, 6) if self.misses else 0.0,
+                'avg_redis': round(self.redis_time / (self.redis_hits + self.misses), 6) if self.redis_hits + self.misses else 0.0,
+            }
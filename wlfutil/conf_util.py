@@ -0,0 +1,236 @@
+import os
+import time
+import threading
+import configparser
+from contextlib import contextmanager
+
+
+class ConfUtil:
+    """配置文件【config.ini】操作工具类
+
+    每个配置文件单独缓存，文件的修改时间或大小变化后才重新读取；读取只查内存中的快照，不加锁
+    with ConfUtil.batch('config.ini'):
+        ConfUtil.set_value('config.ini', 'img', 'last', 10)
+        ConfUtil.set_value('config.ini', 'img', 'count', 20)  # 退出 with 时一次性写入
+    """
+    # 最近一次 connect 的 ConfigParser，兼容旧用法
+    CONN = None
+    # 距上次检查超过该秒数后，读取时才 stat 一次文件看是否有变化；watch 模式下由后台线程检查，读取时不再检查
+    CHECK_INTERVAL = 1.0
+    # 配置文件路径 -> _ConfFile
+    _FILES = {}
+    _LOCK = threading.Lock()
+    _watcher, _watch_stop = None, None
+
+    @classmethod
+    def _init(cls, conf):
+        if cls.CONN is None:
+            cls.connect(conf)
+
+    @classmethod
+    def connect(cls, conf):
+        try:
+            cls.CONN = cls._file(conf).parser
+        except Exception as e:
+            from wlfutil.log_util import LogUtil
+            LogUtil.error("conf init failed, please check the config", e)
+
+    @classmethod
+    def _file(cls, conf):
+        """该路径对应的缓存，没有则读取文件新建"""
+        cf = cls._FILES.get(conf)
+        if cf is None:
+            with cls._LOCK:
+                cf = cls._FILES.get(conf)
+                if cf is None:
+                    cf = cls._FILES[conf] = _ConfFile(conf)
+        return cf
+
+    @classmethod
+    def _data(cls, conf):
+        """该配置文件当前的快照 {章节: {键: 值}}，需要时先重新读取"""
+        cf = cls._file(conf)
+        if cf.next_check <= time.monotonic():
+            cf.refresh(cls.CHECK_INTERVAL)
+        return cf.data
+
+    @staticmethod
+    def _interpolate(section, key, values):
+        """读到的键才展开 %(name)s 引用，结果与 ConfigParser.get 相同；其他键里写错的 % 不影响这里"""
+        value = values[key]
+        if value is None or '%' not in value:
+            return value
+        return _INTERPOLATION.before_get(_OPTION_PARSER, section, key, value, values)
+
+    @classmethod
+    def get_items(cls, conf, section):
+        """获取某一章节的所有信息"""
+        data = cls._data(conf)
+        if section not in data:
+            raise configparser.NoSectionError(section)
+        values = data[section]
+        return {key: cls._interpolate(section, key, values) for key in values}
+
+    @classmethod
+    def get_value(cls, conf, section, key):
+        """根据章节id获取图片最终序号"""
+        data = cls._data(conf)
+        if section not in data:
+            raise configparser.NoSectionError(section)
+        values, key = data[section], str(key)
+        if key not in values:
+            return None
+        return cls._interpolate(section, key, values)
+
+    @classmethod
+    def set_value(cls, conf, section, key, value):
+        """根据章节id设置图片最终序号，在 batch 中时只修改内存，退出 batch 时统一写入"""
+        cf = cls._file(conf)
+        with cf.lock:
+            if not cf.depth:
+                cf.refresh(cls.CHECK_INTERVAL, force=True)
+            if not cf.parser.has_section(section):
+                cf.parser.add_section(section)
+            cf.parser.set(section, str(key), str(value))
+            if cf.depth:
+                cf.dirty = True
+            else:
+                cf.save()
+
+    @classmethod
+    @contextmanager
+    def batch(cls, conf):
+        """批量修改，期间的 set_value 只改内存，退出时写一次文件（先写临时文件再替换）
+        期间其他线程的 set_value 会等待，修改在退出后才对 get_value 可见；with 中抛出异常时放弃这些修改
+        """
+        cf = cls._file(conf)
+        with cf.lock:
+            if not cf.depth:
+                cf.refresh(cls.CHECK_INTERVAL, force=True)
+            cf.depth += 1
+            try:
+                yield
+            except BaseException:
+                cf.depth -= 1
+                if not cf.depth and cf.dirty:
+                    cf.dirty = False
+                    cf.load()
+                raise
+            cf.depth -= 1
+            if not cf.depth and cf.dirty:
+                cf.dirty = False
+                cf.save()
+
+    @classmethod
+    def watch(cls, interval: float = 1.0):
+        """启动后台线程每隔 interval 秒检查已加载的配置文件，读取时不再检查"""
+        with cls._LOCK:
+            if cls._watcher is not None:
+                return
+            cls._watch_stop = threading.Event()
+            cls._watcher = threading.Thread(target=cls._watch, args=(interval, cls._watch_stop), name='wlfutil-conf-watch', daemon=True)
+            cls._watcher.start()
+
+    @classmethod
+    def unwatch(cls):
+        """停止后台检查，恢复为读取时按 CHECK_INTERVAL 检查"""
+        with cls._LOCK:
+            watcher, stop = cls._watcher, cls._watch_stop
+            cls._watcher, cls._watch_stop = None, None
+        if watcher is not None:
+            stop.set()
+            watcher.join()
+            for cf in list(cls._FILES.values()):
+                cf.next_check = 0
+
+    @classmethod
+    def _watch(cls, interval: float, stop: threading.Event):
+        while True:
+            for cf in list(cls._FILES.values()):
+                try:
+                    cf.refresh(float('inf'), force=True)
+                except Exception:
+                    pass
+            if stop.wait(interval):
+                break
+
+
+# 快照中保存原始值，读取时按键展开，与默认的 ConfigParser 使用相同的插值规则
+_INTERPOLATION = configparser.BasicInterpolation()
+# 插值时只用到它的 optionxform
+_OPTION_PARSER = configparser.ConfigParser()
+
+
+class _ConfFile:
+    """单个配置文件的 ConfigParser、只读快照以及文件的 (修改时间, 大小)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        # batch 嵌套层数，以及 batch 中是否有未写入的修改
+        self.depth, self.dirty = 0, False
+        self.next_check = 0
+        self.load()
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self):
+        stamp = self._stamp()
+        parser = configparser.ConfigParser()
+        parser.read(self.path, encoding='utf-8')
+        return parser, stamp
+
+    def load(self):
+        self._swap(*self._read())
+
+    def _swap(self, parser, stamp):
+        old, self.parser, self.stamp = getattr(self, 'parser', None), parser, stamp
+        # connect 拿到的旧 ConfigParser 也换成新读取的
+        if old is not None and ConfUtil.CONN is old:
+            ConfUtil.CONN = parser
+        self._snapshot()
+
+    def _snapshot(self):
+        """生成新的快照整体替换，读取方拿到的旧快照不会被修改
+        保存未插值的原始值（含 DEFAULT 中的键），值里的 % 在读到该键时才展开
+        """
+        self.data = {section: dict(self.parser.items(section, raw=True)) for section in self.parser.sections()}
+
+    def refresh(self, interval: float, force: bool = False):
+        """文件的修改时间或大小变化时重新读取
+        stat 和比较不加锁，读取文件也在锁外，只在替换快照时尝试加锁；锁被占用（如其他线程的 batch 中）时
+        不等待，继续使用旧快照，下次读取时再检查
+        """
+        now = time.monotonic()
+        if not force and self.next_check > now:
+            return
+        self.next_check = now + interval
+        old = self.stamp
+        if self.depth or self.dirty or self._stamp() == old:
+            return
+        parser, stamp = self._read()
+        if not self.lock.acquire(blocking=False):
+            self.next_check = 0
+            return
+        try:
+            # 读取期间可能有其他线程写入了文件或开始了 batch
+            if not self.depth and not self.dirty and self.stamp == old:
+                self._swap(parser, stamp)
+        finally:
+            self.lock.release()
+
+    def save(self):
+        """先写临时文件再替换，其他进程不会读到写了一半的文件"""
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            self.parser.write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.stamp = self._stamp()
+        self._snapshot()
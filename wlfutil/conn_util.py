@@ -0,0 +1,226 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from wlfutil.uni_util import UniUtil
+
+
+class ConnRegistry:
+    """连接注册表，按配置指纹缓存多个客户端的 LRU，各 xxUtil 共用
+
+    线程安全；fork 后子进程中自动清空，子进程会重新建立自己的连接
+    用 lease / acquire 借出的客户端在归还前不会被关闭，被淘汰的等最后一次归还后再关闭
+    with registry.lease(conf) as client:
+        ...
+    :param factory 根据配置新建客户端 factory(conf)
+    :param closer 淘汰时关闭客户端 closer(client)，为空时不做处理
+    :param capacity 最多缓存的客户端数，超过后关闭最久未使用的
+    :param idle_timeout 客户端空闲超过该秒数后关闭，None 表示不按空闲淘汰
+    """
+    # 配置指纹缓存 id(conf) -> (conf, 配置快照, 指纹)，避免每次调用都排序、拼接、计算uuid
+    _FPS = OrderedDict()
+    _FPS_LOCK = threading.Lock()
+    _FPS_SIZE = 1024
+    # fork 后子进程继承下来的客户端，只保留引用不关闭，避免关掉父进程还在用的连接
+    _ORPHANS = []
+
+    def __init__(self, factory, closer=None, capacity: int = 8, idle_timeout: float = None):
+        self.factory, self.closer = factory, closer
+        self.capacity, self.idle_timeout = capacity, idle_timeout
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        # 指纹 -> [客户端, 上次使用时间]
+        self._entries = OrderedDict()
+        # 指纹 -> 正在新建该客户端时持有的锁，同一配置只建一次
+        self._creating = {}
+        # id(客户端) -> [客户端, 借出次数, 指纹, 是否已被淘汰]
+        self._leases = {}
+        self.hits, self.misses, self.evicted = 0, 0, 0
+
+    def _after_fork(self):
+        ConnRegistry._ORPHANS.extend(entry[0] for entry in self._entries.values())
+        self._reset()
+
+    @classmethod
+    def fingerprint(cls, conf: dict):
+        """配置指纹，同 UniUtil.get_uuid，相同的配置对象只计算一次"""
+        entry = cls._FPS.get(id(conf))
+        if entry is not None and entry[0] is conf and entry[1] == conf:
+            return entry[2]
+        fp = UniUtil.get_uuid(conf)
+        with cls._FPS_LOCK:
+            cls._FPS[id(conf)] = (conf, dict(conf), fp)
+            cls._FPS.move_to_end(id(conf))
+            while len(cls._FPS) > cls._FPS_SIZE:
+                cls._FPS.popitem(last=False)
+        return fp
+
+    def get(self, conf: dict):
+        """获取该配置对应的客户端，没有则新建；不借出，长时间使用时用 lease"""
+        return self._get(conf, False)
+
+    def acquire(self, conf: dict):
+        """获取并借出该配置对应的客户端，用完需 release"""
+        return self._get(conf, True)
+
+    def release(self, client):
+        """归还 acquire 借出的客户端，已被淘汰且没有其他借用时关闭"""
+        closing = []
+        with self._lock:
+            lease = self._leases.get(id(client))
+            if lease is None or lease[0] is not client:
+                return
+            lease[1] -= 1
+            if lease[1] > 0:
+                return
+            del self._leases[id(client)]
+            if lease[3]:
+                closing.append(client)
+            else:
+                # 借出期间一直在使用，归还时才算最后一次使用
+                entry = self._entries.get(lease[2])
+                if entry is not None and entry[0] is client:
+                    entry[1] = time.monotonic()
+        self._close(closing)
+
+    @contextmanager
+    def lease(self, conf: dict):
+        """with registry.lease(conf) as client: ... 期间客户端不会被关闭"""
+        client = self.acquire(conf)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def _get(self, conf: dict, lease: bool):
+        key = self.fingerprint(conf)
+        with self._lock:
+            client, evicted = self._hit(key, lease)
+            if client is None:
+                creating = self._creating.setdefault(key, threading.Lock())
+        self._close(evicted)
+        if client is not None:
+            return client
+        with creating:
+            with self._lock:
+                client, evicted = self._hit(key, lease)
+            self._close(evicted)
+            if client is not None:
+                return client
+            try:
+                client = self.factory(conf)
+            except BaseException:
+                with self._lock:
+                    self._creating.pop(key, None)
+                raise
+            # 放入缓存和移除新建锁在同一次加锁中完成，之后到达的线程一定能查到这个客户端
+            with self._lock:
+                self._creating.pop(key, None)
+                self.misses += 1
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = [client, time.monotonic()]
+                    evicted = self._evict()
+                else:
+                    # 已经有其他线程放入了客户端，使用已有的，关闭多建的这个
+                    evicted = [client]
+                    client = entry[0]
+                    entry[1] = time.monotonic()
+                    self._entries.move_to_end(key)
+                if lease:
+                    self._lease(key, client)
+            self._close(evicted)
+            return client
+
+    def _hit(self, key: str, lease: bool = False):
+        """查找并刷新使用时间，同时淘汰空闲过久的客户端；调用方需持有锁"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, self._evict()
+        self.hits += 1
+        entry[1] = time.monotonic()
+        self._entries.move_to_end(key)
+        if lease:
+            self._lease(key, entry[0])
+        return entry[0], self._evict()
+
+    def _lease(self, key: str, client):
+        """借出次数加一；调用方需持有锁"""
+        lease = self._leases.get(id(client))
+        if lease is None or lease[0] is not client:
+            self._leases[id(client)] = [client, 1, key, False]
+        else:
+            lease[1] += 1
+
+    def _retire(self, clients: list):
+        """从需要关闭的客户端中去掉借出中的，标记为归还后关闭；调用方需持有锁"""
+        res = []
+        for client in clients:
+            lease = self._leases.get(id(client))
+            if lease is not None and lease[0] is client:
+                lease[3] = True
+            else:
+                res.append(client)
+        return res
+
+    def _evict(self):
+        """按容量和空闲时间淘汰，返回需要立即关闭的客户端；调用方需持有锁"""
+        evicted = []
+        while len(self._entries) > self.capacity:
+            evicted.append(self._entries.popitem(last=False)[1][0])
+        if self.idle_timeout is not None:
+            deadline = time.monotonic() - self.idle_timeout
+            for key, entry in list(self._entries.items()):
+                if entry[1] >= deadline:
+                    break
+                # 借出中的客户端正在使用，不算空闲
+                lease = self._leases.get(id(entry[0]))
+                if lease is not None and lease[0] is entry[0]:
+                    continue
+                del self._entries[key]
+                evicted.append(entry[0])
+        self.evicted += len(evicted)
+        return self._retire(evicted)
+
+    def _close(self, clients: list):
+        if not self.closer:
+            return
+        for client in clients:
+            try:
+                self.closer(client)
+            except Exception:
+                pass
+
+    def discard(self, conf: dict, client=None):
+        """关闭并移除该配置对应的客户端，借出中的等归还后关闭
+        :param client 不为空时只关闭这个客户端，只有当前缓存的正是它才移除，避免误关其他线程刚重建的连接
+        """
+        key = self.fingerprint(conf)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (client is None or entry[0] is client):
+                del self._entries[key]
+                client = entry[0]
+            closing = self._retire([client]) if client is not None else []
+        self._close(closing)
+
+    def clear(self):
+        """关闭并移除所有客户端，借出中的等归还后关闭"""
+        with self._lock:
+            clients = self._retire([entry[0] for entry in self._entries.values()])
+            self._entries.clear()
+        self._close(clients)
+
+    def items(self):
+        """[(指纹, 客户端), ...]"""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'leased': len(self._leases), 'hits': self.hits, 'misses': self.misses, 'evicted': self.evicted}
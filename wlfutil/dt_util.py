@@ -0,0 +1,244 @@
+import datetime as dt
+import re
+import locale
+from functools import lru_cache
+from dateutil.relativedelta import relativedelta
+from wlfutil.uni_util import UniUtil
+
+
+class DtUtil:
+    """日期格式化工具类"""
+
+    # 日期格式
+    DF_STD_MIC = '%Y-%m-%d %H:%M:%S.%f'
+    DF_STD_SEC = '%Y-%m-%d %H:%M:%S'
+    DF_STD_DAY = '%Y-%m-%d'
+    DF_TRIM_DAY = '%Y%m%d'
+    DF_TRIM_MON = '%Y%m'
+    DF_CHN_DAY = '%Y年%m月%d日'
+    DF_CHN_MON = '%Y年%m月'
+    DF_CUS_MIN = '%Y_%m%d_%H%M'
+    DF_INFLUX = '%Y-%m-%dT%H:%M:%SZ'
+
+    # 日期单位
+    DU_SEC = 'sec'
+    DU_MIN = 'min'
+    DU_HOUR = 'hour'
+    DU_DAY = 'day'
+    DU_YEAR = 'year'
+
+    # windows 环境下需要配置
+    if UniUtil.get_os() == 'Windows':
+        locale.setlocale(locale.LC_CTYPE, 'chinese')
+
+    @staticmethod
+    def convert_date_str_format(src_dt_str: str, src_df: str = DF_STD_SEC, dst_df: str = DF_CHN_DAY):
+        """把日期字符串格式化成其他格式的日期字符串
+        @param src_dt_str:源日期字符串
+        @param src_df:源日期字符串格式
+        @param dst_df:目标日期字符串格式
+        """
+        res = _parse(src_dt_str, src_df)
+        if src_df == DtUtil.DF_INFLUX:
+            # 这里只换格式，不换时区
+            res -= _INFLUX_SHIFT
+        return _format(res, dst_df)
+
+    @staticmethod
+    def convert_date_to_str(src_dt: dt.datetime = dt.datetime.now(), dst_df: str = DF_STD_SEC):
+        """把日期式化成其他格式的日期字符串
+        @param src_dt:源日期
+        @param dst_df:目标日期字符串格式
+        """
+        return dt.datetime.strftime(src_dt, dst_df)
+
+    @staticmethod
+    def convert_str_to_date(src_dt_str: str, src_df: str = DF_STD_SEC):
+        """把日期字符串格式化成日期
+        @param src_dt_str:源日期字符串
+        @param src_df:源日期字符串格式
+        """
+        return _parse(src_dt_str, src_df)
+
+    @staticmethod
+    def parse_many(src_dt_strs, src_df: str = DF_STD_SEC, out: str = 'datetime', cache: bool = True, tz_hours: int = 8):
+        """批量把日期字符串转换成日期，结果与逐个调用 convert_str_to_date 相同
+        DF_STD_SEC / DF_STD_MIC / DF_INFLUX / DF_TRIM_DAY 使用手写解析，其他格式使用 strptime
+        @param src_dt_strs:日期字符串序列
+        @param src_df:源日期字符串格式
+        @param out:输出类型，datetime 返回 list；datetime64 返回 numpy datetime64[us] 数组；epoch 返回 numpy int64 秒级时间戳数组
+        @param cache:是否使用有界 LRU 缓存，适合大量重复的字符串
+        @param tz_hours:out 为 epoch 时日期所在的时区
+        """
+        parse = _parse_cached if cache else _parse
+        res = [parse(s, src_df) for s in src_dt_strs]
+        if out == 'datetime':
+            return res
+        import numpy as np
+        arr = np.array(res, dtype='datetime64[us]')
+        if out == 'datetime64':
+            return arr
+        return arr.astype('datetime64[s]').astype(np.int64) - tz_hours * 3600
+
+    @staticmethod
+    def format_many(src_dts, dst_df: str = DF_STD_SEC, tz_hours: int = 8):
+        """批量把日期格式化成日期字符串
+        @param src_dts:datetime 序列，或秒级时间戳序列，或 numpy datetime64 / int64 时间戳数组
+        @param dst_df:目标日期字符串格式，结果与逐个调用 convert_date_to_str 相同
+        @param tz_hours:输入为时间戳时转换到的时区
+        """
+        if hasattr(src_dts, 'dtype'):
+            import numpy as np
+            if np.issubdtype(src_dts.dtype, np.datetime64):
+                src_dts = src_dts.astype('datetime64[us]').tolist()
+            else:
+                src_dts = (src_dts.astype(np.int64) + tz_hours * 3600).astype('datetime64[s]').astype('datetime64[us]').tolist()
+        epoch = dt.datetime(1970, 1, 1) + dt.timedelta(hours=tz_hours)
+        res = []
+        for d in src_dts:
+            if not isinstance(d, dt.datetime):
+                d = epoch + dt.timedelta(seconds=d)
+            res.append(_format(d, dst_df))
+        return res
+
+    @staticmethod
+    def shift_date(src_dt: dt.datetime = dt.datetime.now(), mon: int = 0, day: int = 0, sec: int = 0):
+        """获取今天日期，根据传入的偏移量偏移
+        @param mon:今天日期按月偏移量
+        @param day:今天日期按日偏移量
+        @param day:今天日期按秒偏移量
+        """
+        return src_dt + relativedelta(months=mon) + relativedelta(days=day) + relativedelta(seconds=sec)
+
+    @staticmethod
+    def diff_time(src_dt_str1: str, src_dt_str2: str, src_df: str = DF_STD_SEC, diff_unit=DU_SEC):
+        """获取两个日期字符串的时间差，默认单位秒
+        @param src_dt_str1:日期字符串
+        @param src_dt_str2:日期字符串
+        @param src_df:源日期字符串格式
+        @return 正值代表第二个比第一个晚几秒，负值则相反
+        """
+        ts1 = DtUtil.convert_str_to_date(src_dt_str1, src_df).timestamp()
+        ts2 = DtUtil.convert_str_to_date(src_dt_str2, src_df).timestamp()
+        diff_secs = int(ts2 - ts1)
+        if diff_unit == DtUtil.DU_SEC:
+            return diff_secs
+        elif diff_unit == DtUtil.DU_MIN:
+            return round(diff_secs / 60, 1)
+        elif diff_unit == DtUtil.DU_HOUR:
+            return round(diff_secs / (60 * 60), 1)
+        elif diff_unit == DtUtil.DU_DAY:
+            return round(diff_secs / (60 * 60 * 24), 1)
+        elif diff_unit == DtUtil.DU_YEAR:
+            return round(diff_secs / (60 * 60 * 24 * 365), 1)
+
+    @staticmethod
+    def day_start_of_date_str(src_dt_str: str, src_df: str = DF_STD_SEC):
+        """获取某一天的起始时间
+        @param src_dt_str:日期字符串
+        @param src_df:源日期字符串格式
+        @return 某一天的起始时间
+        """
+        d1 = DtUtil.convert_str_to_date(src_dt_str, src_df)
+        return DtUtil.convert_str_to_date(DtUtil.convert_date_to_str(d1, DtUtil.DF_STD_DAY), DtUtil.DF_STD_DAY)
+
+    @staticmethod
+    def day_end_of_date_str(src_dt_str: str, src_df: str = DF_STD_SEC):
+        """获取某一天的结束时间，即第二天的开始时间
+        @param src_dt_str:源日期字符串
+        @param src_df:源日期字符串格式
+        @return 某一天的起始时间
+        """
+        d1 = DtUtil.convert_str_to_date(src_dt_str, src_df) + relativedelta(days=1)
+        return DtUtil.convert_str_to_date(DtUtil.convert_date_to_str(d1, DtUtil.DF_STD_DAY), DtUtil.DF_STD_DAY)
+
+    @staticmethod
+    def over_shift(src_dt1: dt.datetime, src_dt2: dt.datetime, shift: int = 60):
+        """判断两个时间是否相差是否超过偏移量
+        @param src_dt1:源日期
+        @param src_dt2:源日期
+        @param shift:偏移量，单位秒
+        @return 返回 True | False
+        """
+        return abs((src_dt1 - src_dt2).total_seconds()) > shift
+
+    @staticmethod
+    def get_date_of_min(src_dt_str: str):
+        """获取当前时间自定义格式-分钟级时间
+        @param src_dt_str:源日期字符串
+        """
+        return DtUtil.convert_date_to_str(dst_df=DtUtil.DF_CUS_MIN)
+
+
+# DF_INFLUX 是 UTC 时间，转换成东八区
+_INFLUX_SHIFT = dt.timedelta(hours=8)
+
+
+# 只接受严格的固定布局（ASCII 数字、分隔符位置固定）再交给 fromisoformat，其他输入一律交给 strptime
+# fromisoformat 本身还接受时区、ISO 周等 strptime 不接受的写法，不能只看长度
+_RE_STD_SEC = re.compile(r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d', re.ASCII).fullmatch
+_RE_STD_MIC = re.compile(r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}', re.ASCII).fullmatch
+_RE_INFLUX = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ', re.ASCII).fullmatch
+_RE_TRIM_DAY = re.compile(r'\d{8}', re.ASCII).fullmatch
+
+
+def _parse_std_sec(s: str):
+    if _RE_STD_SEC(s):
+        return dt.datetime.fromisoformat(s)
+
+
+def _parse_std_mic(s: str):
+    if _RE_STD_MIC(s):
+        return dt.datetime.fromisoformat(s)
+
+
+def _parse_influx(s: str):
+    if _RE_INFLUX(s):
+        return dt.datetime.fromisoformat(s[:19]) + _INFLUX_SHIFT
+
+
+def _parse_trim_day(s: str):
+    if _RE_TRIM_DAY(s):
+        return dt.datetime(int(s[:4]), int(s[4:6]), int(s[6:]))
+
+
+# 固定格式的手写解析，格式不符时返回 None 交给 strptime
+_PARSERS = {
+    DtUtil.DF_STD_SEC: _parse_std_sec,
+    DtUtil.DF_STD_MIC: _parse_std_mic,
+    DtUtil.DF_INFLUX: _parse_influx,
+    DtUtil.DF_TRIM_DAY: _parse_trim_day,
+}
+
+# 固定格式的快速格式化，结果与 strftime 逐字节相同；带时区的日期、datetime 的子类和 1000 年以前（各平台 %Y 补零不一致）交给 strftime
+_FORMATTERS = {
+    DtUtil.DF_STD_SEC: lambda d: d.isoformat(' ', 'seconds'),
+    DtUtil.DF_STD_MIC: lambda d: d.isoformat(' ', 'microseconds'),
+    DtUtil.DF_INFLUX: lambda d: d.isoformat('T', 'seconds') + 'Z',
+    DtUtil.DF_TRIM_DAY: lambda d: f'{d.year}{d.month:02d}{d.day:02d}',
+}
+
+
+def _format(d: dt.datetime, dst_df: str):
+    fmt = _FORMATTERS.get(dst_df)
+    if fmt and type(d) is dt.datetime and d.tzinfo is None and d.year >= 1000:
+        return fmt(d)
+    return d.strftime(dst_df)
+
+
+def _parse(src_dt_str: str, src_df: str):
+    parser = _PARSERS.get(src_df)
+    if parser:
+        try:
+            res = parser(src_dt_str)
+            if res is not None:
+                return res
+        except ValueError:
+            pass
+    res = dt.datetime.strptime(src_dt_str, src_df)
+    if src_df == DtUtil.DF_INFLUX:
+        res += _INFLUX_SHIFT
+    return res
+
+
+_parse_cached = lru_cache(maxsize=65536)(_parse)
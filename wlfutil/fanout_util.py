@@ -0,0 +1,92 @@
+import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from wlfutil.uni_util import UniUtil
+from wlfutil.dt_util import DtUtil
+from wlfutil.conn_util import ConnRegistry
+
+# 每个线程/进程独立的 influxdb 连接
+_local = threading.local()
+
+
+def _influx_fetch(conf: dict, sql: str):
+    """在当前线程/进程的独立连接上执行 influxdb 查询"""
+    from influxdb import InfluxDBClient
+    clients = getattr(_local, 'influx', None)
+    if clients is None:
+        clients = _local.influx = {}
+    key = ConnRegistry.fingerprint(conf)
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = InfluxDBClient(**conf)
+    return list(client.query(sql).get_points())
+
+
+def _mysql_fetch(conf: dict, sql: str):
+    """从连接池取连接执行 mysql 查询，每个进程有自己的连接池"""
+    from wlfutil.mysql_util import MysqlUtil
+    return MysqlUtil.get(conf, sql)
+
+
+class FanoutUtil:
+    """按时间切片并发查询工具类
+
+    把带 {start} / {end} 占位符的查询按时间切成多段，在线程池或进程池上并发执行，再按时间顺序合并返回
+    sql_tpl = "select * from tbl where time >= '{start}' and time < '{end}' " + InfluxUtil.TZ
+    """
+
+    @staticmethod
+    def time_slices(start_time: str, end_time: str, slices: int = 8):
+        """用 UniUtil.date_partition 把 [start_time, end_time) 切成大约 slices 段
+        :return [(开始时间, 结束时间), ...]，左闭右开，按时间升序
+        """
+        start = DtUtil.convert_str_to_date(start_time)
+        end = DtUtil.convert_str_to_date(end_time)
+        total = (end - start).total_seconds()
+        if total <= 0:
+            return []
+        step = max(1, math.ceil(total / max(1, slices)))
+        bounds = [start] + [b for b in UniUtil.date_partition(step, start_time, end_time) if start < b < end] + [end]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    @classmethod
+    def run(cls, fetch, sql_tpl: str, start_time: str, end_time: str, slices: int = 8, workers: int = 4, processes: bool = False,
+            max_pending: int = None, dst_df: str = DtUtil.DF_STD_SEC):
+        """并发执行各时间段的查询，按时间顺序逐条返回
+        :param fetch 执行单条 sql 的函数 fetch(sql) -> 可迭代结果；使用进程池时需可被 pickle
+        :param sql_tpl 带 {start} / {end} 占位符的 sql
+        :param slices 切分的段数
+        :param workers 并发数
+        :param processes 为 True 时使用进程池，否则使用线程池
+        :param max_pending 同时在执行或等待合并的段数上限，限制内存占用，默认 workers * 2
+        :param dst_df 填入 sql 的时间格式
+        """
+        sqls = [sql_tpl.format(start=DtUtil.convert_date_to_str(s, dst_df), end=DtUtil.convert_date_to_str(e, dst_df))
+                for s, e in cls.time_slices(start_time, end_time, slices)]
+        max_pending = max(1, max_pending or workers * 2)
+        executor = (ProcessPoolExecutor if processes else ThreadPoolExecutor)(max_workers=max(1, workers))
+        pending = deque()
+        try:
+            for sql in sqls:
+                # 只保留有限的段在途，最早的一段完成后先返回它，再提交下一段
+                while len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(fetch, sql))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @classmethod
+    def influx(cls, conf: dict, sql_tpl: str, start_time: str, end_time: str, slices: int = 8, workers: int = 4, **kwargs):
+        """按时间切片并发执行 influxdb 查询，逐条返回点，参数见 run"""
+        return cls.run(partial(_influx_fetch, conf), sql_tpl, start_time, end_time, slices, workers, **kwargs)
+
+    @classmethod
+    def mysql(cls, conf: dict, sql_tpl: str, start_time: str, end_time: str, slices: int = 8, workers: int = 4, **kwargs):
+        """按时间切片并发执行 mysql 查询，逐行返回，参数见 run"""
+        return cls.run(partial(_mysql_fetch, conf), sql_tpl, start_time, end_time, slices, workers, **kwargs)
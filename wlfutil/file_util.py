@@ -0,0 +1,286 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class FileUtil:
+    """目录、文件操作工具类"""
+    # 后台删除：待删除目录改名后的标记，线程数，每个任务删除的文件数
+    TOMBSTONE = '.tombstone-'
+    DELETE_WORKERS = 8
+    DELETE_BATCH = 1000
+    # 后台删除的线程池：协调每个墓碑的任务和实际删除文件的任务分开，协调任务等待删除任务时不会占满同一个线程池
+    _PURGER, _DELETER = None, None
+    # 还没删完的墓碑目录 -> 协调任务
+    _DELETING = {}
+    _DELETE_LOCK = threading.Lock()
+
+    @staticmethod
+    def create_dir_if_not_exist(dst_dir: str):
+        """创建目录，不存在则创建，存在无操作
+        :param dst_dir 要创建的目录
+        """
+        if not os.path.exists(dst_dir):
+            os.makedirs(dst_dir)
+
+    @classmethod
+    def del_dir_or_file(cls, dst_fd: str, background: bool = False):
+        """删除文件或目录
+        :param src_fd 要删除的目录或文件
+        :param background 为 True 时目录先改名成同级的墓碑目录，再在后台线程池并发删除，调用本身耗时与目录大小无关
+        :return background 为 True 时返回 DeleteHandle，可 wait() 等待删除完成
+        """
+        if background and os.path.islink(dst_fd):
+            # 指向目录的链接只删除链接本身，不能改名后扫描，否则删掉的是链接目标里的文件
+            os.unlink(dst_fd)
+            return DeleteHandle([])
+        if os.path.isdir(dst_fd):
+            if background:
+                return cls._delete_background(dst_fd)
+            shutil.rmtree(dst_fd)
+        elif os.path.isfile(dst_fd):
+            os.remove(dst_fd)
+        if background:
+            return DeleteHandle([])
+
+    @classmethod
+    def get_file_size(cls, filepath: str, workers: int = 8, cache_file: str = None):
+        """获取文件或文件夹（递归统计）的大小，返回格式化后的字符串，参数见 scan_size"""
+        return cls.format_size(cls.scan_size(filepath, workers, cache_file)['bytes'])
+
+    @staticmethod
+    def format_size(size: int):
+        """把字节数格式化成 B / KB / MB / GB / TB / PB"""
+        bu = 1024
+        for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+            if size < bu:
+                return f'{size}{unit}' if unit == 'B' else f'{round(size, 3)}{unit}'
+            size /= bu
+        return f'{round(size, 3)}PB'
+
+    @classmethod
+    def scan_size(cls, filepath: str, workers: int = 8, cache_file: str = None):
+        """递归统计文件或文件夹的大小，各子目录分发到线程池并发扫描，不跟随符号链接
+        :param workers 并发扫描的线程数
+        :param cache_file 缓存文件路径，记录每个目录的修改时间和该目录下直接文件的统计
+            再次扫描时修改时间没变的目录只 stat 目录本身，不再列目录、逐个 stat 文件
+            注意：原地改写文件内容不会改变目录的修改时间，这类变化要等文件增删或改名后才能统计到
+        :return {'bytes': 总字节数, 'files': 文件数, 'dirs': 目录数, 'errors': 无法访问的条目数, 'cached': 命中缓存的目录数}
+        """
+        res = {'bytes': 0, 'files': 0, 'dirs': 0, 'errors': 0, 'cached': 0}
+        if not os.path.isdir(filepath):
+            if os.path.isfile(filepath):
+                res['bytes'], res['files'] = os.path.getsize(filepath), 1
+            return res
+        root = os.path.abspath(filepath)
+        cache = cls._load_size_cache(cache_file, root)
+        # 本次扫描到的目录 -> [修改时间, 直接文件字节数, 直接文件数, 子目录名]
+        seen = {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pending = {executor.submit(cls._scan_dir, root, cache.get(root))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, entry, errors, hit = future.result()
+                    res['errors'] += errors
+                    if entry is None:
+                        continue
+                    seen[path] = entry
+                    res['dirs'] += 1
+                    res['cached'] += hit
+                    res['bytes'] += entry[1]
+                    res['files'] += entry[2]
+                    for name in entry[3]:
+                        sub = os.path.join(path, name)
+                        pending.add(executor.submit(cls._scan_dir, sub, cache.get(sub)))
+        if cache_file:
+            cls._save_size_cache(cache_file, root, seen)
+        return res
+
+    @staticmethod
+    def _scan_dir(path: str, cached: list = None):
+        """扫描单个目录下的直接文件
+        :return (目录, [修改时间, 字节数, 文件数, 子目录名], 出错条目数, 是否命中缓存)
+        """
+        try:
+            mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return path, None, 1, False
+        if cached is not None and cached[0] == mtime:
+            return path, cached, 0, True
+        size, files, errors, subdirs = 0, 0, 0, []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        else:
+                            size += entry.stat(follow_symlinks=False).st_size
+                            files += 1
+                    except OSError:
+                        errors += 1
+        except OSError:
+            return path, None, errors + 1, False
+        return path, [mtime, size, files, subdirs], errors, False
+
+    @staticmethod
+    def _load_size_cache(cache_file: str, root: str):
+        if not cache_file or not os.path.isfile(cache_file):
+            return {}
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('dirs', {}) if data.get('root') == root else {}
+
+    @staticmethod
+    def _save_size_cache(cache_file: str, root: str, dirs: dict):
+        """先写临时文件再替换，中途失败不会留下损坏的缓存"""
+        tmp = f'{cache_file}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'root': root, 'dirs': dirs}, f, ensure_ascii=False)
+        os.replace(tmp, cache_file)
+
+    @classmethod
+    def clear_dir(cls, filepath: str, background: bool = False):
+        """清空文件夹下的所有文件，先删除文件夹再创建
+        :param background 为 True 时原目录改名后立即重建空目录，旧内容在后台删除，见 del_dir_or_file
+        :return background 为 True 时返回 DeleteHandle
+        """
+        if not os.path.exists(filepath):
+            os.mkdir(filepath)
+            return DeleteHandle([]) if background else None
+        if not background:
+            shutil.rmtree(filepath)
+            os.mkdir(filepath)
+            return None
+        mode = os.stat(filepath).st_mode & 0o7777
+        handle = cls._delete_background(filepath)
+        os.mkdir(filepath)
+        os.chmod(filepath, mode)
+        return handle
+
+    @classmethod
+    def wait_deletes(cls, timeout: float = None):
+        """等待所有后台删除完成，超时返回 False"""
+        with cls._DELETE_LOCK:
+            handles = list(cls._DELETING.values())
+        return DeleteHandle(handles).wait(timeout)
+
+    @classmethod
+    def _delete_background(cls, dst_dir: str):
+        """把目录改名成墓碑后交给后台删除，顺带清理之前崩溃时遗留的同名墓碑"""
+        dst_dir = os.path.abspath(dst_dir)
+        if os.path.islink(dst_dir):
+            # 与同步删除时 shutil.rmtree 的行为一致
+            raise OSError('Cannot call rmtree on a symbolic link')
+        parent, name = os.path.split(dst_dir)
+        tombstone = os.path.join(parent, f'.{name}{cls.TOMBSTONE}{os.getpid()}-{uuid.uuid4().hex[:8]}')
+        try:
+            os.rename(dst_dir, tombstone)
+        except OSError:
+            # 无法改名（如挂载点、没有父目录写权限）时退回同步删除
+            shutil.rmtree(dst_dir)
+            return DeleteHandle([])
+        futures = []
+        for t in [tombstone] + cls._leftover_tombstones(parent, name):
+            with cls._DELETE_LOCK:
+                if t in cls._DELETING:
+                    continue
+                if cls._PURGER is None:
+                    cls._PURGER = ThreadPoolExecutor(max_workers=cls.DELETE_WORKERS, thread_name_prefix='wlfutil-purge')
+                future = cls._DELETING[t] = cls._PURGER.submit(cls._purge, t)
+            futures.append(future)
+        return DeleteHandle(futures)
+
+    @classmethod
+    def _leftover_tombstones(cls, parent: str, name: str):
+        """之前的进程没删完的墓碑：本进程之外、且创建它的进程已经退出"""
+        prefix = f'.{name}{cls.TOMBSTONE}'
+        res = []
+        try:
+            with os.scandir(parent) as it:
+                for entry in it:
+                    if not entry.name.startswith(prefix) or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    path = entry.path
+                    pid = entry.name[len(prefix):].split('-')[0]
+                    if pid.isdigit() and int(pid) != os.getpid() and cls._pid_alive(int(pid)):
+                        continue
+                    res.append(path)
+        except OSError:
+            pass
+        return res
+
+    @staticmethod
+    def _pid_alive(pid: int):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    @classmethod
+    def _deleter(cls):
+        with cls._DELETE_LOCK:
+            if cls._DELETER is None:
+                cls._DELETER = ThreadPoolExecutor(max_workers=cls.DELETE_WORKERS, thread_name_prefix='wlfutil-delete')
+            return cls._DELETER
+
+    @classmethod
+    def _purge(cls, tombstone: str):
+        """删除墓碑目录：子目录和成批的文件分成多个任务并发删除，全部完成后删除墓碑本身"""
+        try:
+            # 改名前后目录可能被换成了链接，只删除链接本身
+            if os.path.islink(tombstone):
+                os.unlink(tombstone)
+                return
+            futures, batch = [], []
+            executor = cls._deleter()
+            with os.scandir(tombstone) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        futures.append(executor.submit(shutil.rmtree, entry.path, True))
+                    else:
+                        batch.append(entry.path)
+                        if len(batch) >= cls.DELETE_BATCH:
+                            futures.append(executor.submit(cls._unlink_all, batch))
+                            batch = []
+            if batch:
+                futures.append(executor.submit(cls._unlink_all, batch))
+            wait(futures)
+            shutil.rmtree(tombstone, ignore_errors=True)
+        except OSError:
+            shutil.rmtree(tombstone, ignore_errors=True)
+        finally:
+            with cls._DELETE_LOCK:
+                cls._DELETING.pop(tombstone, None)
+
+    @staticmethod
+    def _unlink_all(paths: list):
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class DeleteHandle:
+    """后台删除的句柄，由 FileUtil.del_dir_or_file / clear_dir 返回"""
+
+    def __init__(self, futures: list):
+        self.futures = futures
+
+    def done(self):
+        return all(f.done() for f in self.futures)
+
+    def wait(self, timeout: float = None):
+        """等待删除完成，超时返回 False"""
+        return not wait(self.futures, timeout)[1]
@@ -0,0 +1,523 @@
+import datetime as dt
+import os
+import re
+import time
+import uuid
+import random
+import atexit
+import threading
+from collections import deque
+from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError
+from influxdb.resultset import ResultSet
+from influxdb.line_protocol import _escape_value, make_lines
+from wlfutil.conn_util import ConnRegistry
+from wlfutil.dt_util import DtUtil
+from wlfutil.metrics_util import MetricsUtil
+from wlfutil.log_util import LogUtil
+
+
+class InfluxUtil:
+    """influxdb工具类
+
+    conf_influx = {
+        'host': '110.110.110.110',
+        'port': 8086,
+        'username': 'admin',
+        'password': '123456',
+        'database': 'db_test',
+    }
+    """
+    TZ = "tz('Asia/Shanghai')"
+    # 最近一次使用的客户端
+    CONN = None
+    # 各配置对应的客户端，见模块末尾
+    REGISTRY = None
+
+    @classmethod
+    def _init(cls, conf: dict):
+        conn = cls.CONN = cls.REGISTRY.get(conf)
+        return conn
+
+    @classmethod
+    def connect(cls, conf: dict):
+        """切换到该配置对应的客户端，已经建立过的直接复用"""
+        return cls._init(conf)
+
+    @classmethod
+    def _create(cls, conf: dict):
+        try:
+            return InfluxDBClient(**conf)
+        except Exception as e:
+            LogUtil.error("influxdb init failed, please check the config", e)
+            raise
+
+    @classmethod
+    @MetricsUtil.instrument('influx', 'exec_sql')
+    def exec_sql(cls, conf: dict, sql: str):
+        """执行influxdb查询sql"""
+        conn = cls._init(conf)
+        return list(conn.query(sql).get_points())
+
+    @classmethod
+    def _query_chunks(cls, conf: dict, sql: str, chunk_size: int, epoch: str = None):
+        """分块查询，逐块返回 ResultSet"""
+        conn = cls._init(conf)
+        res = conn.query(sql, epoch=epoch, chunked=True, chunk_size=chunk_size)
+        # msgpack 响应不支持分块，客户端会直接返回完整结果
+        if isinstance(res, (ResultSet, list)):
+            return res if isinstance(res, list) else [res]
+        return res
+
+    @classmethod
+    @MetricsUtil.instrument('influx', 'iter_sql')
+    def iter_sql(cls, conf: dict, sql: str, chunk_size: int = 10000, epoch: str = None):
+        """分块执行influxdb查询sql，逐条返回，内存占用与结果总量无关
+        :param chunk_size 服务端每块返回的点数
+        :param epoch 时间格式，为空时返回 RFC3339 字符串，可选 s / ms / u / ns 返回整数时间戳
+        """
+        chunks = cls._query_chunks(conf, sql, chunk_size, epoch)
+        try:
+            for rs in chunks:
+                yield from rs.get_points()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    @classmethod
+    @MetricsUtil.instrument('influx', 'query_columns')
+    def query_columns(cls, conf: dict, sql: str, chunk_size: int = 10000, epoch: str = 's'):
+        """分块执行influxdb查询sql，按列返回 numpy 数组，不为每个点构造dict
+        :param epoch time 列的精度，time 为 int64 时间戳，数值字段为 float64，无法转换的列为 object
+        :return {'time': array, 'v1': array, ...}，group by 的 tag 也作为列返回
+        """
+        import numpy as np
+        columns, total = {}, 0
+        chunks = cls._query_chunks(conf, sql, chunk_size, epoch)
+        try:
+            for rs in chunks:
+                for series in rs.raw.get('series', []):
+                    values = series.get('values')
+                    if not values:
+                        continue
+                    n = len(values)
+                    data = {}
+                    for col, vals in zip(series['columns'], zip(*values)):
+                        if col == 'time':
+                            data[col] = np.array(vals, dtype=np.int64)
+                        else:
+                            try:
+                                data[col] = np.array(vals, dtype=np.float64)
+                            except (TypeError, ValueError):
+                                data[col] = np.array(vals, dtype=object)
+                    for tag, val in (series.get('tags') or {}).items():
+                        data[tag] = np.full(n, val, dtype=object)
+                    for col in data:
+                        if col not in columns:
+                            columns[col] = [np.full(total, np.nan)] if total else []
+                    for col, arrs in columns.items():
+                        arrs.append(data[col] if col in data else np.full(n, np.nan))
+                    total += n
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        return {col: np.concatenate(arrs) for col, arrs in columns.items()}
+
+    @classmethod
+    @MetricsUtil.instrument('influx', 'write_data')
+    def write_data(cls, conf: dict, tbl: str, data_list: list, precision: str = 'n'):
+        """向influxdb写入数据，直接编码成行协议，不再构造中间的dict
+        :data_list 格式：[(time, tid, v1, v2, ...), ...]，time 为东八区时间字符串或datetime
+        :precision 时间精度 n / u / ms / s，低于该精度的部分会被截掉；默认 n，与原来写入 '+08:00' 字符串时保留的精度相同
+        """
+        conn = cls._init(conf)
+        conn.write_points(cls.encode_lines(tbl, data_list, precision), time_precision=precision, protocol='line')
+
+    @classmethod
+    @MetricsUtil.instrument('influx', 'write_columns')
+    def write_columns(cls, conf: dict, tbl: str, times, tids, values, precision: str = 'n'):
+        """按列向influxdb写入数据，参数见 encode_columns"""
+        conn = cls._init(conf)
+        conn.write_points(cls.encode_columns(tbl, times, tids, values, precision), time_precision=precision, protocol='line')
+
+    # 时间精度 -> 每秒的单位数
+    PRECISIONS = {'s': 1, 'ms': 10**3, 'u': 10**6, 'n': 10**9}
+    # 东八区的 1970-01-01 00:00:00，与原来拼接 '+08:00' 的语义一致
+    EPOCH = dt.datetime(1970, 1, 1, 8)
+
+    # 时间字符串末尾的时区，如 +08:00 / -0500
+    _RE_OFFSET = re.compile(r'[+-]\d\d:?\d\d$', re.ASCII)
+
+    @classmethod
+    def _parse_time(cls, t: str):
+        """解析时间字符串：日期和时间之间为空格或 T，小数 1~6 位，可带 Z 或 +08:00 这样的时区，不带时区的视为东八区
+        固定布局走 DtUtil 的快速解析，其余交给 strptime；不依赖 3.11 才放宽的 fromisoformat
+        """
+        if len(t) > 10 and t[10] == 'T':
+            t = t[:10] + ' ' + t[11:]
+        utc = t.endswith('Z')
+        if utc:
+            t = t[:-1]
+        if len(t) == 10:
+            fmt = DtUtil.DF_STD_DAY
+        elif len(t) > 19 and t[19] == '.':
+            fmt = DtUtil.DF_STD_MIC
+        else:
+            fmt = DtUtil.DF_STD_SEC
+        if not utc and len(t) > 19 and cls._RE_OFFSET.search(t, 19):
+            fmt += '%z'
+        res = DtUtil.convert_str_to_date(t, fmt)
+        return res.replace(tzinfo=dt.timezone.utc) if utc else res
+
+    @classmethod
+    def _epoch(cls, t, per_sec: int):
+        """时间转换为指定精度的整数时间戳字符串"""
+        if isinstance(t, str):
+            t = cls._parse_time(t)
+        if t.tzinfo is not None:
+            t = t.astimezone(dt.timezone(dt.timedelta(hours=8))).replace(tzinfo=None)
+        delta = t - cls.EPOCH
+        return str((delta.days * 86400 + delta.seconds) * per_sec + delta.microseconds * per_sec // 10**6)
+
+    @staticmethod
+    def _escape_key(key: str):
+        """转义表名、tag中的特殊字符"""
+        if ' ' in key or ',' in key or '=' in key or '\\' in key:
+            key = key.replace('\\', '\\\\').replace(' ', '\\ ').replace(',', '\\,').replace('=', '\\=')
+        return key
+
+    @classmethod
+    def encode_lines(cls, tbl: str, data_list: list, precision: str = 'n'):
+        """把 [(time, tid, v1, v2, ...), ...] 一次性编码成行协议
+        字段取值规则与原来 round(v, 3) 后交给 write_points 的结果相同
+        """
+        per_sec = cls.PRECISIONS[precision]
+        prefix = cls._escape_key(tbl) + ',tid='
+        keys = []
+        times, tags = {}, {}
+        lines = []
+        for data in data_list:
+            t = data[0]
+            ts = times.get(t)
+            if ts is None:
+                ts = times[t] = cls._epoch(t, per_sec)
+            tid = data[1]
+            tag = tags.get(tid)
+            if tag is None:
+                tag = tags[tid] = cls._escape_key(str(tid))
+            n = len(data) - 2
+            while len(keys) < n:
+                keys.append(f'v{len(keys) + 1}=' if not keys else f',v{len(keys) + 1}=')
+            fields = []
+            for i in range(n):
+                v = data[i + 2]
+                if type(v) is float:
+                    fields.append(keys[i] + repr(round(v, 3)))
+                elif type(v) is int:
+                    fields.append(f'{keys[i]}{v}i')
+                else:
+                    fields.append(keys[i] + _escape_value(round(v, 3)))
+            lines.append(f'{prefix}{tag} {"".join(fields)} {ts}')
+        return '\n'.join(lines)
+
+    @classmethod
+    def encode_columns(cls, tbl: str, times, tids, values, precision: str = 'n'):
+        """按列编码成行协议，需要 numpy
+        :param times 东八区时间，datetime64 数组，或已经是该精度的整数时间戳数组
+        :param tids 每行的 tid
+        :param values 二维数组，每行对应 v1, v2, ...
+        """
+        import numpy as np
+        unit = {'s': 's', 'ms': 'ms', 'u': 'us', 'n': 'ns'}[precision]
+        times = np.asarray(times)
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype(f'datetime64[{unit}]').astype(np.int64) - 8 * 3600 * cls.PRECISIONS[precision]
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        if np.issubdtype(values.dtype, np.integer):
+            fmt = '%di'
+        else:
+            fmt = '%r'
+            values = np.round(values.astype(np.float64), 3)
+        n = values.shape[1]
+        fields = ','.join(f'v{i}={fmt}' for i in range(1, n + 1))
+        template = cls._escape_key(tbl).replace('%', '%%') + ',tid=%s ' + fields + ' %d'
+        tags = [cls._escape_key(str(tid)) for tid in np.asarray(tids).tolist()]
+        return '\n'.join([template % (tag, *row, ts) for tag, row, ts in zip(tags, values.tolist(), times.tolist())])
+
+    @classmethod
+    @MetricsUtil.instrument('influx', 'write_points')
+    def write_points(cls, conf: dict, json_data_list: list):
+        """向influxdb写入数据
+        :json_data_list 格式：[{
+            'measurement': 'tbl',
+            'time': time.replace(' ', 'T') + '+08:00',
+            'tags': {
+                'k': 'v'
+            },
+            'fields': {'k': 'v'},
+        }, ...]
+        """
+        conn = cls._init(conf)
+        conn.write_points(json_data_list)
+
+    @classmethod
+    def create_db(cls, conf: dict, db_name: str):
+        conn = cls._init(conf)
+        conn.create_database(db_name)
+
+
+class InfluxWriter:
+    """influxdb后台批量写入器，生产者只负责入队，后台线程按条数或时间合并成批次写入
+
+    writer = InfluxWriter(conf_influx, batch_size=5000, flush_interval=1.0)
+    writer.write('tbl', [(time, tid, v1, v2, ...), ...])
+    writer.close()
+
+    :param batch_size 每批最多写入的点数，攒够即写
+    :param flush_interval 第一条数据入队后最多等待的秒数，到时即写
+    :param max_queued 队列中最多缓存的点数，超过后 write 会阻塞
+    :param workers 后台写入线程数，每个线程使用独立的连接
+    :param retries 写入失败的重试次数，重试间隔按指数退避并加随机抖动
+    :param retry_backoff 第一次重试前等待的秒数
+    :param spill_dir 重试仍失败时把数据落盘到该目录，服务恢复后自动补写；为空时直接丢弃
+    :param precision 时间精度 n / u / ms / s
+    """
+    # 补写中的落盘文件后缀，改名即认领，写入成功后才删除，中途退出时数据仍在磁盘上
+    REPLAYING = '.replaying'
+
+    def __init__(self, conf: dict, batch_size: int = 5000, flush_interval: float = 1.0, max_queued: int = 100000, workers: int = 1,
+                 retries: int = 3, retry_backoff: float = 0.5, spill_dir: str = None, precision: str = 'n'):
+        self.conf = conf
+        self.batch_size, self.flush_interval, self.max_queued = max(1, batch_size), flush_interval, max(1, max_queued)
+        self.retries, self.retry_backoff = retries, retry_backoff
+        self.spill_dir, self.precision = spill_dir, precision
+        self._cond = threading.Condition()
+        # 待写入的数据 (类型, 数据, 点数)
+        self._buf = deque()
+        self._buffered, self._inflight = 0, 0
+        self._closing, self._flushing = False, False
+        self._spill_pending = False
+        self.queued, self.written, self.dropped, self.retried, self.spilled = 0, 0, 0, 0, 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._recover()
+        self._workers = [threading.Thread(target=self._run, name=f'InfluxWriter-{i}', daemon=True) for i in range(max(1, workers))]
+        for worker in self._workers:
+            worker.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, tbl: str, data_list: list, block: bool = True, timeout: float = None):
+        """写入 [(time, tid, v1, v2, ...), ...]，格式同 InfluxUtil.write_data"""
+        return self._put('rows', (tbl, data_list), len(data_list), block, timeout)
+
+    def write_points(self, json_data_list: list, block: bool = True, timeout: float = None):
+        """写入 dict 格式的点，格式同 InfluxUtil.write_points"""
+        return self._put('points', json_data_list, len(json_data_list), block, timeout)
+
+    def write_lines(self, lines: list, block: bool = True, timeout: float = None):
+        """写入已经编码好的行协议，时间精度需与 precision 一致"""
+        return self._put('lines', lines, len(lines), block, timeout)
+
+    def _put(self, kind: str, data, n: int, block: bool, timeout: float):
+        """入队，队列满时阻塞等待（背压）；不阻塞或等待超时则丢弃并返回 False"""
+        if not n:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._closing:
+                raise RuntimeError('influx writer is closed')
+            while self._buffered and self._buffered + n > self.max_queued:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    self.dropped += n
+                    return False
+                self._cond.wait(remaining)
+            self._buf.append((kind, data, n))
+            self._buffered += n
+            self.queued += n
+            self._cond.notify_all()
+        return True
+
+    def flush(self):
+        """等待已入队的数据全部写出（或重试失败后落盘/丢弃）"""
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            while self._buffered or self._inflight:
+                self._cond.wait()
+            self._flushing = False
+
+    def close(self):
+        """写出剩余数据并停止后台线程"""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+        atexit.unregister(self.close)
+
+    def stats(self):
+        """入队、写入、丢弃、重试的点数，磁盘上待补写的点数（含启动前遗留的，补写成功后计入 written）以及当前缓存的点数"""
+        with self._cond:
+            return {
+                'queued': self.queued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'retried': self.retried,
+                'spilled': self.spilled,
+                'buffered': self._buffered + self._inflight,
+            }
+
+    def _take(self):
+        """取出一批数据，没有数据且已关闭时返回 None"""
+        with self._cond:
+            while not self._buf and not self._closing:
+                self._cond.wait()
+            if not self._buf:
+                return None
+            deadline = time.monotonic() + self.flush_interval
+            while self._buffered < self.batch_size and not self._closing and not self._flushing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, n = [], 0
+            while self._buf and (not batch or n + self._buf[0][2] <= self.batch_size):
+                item = self._buf.popleft()
+                batch.append(item)
+                n += item[2]
+            self._buffered -= n
+            self._inflight += n
+            self._cond.notify_all()
+            return batch, n
+
+    def _encode(self, batch: list):
+        lines = []
+        for kind, data, _ in batch:
+            if kind == 'rows':
+                lines.append(InfluxUtil.encode_lines(data[0], data[1], self.precision))
+            elif kind == 'points':
+                lines.append(make_lines({'points': data}, self.precision).rstrip('\n'))
+            else:
+                lines.append('\n'.join(data))
+        return '\n'.join(lines)
+
+    def _run(self):
+        client = InfluxDBClient(**self.conf)
+        try:
+            while True:
+                taken = self._take()
+                if taken is None:
+                    break
+                batch, n = taken
+                try:
+                    payload = self._encode(batch)
+                    if self._send(client, payload, n):
+                        self._replay(client)
+                    elif self.spill_dir:
+                        self._spill(payload, n)
+                    else:
+                        with self._cond:
+                            self.dropped += n
+                except Exception as e:
+                    LogUtil.error("influx writer failed", e)
+                    with self._cond:
+                        self.dropped += n
+                finally:
+                    with self._cond:
+                        self._inflight -= n
+                        self._cond.notify_all()
+        finally:
+            client.close()
+
+    @MetricsUtil.instrument('influx', 'writer_send')
+    def _send(self, client: InfluxDBClient, payload: str, n: int, precision: str = None):
+        """写入一批数据，可重试的错误按指数退避加抖动重试，成功返回 True"""
+        for attempt in range(self.retries + 1):
+            try:
+                client.write_points(payload, time_precision=precision or self.precision, protocol='line')
+                with self._cond:
+                    self.written += n
+                return True
+            except InfluxDBClientError as e:
+                # 4xx 是数据本身的问题，重试没有意义
+                if e.code is not None and 400 <= e.code < 500 and e.code != 429:
+                    LogUtil.error("influx writer rejected batch", e)
+                    with self._cond:
+                        self.dropped += n
+                    return True
+                error = e
+            except Exception as e:
+                error = e
+            if attempt < self.retries:
+                with self._cond:
+                    self.retried += n
+                time.sleep(self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+        LogUtil.error("influx writer failed after retries", error)
+        return False
+
+    def _spill(self, payload: str, n: int):
+        """落盘，文件名中记录时间精度和点数，便于补写"""
+        name = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}-{self.precision}-{n}.lp'
+        tmp = os.path.join(self.spill_dir, name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp, os.path.join(self.spill_dir, name))
+        with self._cond:
+            self.spilled += n
+            self._spill_pending = True
+
+    @staticmethod
+    def _spill_info(name: str):
+        """落盘文件名中记录的 (时间精度, 点数)"""
+        _, _, precision, n = name[:-3].split('-')
+        return precision, int(n)
+
+    def _recover(self):
+        """启动时接管目录中已有的落盘文件：上次补写到一半退出的改回待补写，点数计入 spilled"""
+        for name in os.listdir(self.spill_dir):
+            if name.endswith('.lp' + self.REPLAYING):
+                os.replace(os.path.join(self.spill_dir, name), os.path.join(self.spill_dir, name[:-len(self.REPLAYING)]))
+        for name in os.listdir(self.spill_dir):
+            if name.endswith('.lp'):
+                self.spilled += self._spill_info(name)[1]
+                self._spill_pending = True
+
+    def _replay(self, client: InfluxDBClient):
+        """服务恢复后按时间顺序补写落盘的数据，遇到失败就停下等下次"""
+        if not self._spill_pending:
+            return
+        with self._cond:
+            self._spill_pending = False
+        for name in sorted(f for f in os.listdir(self.spill_dir) if f.endswith('.lp')):
+            path = os.path.join(self.spill_dir, name)
+            claimed = path + self.REPLAYING
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # 被其他写入线程抢先补写了
+                continue
+            with open(claimed, encoding='utf-8') as f:
+                payload = f.read()
+            precision, n = self._spill_info(name)
+            if not self._send(client, payload, n, precision):
+                os.replace(claimed, path)
+                with self._cond:
+                    self._spill_pending = True
+                break
+            os.remove(claimed)
+            with self._cond:
+                self.spilled -= n
+
+
+InfluxUtil.REGISTRY = ConnRegistry(InfluxUtil._create, lambda client: client.close())
@@ -0,0 +1,270 @@
+import logging
+from logging import handlers
+import colorlog
+from inspect import currentframe
+import time
+import queue
+import threading
+import atexit
+from wlfutil.file_util import FileUtil
+
+
+class LogUtil:
+    """日志工具类"""
+    logger = None
+    format = '%(asctime)s %(levelname)s: %(message)s'
+    colors = {
+        'DEBUG': 'cyan',
+        'INFO': 'blue',
+        'WARNING': 'yellow',
+        'ERROR': 'red',
+        'CRITICAL': 'red,bg_white',
+    }
+    # 颜色格式
+    fmt_colored, fmt_colorless = None, None
+    # 日志输出端
+    console_handler, file_handler = None, None
+
+    # 异步模式下队列满时的处理策略：阻塞等待、丢弃最旧、丢弃最新
+    OF_BLOCK = 'block'
+    OF_DROP_OLDEST = 'drop_oldest'
+    OF_DROP_NEWEST = 'drop_newest'
+    # 异步模式的日志队列、后台线程、队列满策略、每批处理条数以及被丢弃的日志条数
+    log_queue, log_worker, overflow, batch_size, dropped = None, None, OF_BLOCK, 256, 0
+    _STOP = object()
+    # 是否记录调用方的函数名和行号
+    caller = True
+
+    @classmethod
+    def init(cls, logname: str, console: bool = False, async_mode: bool = False, queue_size: int = 10000, overflow: str = OF_BLOCK, batch_size: int = 256,
+             level=logging.DEBUG, caller: bool = True):
+        """使用前需要初始化，输入生成的日志文件名
+        注意：默认按天生成日志，且保留最近一周的日志文件
+        :param async_mode 是否开启异步模式，开启后调用方只把日志放入队列，由后台线程负责格式化和写入
+        :param queue_size 异步模式下队列的最大长度
+        :param overflow 异步模式下队列满时的处理策略，见 OF_BLOCK / OF_DROP_OLDEST / OF_DROP_NEWEST
+        :param batch_size 异步模式下后台线程每批处理的最大日志条数
+        :param level 日志级别，低于该级别的调用直接返回
+        :param caller 是否记录调用方的函数名和行号
+        """
+        if not cls.logger:
+            pdir = '/'.join(logname.split('/')[:-1])
+            if pdir:
+                FileUtil.create_dir_if_not_exist(pdir)
+            cls.logger = logging.getLogger(logname)
+            cls.logger.setLevel(level)
+            cls.caller = caller
+            # 有颜色格式
+            cls.fmt_colored = colorlog.ColoredFormatter(f'%(log_color)s{cls.format}', datefmt=None, reset=True, log_colors=cls.colors)
+            # 无颜色格式
+            cls.fmt_colorless = logging.Formatter(cls.format)
+            # 输出到控制台和文件
+            if console:
+                cls.console_handler = logging.StreamHandler()
+            cls.file_handler = handlers.TimedRotatingFileHandler(filename=logname, when='D', backupCount=3, encoding='utf-8')
+        if async_mode:
+            cls.start_async(queue_size, overflow, batch_size)
+
+    @classmethod
+    def start_async(cls, queue_size: int = 10000, overflow: str = OF_BLOCK, batch_size: int = 256):
+        """开启异步模式，后台线程独占日志输出端，负责格式化、着色和写文件"""
+        if cls.log_queue is not None:
+            return
+        if overflow not in (cls.OF_BLOCK, cls.OF_DROP_OLDEST, cls.OF_DROP_NEWEST):
+            raise ValueError(f'unknown overflow policy: {overflow}')
+        for handler in (cls.console_handler, cls.file_handler):
+            if handler:
+                handler.setFormatter(cls.fmt_colored)
+        cls.overflow, cls.batch_size, cls.dropped = overflow, max(1, batch_size), 0
+        cls.log_queue = queue.Queue(maxsize=queue_size)
+        cls.log_worker = threading.Thread(target=cls._work, args=(cls.log_queue,), name='LogUtil-worker', daemon=True)
+        cls.log_worker.start()
+        atexit.register(cls.shutdown)
+
+    @classmethod
+    def flush(cls):
+        """等待队列中已有的日志全部写出"""
+        if cls.log_queue is not None:
+            cls.log_queue.join()
+        for handler in (cls.console_handler, cls.file_handler):
+            if handler:
+                handler.flush()
+
+    @classmethod
+    def shutdown(cls):
+        """写出剩余日志并停止后台线程，之后的调用回到同步模式"""
+        q, worker = cls.log_queue, cls.log_worker
+        if q is None:
+            return
+        cls.log_queue, cls.log_worker = None, None
+        q.put(cls._STOP)
+        worker.join()
+        for handler in (cls.console_handler, cls.file_handler):
+            if handler:
+                handler.flush()
+
+    @classmethod
+    def _enqueue(cls, q: queue.Queue, levelno: int, title, msg: tuple, frame):
+        """异步模式下调用方只生成一条记录放入队列
+        :param q 调用方取到的队列，不再读 cls.log_queue，并发 shutdown 时它可能已被置为 None
+        标题和内容在入队时就转成字符串（同 logging.handlers.QueueHandler.prepare），调用方之后再修改对象不影响输出
+        """
+        funcn, lineo = (frame.f_code.co_name, frame.f_lineno) if frame else (None, None)
+        if title:
+            title = str(title)
+        if msg:
+            msg = str(msg)
+        item = (levelno, title, msg, funcn, lineo, time.time())
+        if cls.overflow == cls.OF_BLOCK:
+            q.put(item)
+        elif cls.overflow == cls.OF_DROP_NEWEST:
+            try:
+                q.put_nowait(item)
+            except queue.Full:
+                cls.dropped += 1
+        else:
+            while True:
+                try:
+                    q.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                        q.task_done()
+                        cls.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    @classmethod
+    def _work(cls, q: queue.Queue):
+        """后台线程：批量取出队列中的记录并写出"""
+        while True:
+            batch = [q.get()]
+            while len(batch) < cls.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for item in batch:
+                if item is cls._STOP:
+                    stop = True
+                    continue
+                try:
+                    cls._handle(*item)
+                except Exception:
+                    pass
+            for _ in batch:
+                q.task_done()
+            if stop:
+                break
+
+    @classmethod
+    def _handle(cls, levelno: int, title, msg: tuple, funcn, lineo, created: float):
+        """把一条记录展开成与同步模式相同的几行日志"""
+        for line, args in cls._lines(levelno, title, msg, funcn, lineo):
+            record = cls.logger.makeRecord(cls.logger.name, levelno, '', lineo or 0, line, args, None, funcn)
+            record.created, record.msecs = created, (created - int(created)) * 1000
+            for handler in (cls.console_handler, cls.file_handler):
+                if handler and levelno >= handler.level:
+                    handler.handle(record)
+
+    @classmethod
+    def open(cls):
+        if cls.logger:
+            if cls.console_handler:
+                cls.console_handler.setFormatter(cls.fmt_colored)
+                cls.logger.addHandler(cls.console_handler)
+            if cls.file_handler:
+                cls.file_handler.setFormatter(cls.fmt_colored)
+                cls.logger.addHandler(cls.file_handler)
+        else:
+            print('Please init LogUtil first!')
+
+    @classmethod
+    def close(cls):
+        if cls.console_handler:
+            cls.logger.removeHandler(cls.console_handler)
+        cls.logger.removeHandler(cls.file_handler)
+
+    @classmethod
+    def set_level(cls, level):
+        """设置日志级别，低于该级别的调用在做任何格式化之前直接返回"""
+        if cls.logger:
+            cls.logger.setLevel(level)
+
+    @classmethod
+    def set_caller(cls, caller: bool):
+        """是否记录调用方的函数名和行号，关闭后不再检查调用栈"""
+        cls.caller = caller
+
+    @classmethod
+    def _lines(cls, levelno: int, title, msg: tuple, funcn, lineo):
+        """一次调用展开后的几行日志，格式化参数延迟到真正写出时才处理
+        :return [(msg, args), ...]
+        """
+        lines = []
+        if title or levelno == logging.DEBUG:
+            if levelno >= logging.ERROR:
+                lines.append((_LazyBanner(title, 120, "#"), ()))
+            else:
+                lines.append((_LazyBanner(title, 100, "-"), ()))
+            if funcn is not None:
+                lines.append(('< %s - %s >', (funcn, lineo)))
+            if msg or msg == 0 or msg is False:
+                lines.append((msg, ()))
+        lines.append(("", ()))
+        return lines
+
+    @classmethod
+    def _log(cls, levelno: int, title, msg: tuple):
+        lastframe = currentframe().f_back.f_back if cls.caller else None
+        q = cls.log_queue
+        if q is not None:
+            return cls._enqueue(q, levelno, title, msg, lastframe)
+        cls.open()
+        funcn, lineo = (lastframe.f_code.co_name, lastframe.f_lineno) if lastframe else (None, None)
+        for line, args in cls._lines(levelno, title, msg, funcn, lineo):
+            cls.logger.log(levelno, line, *args)
+        cls.close()
+
+    @classmethod
+    def debug(cls, title: str = None, *msg):
+        if cls.logger and not cls.logger.isEnabledFor(logging.DEBUG):
+            return
+        cls._log(logging.DEBUG, title, msg)
+
+    @classmethod
+    def info(cls, title: str = None, *msg):
+        if cls.logger and not cls.logger.isEnabledFor(logging.INFO):
+            return
+        cls._log(logging.INFO, title, msg)
+
+    @classmethod
+    def warn(cls, title: str = None, *msg):
+        if cls.logger and not cls.logger.isEnabledFor(logging.WARNING):
+            return
+        cls._log(logging.WARNING, title, msg)
+
+    @classmethod
+    def error(cls, title: str = None, *msg):
+        if cls.logger and not cls.logger.isEnabledFor(logging.ERROR):
+            return
+        cls._log(logging.ERROR, title, msg)
+
+    @classmethod
+    def critical(cls, title: str = None, *msg):
+        if cls.logger and not cls.logger.isEnabledFor(logging.CRITICAL):
+            return
+        cls._log(logging.CRITICAL, title, msg)
+
+
+class _LazyBanner:
+    """日志标题行，只有在输出端真正写出时才拼接居中"""
+    __slots__ = ('title', 'width', 'fill')
+
+    def __init__(self, title, width, fill):
+        self.title, self.width, self.fill = title, width, fill
+
+    def __str__(self):
+        return "< {} >".format(self.title).center(self.width, self.fill)
@@ -0,0 +1,471 @@
+import io
+import json
+import time
+import random
+import pstats
+import cProfile
+import threading
+from functools import wraps
+from inspect import isgeneratorfunction
+from collections import deque
+
+# 直方图每个 2 的幂区间再细分的份数（2 的 SUB_BITS - 1 次方），相对误差不超过 1/8
+_SUB_BITS = 4
+_SUB = 1 << (_SUB_BITS - 1)
+_LINEAR = 1 << _SUB_BITS
+# 同一时间只允许一个调用处于 cProfile 采样中
+_PROFILE_LOCK = threading.Lock()
+
+
+def _bucket(v: int):
+    """非负整数落在哪个桶：小于 16 的值各占一个桶，之后每个 2 的幂区间分 8 个桶，类似 HDR 直方图"""
+    if v < _LINEAR:
+        return v
+    e = v.bit_length() - _SUB_BITS
+    return e * _SUB + (v >> e)
+
+
+def _bucket_range(idx: int):
+    """桶的取值范围 [下界, 上界)"""
+    if idx < _LINEAR:
+        return idx, idx + 1
+    e = idx // _SUB - 1
+    m = idx - e * _SUB
+    return m << e, (m + 1) << e
+
+
+class _Shard:
+    """单个线程的统计，只由该线程写入，不加锁"""
+    __slots__ = ('count', 'total', 'max', 'buckets', 'thread')
+
+    def __init__(self, thread=None):
+        self.count, self.total, self.max = 0, 0, 0
+        self.buckets = {}
+        self.thread = thread
+
+    def merge(self, other):
+        """把另一个分片的统计加到自身"""
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for idx, n in dict(other.buckets).items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+
+    def copy(self):
+        res = _Shard()
+        res.merge(self)
+        return res
+
+
+class Metric:
+    """计数器、仪表或计时器，由 MetricsUtil.counter / gauge / timer 创建，同名同标签的只有一个"""
+    COUNTER = 'counter'
+    GAUGE = 'gauge'
+    TIMER = 'timer'
+
+    def __init__(self, kind: str, name: str, labels: dict, help: str = ''):
+        self.kind, self.name, self.labels, self.help = kind, name, labels, help
+        self._local = threading.local()
+        # 上下文管理器用法每个线程的开始时间栈，reset 时不清空
+        self._starts = threading.local()
+        self._shards = []
+        # 已结束线程的分片合并到这里，线程池反复创建线程时分片数不会一直增长
+        self._merged = _Shard()
+        self._prune_at = 64
+        self._lock = threading.Lock()
+        self.value = 0
+        # 计时器出错的调用数，以及 cProfile 采样设置和最近的采样结果
+        self.errors = 0
+        self.profile_threshold, self.profile_rate, self.profile_armed = None, 0.0, False
+        self.profiles = deque(maxlen=5)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+                if len(self._shards) >= self._prune_at:
+                    self._prune()
+            return shard
+
+    def _prune(self):
+        """把已结束线程的分片合并进 _merged，结束的线程不会再写入；调用方需持有锁"""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._merged.merge(shard)
+        self._shards = alive
+        self._prune_at = max(64, len(alive) * 2)
+
+    def inc(self, n=1):
+        """计数器加 n；仪表加 n"""
+        if self.kind == self.GAUGE:
+            with self._lock:
+                self.value += n
+            return
+        shard = self._shard()
+        shard.count += n
+
+    def dec(self, n=1):
+        self.inc(-n)
+
+    def set(self, value):
+        """设置仪表的值"""
+        self.value = value
+
+    def observe(self, seconds: float):
+        """计时器记录一次耗时（秒）"""
+        self.observe_ns(int(seconds * 1e9))
+
+    def observe_ns(self, ns: int):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard.count += 1
+        shard.total += ns
+        if ns > shard.max:
+            shard.max = ns
+        # 同 _bucket，热点路径上展开以减少函数调用
+        if ns >= _LINEAR:
+            e = ns.bit_length() - _SUB_BITS
+            ns = e * _SUB + (ns >> e)
+        elif ns < 0:
+            ns = 0
+        buckets = shard.buckets
+        buckets[ns] = buckets.get(ns, 0) + 1
+
+    def __call__(self, fn):
+        """作为装饰器使用：计时器统计耗时（生成器统计整个迭代过程），计数器统计调用次数；仪表不支持"""
+        if self.kind == self.GAUGE:
+            raise TypeError('gauge can not be used as decorator')
+        metric = self
+        if isgeneratorfunction(fn):
+            @wraps(fn)
+            def _gen(*args, **kwargs):
+                if not MetricsUtil.ENABLED:
+                    return (yield from fn(*args, **kwargs))
+                start = time.perf_counter_ns()
+                try:
+                    return (yield from fn(*args, **kwargs))
+                except GeneratorExit:
+                    # 调用方提前结束迭代不算出错
+                    raise
+                except BaseException:
+                    metric.errors += 1
+                    raise
+                finally:
+                    metric._done(start)
+            return _gen
+
+        @wraps(fn)
+        def _wrapper(*args, **kwargs):
+            if not MetricsUtil.ENABLED:
+                return fn(*args, **kwargs)
+            if metric.profile_armed and random.random() < metric.profile_rate:
+                return metric._profiled(fn, args, kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                metric.errors += 1
+                raise
+            finally:
+                metric._done(start)
+        return _wrapper
+
+    def _done(self, start: int):
+        ns = time.perf_counter_ns() - start
+        if self.kind != self.TIMER:
+            self.inc()
+            return
+        self.observe_ns(ns)
+        if self.profile_threshold is not None and ns >= self.profile_threshold:
+            self.profile_armed = True
+
+    def _profiled(self, fn, args, kwargs):
+        """在 cProfile 下执行一次，仍然超过阈值时保留调用统计"""
+        if not _PROFILE_LOCK.acquire(blocking=False):
+            return self._plain(fn, args, kwargs)
+        profiler = cProfile.Profile()
+        start = time.perf_counter_ns()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        except BaseException:
+            self.errors += 1
+            raise
+        finally:
+            _PROFILE_LOCK.release()
+            ns = time.perf_counter_ns() - start
+            self.observe_ns(ns)
+            if ns >= self.profile_threshold:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(MetricsUtil.PROFILE_LINES)
+                self.profiles.append({'time': time.time(), 'seconds': round(ns / 1e9, 6), 'stats': out.getvalue()})
+            else:
+                self.profile_armed = False
+
+    def _plain(self, fn, args, kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            self.errors += 1
+            raise
+        finally:
+            self._done(start)
+
+    def __enter__(self):
+        """作为上下文管理器使用：with MetricsUtil.timer('x'): ...，可嵌套、可多线程同时使用"""
+        stack = getattr(self._starts, 'stack', None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter_ns())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        start = self._starts.stack.pop()
+        if exc_type is not None:
+            self.errors += 1
+        self._done(start)
+
+    def snapshot(self):
+        """合并各线程的统计
+        计数器、仪表：{'value': 值}
+        计时器：{'count', 'sum', 'max', 'p50', 'p95', 'p99', 'errors'}，单位秒，分位数误差不超过 1/16
+        """
+        if self.kind == self.GAUGE:
+            value = self.value() if callable(self.value) else self.value
+            return {'value': value}
+        with self._lock:
+            self._prune()
+            shards = list(self._shards)
+            shards.append(self._merged.copy())
+        if self.kind == self.COUNTER:
+            return {'value': sum(shard.count for shard in shards)}
+        count, total, mx, buckets = 0, 0, 0, {}
+        for shard in shards:
+            count += shard.count
+            total += shard.total
+            mx = max(mx, shard.max)
+            # dict 的整体复制在 GIL 下是原子的，不会因为其他线程同时写入而出错
+            for idx, n in dict(shard.buckets).items():
+                buckets[idx] = buckets.get(idx, 0) + n
+        res = {'count': count, 'sum': round(total / 1e9, 9), 'max': round(mx / 1e9, 9), 'errors': self.errors}
+        res.update(self._quantiles(buckets, (0.5, 0.95, 0.99), mx))
+        return res
+
+    @staticmethod
+    def _quantiles(buckets: dict, qs: tuple, mx: int):
+        total = sum(buckets.values())
+        res = {f'p{round(q * 100)}': 0.0 for q in qs}
+        if not total:
+            return res
+        ordered = sorted(buckets.items())
+        for q in qs:
+            rank, seen = q * total, 0
+            for idx, n in ordered:
+                seen += n
+                if seen >= rank:
+                    lo, hi = _bucket_range(idx)
+                    res[f'p{round(q * 100)}'] = round(min((lo + hi) / 2, mx) / 1e9, 9)
+                    break
+        return res
+
+    def reset(self):
+        with self._lock:
+            self._shards = []
+            self._merged = _Shard()
+            self._prune_at = 64
+            self._local = threading.local()
+            self.errors = 0
+            if self.kind != self.GAUGE or not callable(self.value):
+                self.value = 0
+            self.profiles.clear()
+
+
+class MetricsUtil:
+    """进程内指标统计工具类：计数器、仪表、计时器（HDR 风格直方图，按线程分片记录，记录时不加锁）
+
+    @MetricsUtil.timer('report_seconds', kind='daily')
+    def report(): ...
+    with MetricsUtil.timer('step_seconds', step='load'):
+        ...
+    MetricsUtil.counter('rows_total').inc(100)
+    MetricsUtil.gauge('queue_size').set(10)
+    MetricsUtil.to_prometheus()  # 或 to_json() / write_influx(conf)
+
+    内置的 MysqlUtil / InfluxUtil / RedisUtil / MinioUtil / ShellUtil 调用都记录在 wlfutil_call_seconds{util, op} 中，
+    MetricsUtil.ENABLED = False 可关闭
+    """
+    # 为 False 时装饰器直接调用原函数，不做任何统计
+    ENABLED = True
+    # cProfile 采样结果保留的行数
+    PROFILE_LINES = 20
+    # 内置工具类调用耗时的指标名
+    CALL_METRIC = 'wlfutil_call_seconds'
+    # (名字, 标签) -> Metric
+    _METRICS = {}
+    _LOCK = threading.Lock()
+    _reporter, _reporter_stop = None, None
+
+    @classmethod
+    def _get(cls, kind: str, name: str, labels: dict, help: str = ''):
+        key = (name, tuple(sorted(labels.items())))
+        metric = cls._METRICS.get(key)
+        if metric is None:
+            with cls._LOCK:
+                metric = cls._METRICS.get(key)
+                if metric is None:
+                    metric = cls._METRICS[key] = Metric(kind, name, labels, help)
+        if metric.kind != kind:
+            raise ValueError(f'metric {name} already registered as {metric.kind}')
+        return metric
+
+    @classmethod
+    def counter(cls, name: str, help: str = '', **labels):
+        """计数器，也可作为装饰器统计调用次数"""
+        return cls._get(Metric.COUNTER, name, labels, help)
+
+    @classmethod
+    def gauge(cls, name: str, help: str = '', **labels):
+        """仪表，set(值) 或 set(无参函数)，后者在导出时才取值"""
+        return cls._get(Metric.GAUGE, name, labels, help)
+
+    @classmethod
+    def timer(cls, name: str, help: str = '', profile_threshold: float = None, profile_rate: float = 0.1, **labels):
+        """计时器，可作为装饰器或上下文管理器
+        :param profile_threshold 单位秒；出现超过该耗时的调用后，之后的调用按 profile_rate 的比例在 cProfile 下执行，
+            仍然超过阈值时把调用统计保存到 metric.profiles，直到出现一次采样没有超过阈值为止
+        """
+        metric = cls._get(Metric.TIMER, name, labels, help)
+        if profile_threshold is not None:
+            metric.profile_threshold = int(profile_threshold * 1e9)
+            metric.profile_rate = profile_rate
+        return metric
+
+    @classmethod
+    def instrument(cls, util: str, op: str):
+        """内置工具类方法使用的计时装饰器，写在 @classmethod 下面"""
+        return cls.timer(cls.CALL_METRIC, 'wlfutil util call latency', util=util, op=op)
+
+    @classmethod
+    def snapshot(cls):
+        """[{'name', 'kind', 'labels', ...统计值}, ...]"""
+        with cls._LOCK:
+            metrics = list(cls._METRICS.values())
+        res = []
+        for metric in metrics:
+            snap = {'name': metric.name, 'kind': metric.kind, 'labels': dict(metric.labels)}
+            snap.update(metric.snapshot())
+            res.append(snap)
+        return res
+
+    @classmethod
+    def profiles(cls):
+        """各计时器最近的 cProfile 采样结果 {名字{标签}: [...]}"""
+        with cls._LOCK:
+            metrics = list(cls._METRICS.values())
+        return {f'{m.name}{cls._prom_labels(m.labels)}': list(m.profiles) for m in metrics if m.profiles}
+
+    @classmethod
+    def reset(cls):
+        """清空所有统计值，已经创建的指标保留"""
+        with cls._LOCK:
+            metrics = list(cls._METRICS.values())
+        for metric in metrics:
+            metric.reset()
+
+    @classmethod
+    def to_json(cls, **kwargs):
+        return json.dumps({'time': time.time(), 'metrics': cls.snapshot()}, ensure_ascii=False, **kwargs)
+
+    @staticmethod
+    def _prom_labels(labels: dict, **extra):
+        items = list(labels.items()) + list(extra.items())
+        if not items:
+            return ''
+        body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items)
+        return '{' + body + '}'
+
+    @classmethod
+    def to_prometheus(cls):
+        """Prometheus 文本格式，计时器导出为 summary，没有调用过的计时器不导出"""
+        lines, typed = [], set()
+        for snap in sorted(cls.snapshot(), key=lambda s: s['name']):
+            if snap['kind'] == Metric.TIMER and not snap['count']:
+                continue
+            name, labels = snap['name'], snap['labels']
+            if name not in typed:
+                typed.add(name)
+                kind = 'summary' if snap['kind'] == Metric.TIMER else snap['kind']
+                help = cls._METRICS[(name, tuple(sorted(labels.items())))].help
+                if help:
+                    lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+            if snap['kind'] != Metric.TIMER:
+                lines.append(f'{name}{cls._prom_labels(labels)} {snap["value"]}')
+                continue
+            for q in ('0.5', '0.95', '0.99'):
+                lines.append(f'{name}{cls._prom_labels(labels, quantile=q)} {snap["p" + str(round(float(q) * 100))]}')
+            lines.append(f'{name}_sum{cls._prom_labels(labels)} {snap["sum"]}')
+            lines.append(f'{name}_count{cls._prom_labels(labels)} {snap["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def to_points(cls, measurement: str = 'wlfutil_metrics'):
+        """转换成 InfluxUtil.write_points 的点格式，指标名和标签作为 tag，没有调用过的计时器不导出"""
+        ts = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        points = []
+        for snap in cls.snapshot():
+            if snap['kind'] == Metric.TIMER and not snap['count']:
+                continue
+            tags = {'name': snap['name'], **{k: str(v) for k, v in snap['labels'].items()}}
+            fields = {k: v for k, v in snap.items() if k not in ('name', 'kind', 'labels') and isinstance(v, (int, float))}
+            if fields:
+                points.append({'measurement': measurement, 'time': ts, 'tags': tags, 'fields': fields})
+        return points
+
+    @classmethod
+    def write_influx(cls, conf: dict, measurement: str = 'wlfutil_metrics'):
+        """把当前统计作为点写入 influxdb"""
+        from wlfutil.influx_util import InfluxUtil
+        points = cls.to_points(measurement)
+        if points:
+            InfluxUtil.write_points(conf, points)
+        return len(points)
+
+    @classmethod
+    def start_reporter(cls, interval: float, sink, reset: bool = False):
+        """后台线程每隔 interval 秒调用一次 sink(snapshot)，如 lambda snap: MetricsUtil.write_influx(conf)
+        :param reset 为 True 时每次上报后清空统计，上报的是这段时间内的值
+        """
+        cls.stop_reporter()
+        stop = threading.Event()
+
+        def _run():
+            while not stop.wait(interval):
+                try:
+                    sink(cls.snapshot())
+                except Exception:
+                    pass
+                if reset:
+                    cls.reset()
+
+        with cls._LOCK:
+            cls._reporter_stop = stop
+            cls._reporter = threading.Thread(target=_run, name='wlfutil-metrics', daemon=True)
+            cls._reporter.start()
+
+    @classmethod
+    def stop_reporter(cls):
+        with cls._LOCK:
+            reporter, stop = cls._reporter, cls._reporter_stop
+            cls._reporter, cls._reporter_stop = None, None
+        if reporter is not None:
+            stop.set()
+            reporter.join()
@@ -0,0 +1,370 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import minio
+from wlfutil.conn_util import ConnRegistry
+from wlfutil.metrics_util import MetricsUtil
+from wlfutil.log_util import LogUtil
+
+
+class MinioUtil:
+    """minio工具类
+
+    conf = {
+        'endpoint': '110.110.110.110:9000',
+        'access_key': 'admin',
+        'secret_key': '123456',
+        'secure': False,
+    }
+    """
+    # 最近一次使用的客户端
+    CONN = None
+    # 各配置对应的客户端，见模块末尾
+    REGISTRY = None
+    POLICY = '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":{"AWS":["*"]},"Action":["s3:GetBucketLocation","s3:ListBucket"],"Resource":["arn:aws:s3:::%s"]},{"Effect":"Allow","Principal":{"AWS":["*"]},"Action":["s3:GetObject"],"Resource":["arn:aws:s3:::%s/*"]}]}'
+
+    @classmethod
+    def _init(cls, conf: dict):
+        conn = cls.CONN = cls.REGISTRY.get(conf)
+        return conn
+
+    @classmethod
+    def connect(cls, conf: dict):
+        """切换到该配置对应的客户端，已经建立过的直接复用"""
+        return cls._init(conf)
+
+    @classmethod
+    def _create(cls, conf: dict):
+        try:
+            return minio.Minio(**conf)
+        except Exception as e:
+            LogUtil.error("minio init failed, please check the config", e)
+            raise
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'upload')
+    def upload(cls, conf: dict, bucket: str, filepath: str, filename: str):
+        """上传文件，返回文件的下载地址"""
+        conn = cls._init(conf)
+        endpoint = conf['endpoint']
+        download_url = f'http://{endpoint}'
+        conn.fput_object(bucket_name=bucket, object_name=filename, file_path=filepath)
+        return f'{download_url}/{bucket}/{filename}'
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'exists_bucket')
+    def exists_bucket(cls, conf: dict, bucket: str):
+        """
+        判断桶是否存在
+        :param bucket_name: 桶名称
+        :return:
+        """
+        conn = cls._init(conf)
+        return conn.bucket_exists(bucket_name=bucket)
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'create_bucket')
+    def create_bucket(cls, conf: dict, bucket: str, is_policy: bool = True):
+        """
+        创建桶 + 赋予策略
+        :param bucket_name: 桶名
+        :param is_policy: 策略
+        :return:
+        """
+        conn = cls._init(conf)
+        if conn.bucket_exists(bucket_name=bucket):
+            return False
+        else:
+            conn.make_bucket(bucket_name=bucket)
+        if is_policy:
+            policy = cls.POLICY % (bucket, bucket)
+            conn.set_bucket_policy(bucket_name=bucket, policy=policy)
+        return True
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'download')
+    def download(cls, conf: dict, bucket: str, filepath: str, filename: str):
+        """下载保存文件保存本地
+        :param bucket:
+        :param filepath:
+        :param filename:
+        :return:
+        """
+        conn = cls._init(conf)
+        conn.fget_object(bucket, filename, filepath)
+
+    # 目录同步时记录已传输文件的清单文件名，放在本地目录下
+    MANIFEST = '.minio_manifest.json'
+
+    @staticmethod
+    def _walk(local_dir: str):
+        """用 os.scandir 遍历目录，返回 [(相对路径, 绝对路径, 大小, 修改时间ns), ...]"""
+        res, stack = [], [(local_dir, '')]
+        while stack:
+            path, rel = stack.pop()
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = f'{rel}{entry.name}'
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, name + '/'))
+                    elif entry.is_file() and not name.startswith(MinioUtil.MANIFEST) and not name.endswith('.part.minio'):
+                        st = entry.stat()
+                        res.append((name, entry.path, st.st_size, st.st_mtime_ns))
+        return res
+
+    @staticmethod
+    def _local_path(local_dir: str, rel: str):
+        """对象名中的相对路径对应的本地路径，规范化后跑出 local_dir 的（如 'a/../../etc/x'）返回 None"""
+        root = os.path.abspath(local_dir)
+        path = os.path.normpath(os.path.join(root, *rel.split('/')))
+        if path == root or os.path.commonpath([root, path]) != root:
+            return None
+        return path
+
+    @classmethod
+    def _load_manifest(cls, local_dir: str):
+        try:
+            with open(os.path.join(local_dir, cls.MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _save_manifest(cls, local_dir: str, manifest: dict):
+        """先写临时文件再替换，中途中断不会损坏清单"""
+        path = os.path.join(local_dir, cls.MANIFEST)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def _sync(cls, local_dir: str, section: str, tasks: list, transfer, workers: int, skipped: int, start: float):
+        """在线程池上执行传输任务，每完成一批就保存一次清单，中断后再次执行会跳过已完成的文件
+        :param tasks [(相对路径, 参数), ...]
+        :param transfer transfer(参数) -> (大小, 修改时间ns, etag)
+        """
+        manifest = cls._load_manifest(local_dir)
+        entries = manifest.setdefault(section, {})
+        lock = threading.Lock()
+        done = {'files': 0, 'bytes': 0, 'last_save': time.monotonic()}
+        errors = []
+
+        def _run(task):
+            rel, arg = task
+            try:
+                size, mtime, etag = transfer(arg)
+            except Exception as e:
+                with lock:
+                    errors.append((rel, str(e)))
+                return
+            with lock:
+                entries[rel] = {'size': size, 'mtime': mtime, 'etag': etag}
+                done['files'] += 1
+                done['bytes'] += size
+                if time.monotonic() - done['last_save'] > 5:
+                    cls._save_manifest(local_dir, manifest)
+                    done['last_save'] = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(_run, tasks))
+        cls._save_manifest(local_dir, manifest)
+        cost = time.perf_counter() - start
+        return {
+            'files': done['files'],
+            'skipped': skipped,
+            'failed': len(errors),
+            'errors': errors,
+            'bytes': done['bytes'],
+            'cost': round(cost, 6),
+            'files_per_sec': round(done['files'] / cost, 1) if cost else 0.0,
+            'mb_per_sec': round(done['bytes'] / 1024 ** 2 / cost, 3) if cost else 0.0,
+        }
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'upload_dir')
+    def upload_dir(cls, conf: dict, bucket: str, local_dir: str, prefix: str = '', workers: int = 8, part_size: int = 0,
+                   num_parallel_uploads: int = 3):
+        """并发上传整个目录，大小、修改时间与清单一致且远端 etag 未变的文件直接跳过
+        :param prefix 对象名前缀，如 'models/'
+        :param workers 同时上传的文件数
+        :param part_size 大文件分片上传的分片大小，0 为自动
+        :param num_parallel_uploads 单个大文件的分片并发数
+        :return {'files', 'skipped', 'failed', 'errors', 'bytes', 'cost', 'files_per_sec', 'mb_per_sec'}
+        """
+        start = time.perf_counter()
+        conn = cls._init(conf)
+        section = f'upload:{bucket}/{prefix}'
+        entries = cls._load_manifest(local_dir).get(section, {})
+        remote = {o.object_name: (o.etag or '').strip('"') for o in conn.list_objects(bucket, prefix=prefix or None, recursive=True)}
+        tasks, skipped = [], 0
+        for rel, path, size, mtime in cls._walk(local_dir):
+            entry = entries.get(rel)
+            if entry and entry['size'] == size and entry['mtime'] == mtime and remote.get(prefix + rel) == entry['etag']:
+                skipped += 1
+                continue
+            tasks.append((rel, (prefix + rel, path)))
+
+        def _upload(arg):
+            name, path = arg
+            st = os.stat(path)
+            res = conn.fput_object(bucket, name, path, part_size=part_size, num_parallel_uploads=num_parallel_uploads)
+            return st.st_size, st.st_mtime_ns, (res.etag or '').strip('"')
+
+        return cls._sync(local_dir, section, tasks, _upload, workers, skipped, start)
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'download_dir')
+    def download_dir(cls, conf: dict, bucket: str, local_dir: str, prefix: str = '', workers: int = 8):
+        """并发下载前缀下的所有对象到本地目录，etag 与清单一致且本地文件未改动的直接跳过
+        中断的大文件会从已下载的部分继续（fget_object 的 .part.minio 临时文件）
+        :return 同 upload_dir
+        """
+        start = time.perf_counter()
+        conn = cls._init(conf)
+        os.makedirs(local_dir, exist_ok=True)
+        section = f'download:{bucket}/{prefix}'
+        entries = cls._load_manifest(local_dir).get(section, {})
+        tasks, skipped = [], 0
+        for obj in conn.list_objects(bucket, prefix=prefix or None, recursive=True):
+            if obj.is_dir:
+                continue
+            rel = obj.object_name[len(prefix):]
+            path = cls._local_path(local_dir, rel)
+            etag = (obj.etag or '').strip('"')
+            entry = entries.get(rel)
+            if path and entry and entry['etag'] == etag:
+                try:
+                    st = os.stat(path)
+                    if st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime']:
+                        skipped += 1
+                        continue
+                except OSError:
+                    pass
+            tasks.append((rel, (obj.object_name, path, etag)))
+
+        def _download(arg):
+            name, path, etag = arg
+            if path is None:
+                raise ValueError(f'object name escapes local_dir: {name}')
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            conn.fget_object(bucket, name, path)
+            st = os.stat(path)
+            return st.st_size, st.st_mtime_ns, etag
+
+        return cls._sync(local_dir, section, tasks, _download, workers, skipped, start)
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'put_stream')
+    def put_stream(cls, conf: dict, bucket: str, filename: str, data, length: int = None, part_size: int = 10 * 1024 * 1024,
+                   content_type: str = 'application/octet-stream'):
+        """直接上传内存中的数据，不用先写临时文件
+        :param data bytes / bytearray / memoryview（不复制整块数据），文件对象，或逐块产出 bytes 的可迭代对象
+        :param length 数据总长度，bytes 类数据自动计算；未知时按 part_size 分片上传
+        :param part_size 分片大小，至少 5MB，内存占用与它相关而与对象大小无关
+        :return 对象的 etag
+        """
+        conn = cls._init(conf)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = memoryview(data).cast('B')
+            length = data.nbytes if length is None else length
+            reader = _StreamReader(data)
+        elif hasattr(data, 'read'):
+            reader = data
+        else:
+            reader = _StreamReader(iter(data))
+        res = conn.put_object(bucket, filename, reader, -1 if length is None else length, content_type=content_type, part_size=part_size)
+        return (res.etag or '').strip('"')
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'get_range')
+    def get_range(cls, conf: dict, bucket: str, filename: str, offset: int = 0, length: int = 0, buf=None):
+        """读取对象的一段数据，不下载整个对象
+        :param length 读取长度，0 表示读到末尾
+        :param buf 可写缓冲区（bytearray / memoryview），给定时数据直接读入其中并返回读入的字节数，否则返回 bytes
+        """
+        conn = cls._init(conf)
+        response = conn.get_object(bucket, filename, offset=offset, length=length)
+        try:
+            if buf is None:
+                return response.read()
+            view, n = memoryview(buf).cast('B'), 0
+            while n < view.nbytes:
+                got = response.readinto(view[n:])
+                if not got:
+                    break
+                n += got
+            return n
+        finally:
+            response.close()
+            response.release_conn()
+
+    @classmethod
+    @MetricsUtil.instrument('minio', 'iter_object')
+    def iter_object(cls, conf: dict, bucket: str, filename: str, chunk_size: int = 1024 * 1024, offset: int = 0, length: int = 0, buf=None):
+        """分块流式读取对象，内存占用只与 chunk_size 有关
+        :param buf 可写缓冲区，给定时每块读入其中并返回它的 memoryview 切片（下一块会覆盖，需先处理完），chunk_size 取缓冲区大小
+        """
+        conn = cls._init(conf)
+        response = conn.get_object(bucket, filename, offset=offset, length=length)
+        try:
+            if buf is None:
+                yield from response.stream(chunk_size)
+                return
+            view = memoryview(buf).cast('B')
+            while True:
+                n = 0
+                while n < view.nbytes:
+                    got = response.readinto(view[n:])
+                    if not got:
+                        break
+                    n += got
+                if not n:
+                    break
+                yield view[:n]
+                if n < view.nbytes:
+                    break
+        finally:
+            response.close()
+            response.release_conn()
+
+
+class _StreamReader:
+    """把 memoryview 或 bytes 块的迭代器包装成 put_object 需要的 read(n) 接口
+    put_object 要求 read 返回 bytes，每次只复制一个分片大小的数据，整块的 bytes 块原样返回不复制
+    """
+
+    def __init__(self, source):
+        if isinstance(source, memoryview):
+            self.view, self.chunks = source, None
+        else:
+            self.view, self.chunks = memoryview(b''), source
+        self.pos = 0
+
+    def _next(self):
+        """当前块读完后取下一块，没有更多数据时返回 False"""
+        while self.pos >= self.view.nbytes:
+            chunk = next(self.chunks, None) if self.chunks is not None else None
+            if chunk is None:
+                return False
+            self.view, self.pos = memoryview(chunk).cast('B'), 0
+        return True
+
+    def read(self, size: int = -1):
+        if size is None or size < 0:
+            size = float('inf')
+        parts, n = [], 0
+        while n < size and self._next():
+            end = min(self.view.nbytes, self.pos + size - n)
+            if self.pos == 0 and end == self.view.nbytes and isinstance(self.view.obj, bytes) and len(self.view.obj) == end:
+                part = self.view.obj
+            else:
+                part = bytes(self.view[self.pos:end])
+            self.pos = end
+            parts.append(part)
+            n += len(part)
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+
+MinioUtil.REGISTRY = ConnRegistry(MinioUtil._create)
@@ -0,0 +1,317 @@
+import time
+import threading
+from itertools import islice
+from collections import deque
+from contextlib import contextmanager
+import pymysql
+from wlfutil.conn_util import ConnRegistry
+from wlfutil.metrics_util import MetricsUtil
+from wlfutil.log_util import LogUtil
+
+
+class MysqlPool:
+    """mysql连接池，线程安全
+
+    :param min_size 最少保留的连接数，空闲回收不会低于这个数
+    :param max_size 最多同时存在的连接数，用尽后 checkout 会等待
+    :param idle_timeout 连接空闲超过该秒数后回收
+    :param max_lifetime 连接存活超过该秒数后回收
+    :param ping_after 连接空闲超过该秒数后，取出时先 ping 一次确认可用
+    :param wait_timeout 等待空闲连接的最长秒数，None 表示一直等
+    """
+
+    def __init__(self, conf: dict, min_size: int = 0, max_size: int = 10, idle_timeout: float = 300, max_lifetime: float = 3600,
+                 ping_after: float = 30, wait_timeout: float = None):
+        self.conf = conf
+        self.min_size, self.max_size = min_size, max(1, max_size)
+        self.idle_timeout, self.max_lifetime = idle_timeout, max_lifetime
+        self.ping_after, self.wait_timeout = ping_after, wait_timeout
+        self._cond = threading.Condition()
+        # 空闲连接 (conn, 上次归还时间)，后进先出，尽量复用热连接
+        self._idle = deque()
+        # 连接 -> 创建时间
+        self._born = {}
+        self._size = 0
+        self._closed = False
+        self.created, self.recycled, self.waits, self.wait_time = 0, 0, 0, 0.0
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            self._idle.append((self._new(), time.monotonic()))
+
+    def _new(self):
+        try:
+            conn = pymysql.connect(**self.conf)
+        except Exception as e:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            LogUtil.error("mysql init failed, please check the config", e)
+            raise
+        with self._cond:
+            self._born[conn] = time.monotonic()
+            self.created += 1
+        return conn
+
+    def _discard(self, conn):
+        """关闭并丢弃连接，调用方需持有锁"""
+        self._born.pop(conn, None)
+        self._size -= 1
+        self.recycled += 1
+        self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _sweep(self, now: float):
+        """从最久未用的一端回收空闲超时的连接，调用方需持有锁
+        取用和归还都在右端，持续有少量请求时左端的连接一直轮不到，只在取出时检查的话永远不会被回收
+        """
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            self._discard(self._idle.popleft()[0])
+
+    def checkout(self):
+        """取出一个可用连接"""
+        start = time.monotonic()
+        while True:
+            conn, idle_for = None, 0
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError('mysql pool is closed')
+                self._sweep(time.monotonic())
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    now = time.monotonic()
+                    idle_for = now - last_used
+                    if now - self._born[conn] > self.max_lifetime or (idle_for > self.idle_timeout and self._size > self.min_size):
+                        self._discard(conn)
+                        conn = None
+                        continue
+                    break
+                if conn is None:
+                    if self._size < self.max_size:
+                        self._size += 1
+                    else:
+                        remaining = None
+                        if self.wait_timeout is not None:
+                            remaining = self.wait_timeout - (time.monotonic() - start)
+                            if remaining <= 0:
+                                raise TimeoutError(f'no free mysql connection within {self.wait_timeout}s')
+                        self.waits += 1
+                        waited = time.monotonic()
+                        self._cond.wait(remaining)
+                        self.wait_time += time.monotonic() - waited
+                        continue
+            if conn is None:
+                return self._new()
+            # 只对空闲了一段时间的连接做健康检查
+            if idle_for > self.ping_after:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self._discard(conn)
+                    continue
+            return conn
+
+    def checkin(self, conn, broken: bool = False):
+        """归还连接，broken 为 True 时直接丢弃"""
+        with self._cond:
+            if conn not in self._born:
+                return
+            if broken or self._closed:
+                self._discard(conn)
+            else:
+                now = time.monotonic()
+                self._sweep(now)
+                self._idle.append((conn, now))
+                self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... 用完自动归还，出错时回滚"""
+        conn = self.checkout()
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.checkin(conn, broken)
+
+    def close(self):
+        """关闭所有空闲连接，借出中的连接归还时关闭"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._cond.notify_all()
+
+    def stats(self):
+        """连接池统计信息"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'created': self.created,
+                'recycled': self.recycled,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 6),
+            }
+
+
+class MysqlUtil:
+    """mysql工具类，每个配置对应一个连接池
+
+    conf_mysql = {
+        'host': '110.110.110.110',
+        'port': 3306,
+        'user': 'admin',
+        'password': '123456',
+        'database': 'db_test',
+    }
+    """
+    # connect 时新建的独立连接，兼容直接使用 MysqlUtil.CONN 的旧代码；get / save 等方法走连接池，不使用它
+    CONN = None
+    # 各配置对应的连接池，见模块末尾
+    REGISTRY = None
+    # 新建连接池使用的参数，见 MysqlPool
+    POOL_OPTS = {}
+
+    @classmethod
+    def configure_pool(cls, **opts):
+        """设置之后新建连接池的参数，如 max_size=20, idle_timeout=600"""
+        cls.POOL_OPTS.update(opts)
+
+    @classmethod
+    def connect(cls, conf: dict):
+        """获取该配置对应的连接池，不存在则创建；同时与旧版一样新建一个独立连接放在 CONN 中
+        注意：配置数超过注册表容量时连接池可能被淘汰关闭，长时间持有请用 REGISTRY.lease(conf)
+        """
+        try:
+            cls.CONN = pymysql.connect(**conf)
+        except Exception as e:
+            LogUtil.error("mysql init failed, please check the config", e)
+        return cls.REGISTRY.get(conf)
+
+    @classmethod
+    @contextmanager
+    def _connection(cls, conf: dict):
+        """借出连接池并取出一个连接，期间连接池被淘汰也不会关闭"""
+        with cls.REGISTRY.lease(conf) as pool, pool.connection() as conn:
+            yield conn
+
+    @classmethod
+    def _create(cls, conf: dict):
+        return MysqlPool(conf, **cls.POOL_OPTS)
+
+    @classmethod
+    def stats(cls):
+        """所有连接池的统计信息 {配置指纹: {...}}"""
+        return {key: pool.stats() for key, pool in cls.REGISTRY.items()}
+
+    @classmethod
+    def close(cls):
+        """关闭所有连接池"""
+        cls.REGISTRY.clear()
+
+    @classmethod
+    @MetricsUtil.instrument('mysql', 'get')
+    def get(cls, conf: dict, sql: str):
+        with cls._connection(conf) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    @classmethod
+    @MetricsUtil.instrument('mysql', 'iter_rows')
+    def iter_rows(cls, conf: dict, sql: str, params=None, batch_size: int = 1000, dict_rows: bool = False, batches: bool = False):
+        """流式读取大结果集，使用服务端游标，内存占用与结果总行数无关
+        注意：迭代结束前会一直占用一个连接，提前结束（break / close）时该连接直接断开，不会把剩余结果读完
+        :param params sql参数，同 cursor.execute
+        :param batch_size 每次从服务端读取的行数
+        :param dict_rows 为 True 时每行返回 dict
+        :param batches 为 True 时每次返回一批行，否则逐行返回
+        """
+        pool = cls.REGISTRY.acquire(conf)
+        try:
+            conn = pool.checkout()
+        except BaseException:
+            cls.REGISTRY.release(pool)
+            raise
+        cursor, finished = None, False
+        try:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor if dict_rows else pymysql.cursors.SSCursor)
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if batches:
+                    yield rows
+                else:
+                    yield from rows
+            cursor.close()
+            finished = True
+        finally:
+            pool.checkin(conn, broken=not finished)
+            cls.REGISTRY.release(pool)
+
+    @classmethod
+    @MetricsUtil.instrument('mysql', 'save')
+    def save(cls, conf: dict, sql: str):
+        with cls._connection(conf) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql)
+                conn.commit()
+            finally:
+                cursor.close()
+
+    @classmethod
+    @MetricsUtil.instrument('mysql', 'save_many')
+    def save_many(cls, conf: dict, sql: str, rows, batch_size: int = 1000, commit_every: int = 10, update_cols: list = None):
+        """批量参数化写入，INSERT ... VALUES (%s, ...) 会被 executemany 改写成多行插入
+        :param sql 带占位符的插入语句，如 INSERT INTO tbl (a, b) VALUES (%s, %s)
+        :param rows 任意可迭代对象或生成器，逐批读取，不会一次性载入内存
+        :param batch_size 每次 executemany 的行数
+        :param commit_every 每多少批提交一次事务；出错时回滚未提交的部分，已提交的批次保留
+        :param update_cols 需要在主键冲突时更新的列，传入后追加 ON DUPLICATE KEY UPDATE col=VALUES(col)
+        :return {'rows': 写入行数, 'cost': 耗时秒数, 'rows_per_sec': 每秒写入行数}
+        """
+        if update_cols:
+            sets = ', '.join(f'`{c}`=VALUES(`{c}`)' for c in update_cols)
+            sql = f'{sql.rstrip().rstrip(";")} ON DUPLICATE KEY UPDATE {sets}'
+        start = time.perf_counter()
+        total, pending = 0, 0
+        rows = iter(rows)
+        with cls._connection(conf) as conn:
+            cursor = conn.cursor()
+            try:
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    cursor.executemany(sql, batch)
+                    total += len(batch)
+                    pending += 1
+                    if pending >= commit_every:
+                        conn.commit()
+                        pending = 0
+                conn.commit()
+            finally:
+                cursor.close()
+        cost = time.perf_counter() - start
+        return {'rows': total, 'cost': round(cost, 6), 'rows_per_sec': round(total / cost, 1) if cost else 0.0}
+
+
+MysqlUtil.REGISTRY = ConnRegistry(MysqlUtil._create, lambda pool: pool.close())
@@ -0,0 +1,251 @@
+from itertools import islice
+from contextlib import contextmanager
+import redis
+from wlfutil.conn_util import ConnRegistry
+from wlfutil.metrics_util import MetricsUtil
+from wlfutil.log_util import LogUtil
+
+
+class RedisUtil:
+    """redis操作工具类
+
+    conf = {
+        'host': '',
+        'port': '',
+        'password': '',
+        'db': '30000',
+        'decode_responses': True,
+    }
+    """
+    # 最近一次 connect 的客户端，get / set 等方法使用它
+    CONN = None
+    # 各配置对应的客户端，见模块末尾
+    REGISTRY = None
+
+    @classmethod
+    def connect(cls, conf: dict):
+        """切换到该配置对应的客户端，已经建立过的直接复用"""
+        cls.CONN = cls.REGISTRY.get(conf)
+        return cls.CONN
+
+    @classmethod
+    def _create(cls, conf: dict):
+        try:
+            pool = redis.ConnectionPool(**conf)
+            return redis.Redis(connection_pool=pool)
+        except Exception as e:
+            LogUtil.error("redis init failed, please check the config", e)
+            raise
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'exist')
+    def exist(cls, key: str):
+        """判断key是否存在
+        """
+        return cls.CONN.exists(key)
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'get')
+    def get(cls, key: str):
+        """字符串获取值
+        """
+        return cls.CONN.get(key)
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'set')
+    def set(cls, key: str, val: str):
+        """字符串设置值
+        """
+        cls.CONN.set(key, val)
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'lget')
+    def lget(cls, key: str):
+        """列表获取值
+        """
+        return cls.CONN.lrange(key, 0, -1)
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'lset')
+    def lset(cls, key: dict, vals: tuple):
+        """列表设置值
+        """
+        cls.CONN.lpush(key, vals)
+
+    @classmethod
+    @contextmanager
+    def pipeline(cls, chunk_size: int = 1000, transaction: bool = False):
+        """批量发送命令，每攒够 chunk_size 条发送一次，退出 with 时发送剩余的命令
+        with RedisUtil.pipeline() as pipe:
+            for key in keys:
+                pipe.get(key)
+        pipe.results  # 与命令顺序一一对应
+        :param transaction 为 True 时每批命令用 MULTI/EXEC 包裹，批内原子执行，批与批之间不保证
+        """
+        pipe = RedisPipeline(cls.CONN, chunk_size, transaction)
+        try:
+            yield pipe
+        except Exception:
+            pipe.reset()
+            raise
+        pipe.execute()
+
+    @classmethod
+    def _batch(cls, cmd: str, args_list, chunk_size: int, transaction: bool = False):
+        """对每组参数执行同一命令，返回与参数顺序一致的结果"""
+        with cls.pipeline(chunk_size, transaction) as pipe:
+            fn = getattr(pipe, cmd)
+            for args in args_list:
+                fn(*args)
+        return pipe.results
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'mget')
+    def mget(cls, keys: list, chunk_size: int = 1000):
+        """批量获取字符串值
+        :return {key: 值}，不存在的 key 值为 None
+        """
+        keys = list(keys)
+        vals = []
+        for i in range(0, len(keys), chunk_size):
+            vals.extend(cls.CONN.mget(keys[i:i + chunk_size]))
+        return dict(zip(keys, vals))
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'mset')
+    def mset(cls, mapping: dict, ttl: int = None, chunk_size: int = 1000):
+        """批量设置字符串值
+        :param ttl 过期秒数，为空时用 MSET 不过期
+        """
+        if ttl is None:
+            it = iter(mapping.items())
+            while True:
+                chunk = dict(islice(it, chunk_size))
+                if not chunk:
+                    break
+                cls.CONN.mset(chunk)
+        else:
+            cls._batch('set', ((key, val, ttl) for key, val in mapping.items()), chunk_size)
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'exists_many')
+    def exists_many(cls, keys: list, chunk_size: int = 1000):
+        """批量判断key是否存在
+        :return {key: True/False}
+        """
+        keys = list(keys)
+        return {key: bool(n) for key, n in zip(keys, cls._batch('exists', ((key,) for key in keys), chunk_size))}
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'lget_many')
+    def lget_many(cls, keys: list, chunk_size: int = 1000):
+        """批量获取列表
+        :return {key: [值, ...]}
+        """
+        keys = list(keys)
+        return dict(zip(keys, cls._batch('lrange', ((key, 0, -1) for key in keys), chunk_size)))
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'lpush_many')
+    def lpush_many(cls, mapping: dict, ttl: int = None, chunk_size: int = 1000):
+        """批量向多个列表头部插入值
+        :param mapping {key: [值, ...]}
+        :param ttl 不为空时同时设置列表的过期秒数
+        :return {key: 插入后的列表长度}
+        """
+        keys = [key for key, vals in mapping.items() if vals]
+        with cls.pipeline(chunk_size) as pipe:
+            idx = []
+            for key in keys:
+                idx.append(pipe.lpush(key, *mapping[key]))
+                if ttl is not None:
+                    pipe.expire(key, ttl)
+        return {key: pipe.results[i] for key, i in zip(keys, idx)}
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'lpop_many')
+    def lpop_many(cls, keys: list, count: int = 1, chunk_size: int = 1000):
+        """批量从多个列表头部弹出最多 count 个值，每个列表的读取和截断在同一个事务里
+        :return {key: [值, ...]}，count 小于 1 时不弹出，每个列表都返回 []
+        """
+        keys = list(keys)
+        if count < 1:
+            # lrange(key, 0, -1) 会取出整个列表
+            return {key: [] for key in keys}
+        with cls.pipeline(chunk_size * 2, transaction=True) as pipe:
+            idx = []
+            for key in keys:
+                idx.append(pipe.lrange(key, 0, count - 1))
+                pipe.ltrim(key, count, -1)
+        return {key: pipe.results[i] for key, i in zip(keys, idx)}
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'hget_many')
+    def hget_many(cls, key: str, fields: list):
+        """获取哈希的多个字段
+        :return {field: 值}，不存在的字段值为 None
+        """
+        fields = list(fields)
+        return dict(zip(fields, cls.CONN.hmget(key, fields))) if fields else {}
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'hset_many')
+    def hset_many(cls, mapping: dict, ttl: int = None, chunk_size: int = 1000):
+        """批量设置多个哈希的字段
+        :param mapping {key: {field: 值}}
+        :param ttl 不为空时同时设置哈希的过期秒数
+        """
+        with cls.pipeline(chunk_size) as pipe:
+            for key, fields in mapping.items():
+                if fields:
+                    pipe.hmset(key, fields)
+                    if ttl is not None:
+                        pipe.expire(key, ttl)
+
+    @classmethod
+    @MetricsUtil.instrument('redis', 'hgetall_many')
+    def hgetall_many(cls, keys: list, chunk_size: int = 1000):
+        """批量获取多个哈希的全部字段
+        :return {key: {field: 值}}
+        """
+        keys = list(keys)
+        return dict(zip(keys, cls._batch('hgetall', ((key,) for key in keys), chunk_size)))
+
+
+class RedisPipeline:
+    """RedisUtil.pipeline 返回的分批管道，命令方法同 redis.Redis，调用后返回该命令结果在 results 中的下标"""
+
+    def __init__(self, conn, chunk_size: int = 1000, transaction: bool = False):
+        self._pipe = conn.pipeline(transaction=transaction)
+        self.chunk_size = max(1, chunk_size)
+        self.results = []
+        self._pending = 0
+
+    def __getattr__(self, name: str):
+        cmd = getattr(self._pipe, name)
+
+        def call(*args, **kwargs):
+            cmd(*args, **kwargs)
+            idx = len(self.results) + self._pending
+            self._pending += 1
+            if self._pending >= self.chunk_size:
+                self.execute()
+            return idx
+        return call
+
+    @MetricsUtil.instrument('redis', 'pipeline_execute')
+    def execute(self):
+        """发送已缓存的命令，返回目前为止全部结果"""
+        if self._pending:
+            self._pending = 0
+            self.results.extend(self._pipe.execute())
+        return self.results
+
+    def reset(self):
+        """丢弃还未发送的命令"""
+        self._pending = 0
+        self._pipe.reset()
+
+
+# 淘汰时只断开空闲连接，其他线程正在执行命令的连接归还后照常使用
+RedisUtil.REGISTRY = ConnRegistry(RedisUtil._create, lambda client: client.connection_pool.disconnect(inuse_connections=False))
@@ -0,0 +1,155 @@
+import datetime as dt
+from wlfutil.dt_util import DtUtil
+
+
+class ResampleUtil:
+    """基于 int64 秒级时间戳数组的分桶、重采样工具类，需要 numpy
+
+    分桶范围与 UniUtil.date_partition 相同：start_time 当天 0 点到 end_time 第二天 0 点，每 freq 秒一个桶
+    times = np.array([...], dtype=np.int64)  # 秒级时间戳，或 datetime64（按东八区本地时间理解）
+    starts, vals = ResampleUtil.resample(times, values, 60, '2022-01-01 00:00:00', '2022-01-01 00:00:00', agg='mean', fill='linear')
+    """
+    # 聚合方式
+    AGG_FIRST = 'first'
+    AGG_LAST = 'last'
+    AGG_MEAN = 'mean'
+    AGG_MIN = 'min'
+    AGG_MAX = 'max'
+    AGG_SUM = 'sum'
+    AGG_COUNT = 'count'
+    # 空桶填充方式，None 表示不填充
+    FILL_FFILL = 'ffill'
+    FILL_LINEAR = 'linear'
+
+    # 聚合方式 -> numpy 的 ufunc 名，numpy 在用到时才导入
+    _REDUCERS = {AGG_SUM: 'add', AGG_MEAN: 'add', AGG_MIN: 'minimum', AGG_MAX: 'maximum'}
+
+    @staticmethod
+    def range_of(start_time: str, end_time: str, tz_hours: int = 8):
+        """分桶范围的起止秒级时间戳，与 date_partition 一致"""
+        epoch = dt.datetime(1970, 1, 1) + dt.timedelta(hours=tz_hours)
+        begin = DtUtil.day_start_of_date_str(start_time)
+        end = DtUtil.day_end_of_date_str(end_time)
+        return int((begin - epoch).total_seconds()), int((end - epoch).total_seconds())
+
+    @classmethod
+    def buckets(cls, freq: int, start_time: str, end_time: str, tz_hours: int = 8):
+        """直接按算术生成各桶的起始时间戳，等价于 date_partition 的 key"""
+        import numpy as np
+        begin, end = cls.range_of(start_time, end_time, tz_hours)
+        return np.arange(begin, end, freq, dtype=np.int64)
+
+    @classmethod
+    def iter_buckets(cls, freq: int, start_time: str, end_time: str, block: int = 86400, tz_hours: int = 8):
+        """惰性生成各桶的起始时间戳，每次最多返回 block 个桶"""
+        import numpy as np
+        begin, end = cls.range_of(start_time, end_time, tz_hours)
+        step = freq * block
+        for b in range(begin, end, step):
+            yield np.arange(b, min(b + step, end), freq, dtype=np.int64)
+
+    @staticmethod
+    def _prepare(times, values, tz_hours: int):
+        """统一成按时间升序的 int64 时间戳和 float64 数值"""
+        import numpy as np
+        times = np.asarray(times)
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype('datetime64[s]').astype(np.int64) - tz_hours * 3600
+        else:
+            times = times.astype(np.int64, copy=False)
+        values = np.asarray(values, dtype=np.float64)
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        return times, values
+
+    @classmethod
+    def _aggregate(cls, times, values, bounds, agg: str):
+        """按边界 [b0, b1, ..., bn] 对点做聚合，一次 searchsorted 找到每个桶的点，空桶为 nan（count 为 0）"""
+        import numpy as np
+        idx = np.searchsorted(times, bounds, side='left')
+        lo, hi = idx[:-1], idx[1:]
+        counts = hi - lo
+        if agg == cls.AGG_COUNT:
+            return counts
+        res = np.full(len(lo), np.nan)
+        nonempty = counts > 0
+        if agg == cls.AGG_FIRST:
+            res[nonempty] = values[lo[nonempty]]
+        elif agg == cls.AGG_LAST:
+            res[nonempty] = values[hi[nonempty] - 1]
+        elif agg in cls._REDUCERS:
+            starts = lo[nonempty] - idx[0]
+            if len(starts):
+                # 中间的空桶没有点，所以每段正好是一个非空桶的点
+                reduced = getattr(np, cls._REDUCERS[agg]).reduceat(values[idx[0]:idx[-1]], starts)
+                res[nonempty] = reduced / counts[nonempty] if agg == cls.AGG_MEAN else reduced
+        else:
+            raise ValueError(f'unknown agg: {agg}')
+        return res
+
+    @classmethod
+    def iter_resample(cls, times, values, freq: int, start_time: str, end_time: str, agg: str = AGG_MEAN, fill: str = None,
+                      block: int = 86400, tz_hours: int = 8):
+        """惰性重采样，每次返回 block 个桶的 (桶起始时间戳数组, 聚合值数组)，适合很长的时间范围
+        ffill / linear 会跨 block 延续，linear 只在两侧都有值的空桶之间插值
+        """
+        import numpy as np
+        if fill not in (None, cls.FILL_FFILL, cls.FILL_LINEAR):
+            raise ValueError(f'unknown fill: {fill}')
+        times, values = cls._prepare(times, values, tz_hours)
+        begin, end = cls.range_of(start_time, end_time, tz_hours)
+        step = freq * block if block else max(end - begin, freq)
+        # 上一个有值的桶 (起始时间戳, 值)
+        prev = None
+        for b in range(begin, end, step):
+            starts = np.arange(b, min(b + step, end), freq, dtype=np.int64)
+            res = cls._aggregate(times, values, np.append(starts, starts[-1] + freq), agg)
+            if fill and agg != cls.AGG_COUNT:
+                res, prev = cls._fill(times, values, starts, res, freq, begin, end, agg, fill, prev)
+            yield starts, res
+
+    @classmethod
+    def _fill(cls, times, values, starts, res, freq: int, begin: int, end: int, agg: str, fill: str, prev):
+        import numpy as np
+        valid = ~np.isnan(res)
+        xs, ys = starts[valid], res[valid]
+        if prev is not None:
+            xs, ys = np.insert(xs, 0, prev[0]), np.insert(ys, 0, prev[1])
+        if fill == cls.FILL_LINEAR and not valid[-1]:
+            # 往后找下一个有值的桶，使末尾的空桶也能插值
+            i = np.searchsorted(times, starts[-1] + freq, side='left')
+            if i < len(times) and times[i] < end:
+                nb = begin + (int(times[i]) - begin) // freq * freq
+                xs = np.append(xs, nb)
+                ys = np.append(ys, cls._aggregate(times, values, np.array([nb, nb + freq]), agg)[0])
+        if len(xs):
+            empty = ~valid
+            if fill == cls.FILL_FFILL:
+                pos = np.searchsorted(xs, starts[empty], side='right') - 1
+                res[empty] = np.where(pos >= 0, ys[pos.clip(0)], np.nan)
+            else:
+                res[empty] = np.interp(starts[empty], xs, ys, left=np.nan, right=np.nan)
+        if valid.any():
+            last = np.flatnonzero(valid)[-1]
+            prev = (starts[last], res[last])
+        return res, prev
+
+    @classmethod
+    def resample(cls, times, values, freq: int, start_time: str, end_time: str, agg: str = AGG_MEAN, fill: str = None,
+                 as_dict: bool = False, tz_hours: int = 8):
+        """重采样，参数见 iter_resample
+        :param as_dict 为 True 时返回与 date_partition 相同形状的 {datetime: 值或None}
+        :return (桶起始时间戳数组, 聚合值数组)
+        """
+        import numpy as np
+        blocks = list(cls.iter_resample(times, values, freq, start_time, end_time, agg, fill, None, tz_hours))
+        starts = np.concatenate([b[0] for b in blocks])
+        res = np.concatenate([b[1] for b in blocks])
+        if not as_dict:
+            return starts, res
+        keys = (starts + tz_hours * 3600).astype('datetime64[s]').tolist()
+        vals = res.tolist()
+        if agg != cls.AGG_COUNT:
+            vals = [None if v != v else v for v in vals]
+        return dict(zip(keys, vals))
@@ -0,0 +1,223 @@
+import time
+import codecs
+import select
+import paramiko
+from wlfutil.uni_util import UniUtil
+from wlfutil.conn_util import ConnRegistry
+from wlfutil.metrics_util import MetricsUtil
+from wlfutil.log_util import LogUtil
+
+
+class ShellUtil:
+    """远程连接服务器执行命令工具类型
+
+    conf = {
+        'hostname': '110.110.110.110',
+        'port': 22,
+        'username': 'admin',
+        'password': '123456',
+        'timeout': 30000,
+    }
+    """
+    # 最近一次使用的客户端
+    CONN = None
+    # 各配置对应的客户端，见模块末尾
+    REGISTRY = None
+    # ssh 心跳间隔秒数，保持长连接不被中间设备断开
+    KEEPALIVE = 30
+
+    @classmethod
+    def _init(cls, conf: dict):
+        conn = cls._acquire(conf)
+        cls.REGISTRY.release(conn)
+        return conn
+
+    @classmethod
+    def _acquire(cls, conf: dict):
+        """借出该配置对应的客户端，用完需 REGISTRY.release，借出期间不会被淘汰关闭"""
+        conn = cls.REGISTRY.acquire(conf)
+        transport = conn.get_transport()
+        # 连接已经断开则自动重连
+        if transport is None or not transport.is_active():
+            cls.REGISTRY.release(conn)
+            cls.REGISTRY.discard(conf, conn)
+            conn = cls.REGISTRY.acquire(conf)
+        cls.CONN = conn
+        return conn
+
+    @classmethod
+    def connect(cls, conf: dict):
+        """切换到该配置对应的客户端，已经建立过的直接复用"""
+        return cls._init(conf)
+
+    @classmethod
+    def _create(cls, conf: dict):
+        try:
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(**conf)
+            client.get_transport().set_keepalive(cls.KEEPALIVE)
+            return client
+        except Exception as e:
+            LogUtil.error("shell init failed, please check the config", e)
+            raise
+
+    @classmethod
+    def _open(cls, conf: dict, open_fn):
+        """借出保持的连接并执行 open_fn(conn) 新开通道，连接失效时重连一次
+        :return (借出的客户端, open_fn 的返回值)，通道用完后需 REGISTRY.release 归还客户端
+        """
+        for retry in (True, False):
+            conn = cls._acquire(conf)
+            try:
+                return conn, open_fn(conn)
+            except (paramiko.SSHException, EOFError, OSError):
+                cls.REGISTRY.release(conn)
+                if not retry:
+                    raise
+                cls.REGISTRY.discard(conf, conn)
+            except BaseException:
+                cls.REGISTRY.release(conn)
+                raise
+
+    @classmethod
+    def stream(cls, conf: dict, cmd: str, timeout: float = None, callback=None, lines: bool = True, get_pty: bool = False,
+               chunk_size: int = 32768):
+        """执行命令并边执行边返回输出，不等命令结束、也不把全部输出缓存在内存里
+
+        s = ShellUtil.stream(conf, 'tail -n 100000 run.log', timeout=60)
+        for name, data in s:  # name 为 'stdout' 或 'stderr'
+            ...
+        s.exit_status
+        :param timeout 命令最长执行秒数，超时后关闭通道，timed_out 为 True
+        :param callback 每返回一条数据时调用 callback(name, data)
+        :param lines 为 True 时按行返回解码后的字符串（不含换行符），否则返回原始字节块
+        :param get_pty 是否分配伪终端，分配后 stderr 会合并到 stdout
+        """
+        conn, channel = cls._open(conf, lambda c: c.get_transport().open_session())
+        try:
+            return ShellStream(channel, cmd, timeout, callback, lines, get_pty, chunk_size, lambda: cls.REGISTRY.release(conn))
+        except BaseException:
+            channel.close()
+            cls.REGISTRY.release(conn)
+            raise
+
+    @classmethod
+    @MetricsUtil.instrument('shell', 'exec')
+    def exec(cls, conf: dict, cmd: str):
+        conn, (stdin, stdout, stderr) = cls._open(conf, lambda c: c.exec_command(cmd, get_pty=True))
+        try:
+            res = UniUtil.to_str(stdout.read())
+            error = UniUtil.to_str(stderr.read())
+        finally:
+            cls.REGISTRY.release(conn)
+        # 如果有错误信息，返回error，否则返回res
+        if error.strip():
+            return {'sta': 200, 'res': error}
+        else:
+            return {'sta': 201, 'res': res}
+
+    @classmethod
+    @MetricsUtil.instrument('shell', 'exec_many')
+    def exec_many(cls, confs: list, cmd: str, max_workers: int = 32):
+        """在多台服务器上并发执行同一条命令
+        :param confs 各服务器的连接配置
+        :param max_workers 最大并发数
+        :return 与 confs 顺序一致的结果 [{'host': 主机, 'sta': 状态, 'res': 输出, 'cost': 耗时秒数}, ...]，连接或执行失败时 sta 为 500
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def _run(conf):
+            start = time.perf_counter()
+            try:
+                res = cls.exec(conf, cmd)
+            except Exception as e:
+                res = {'sta': 500, 'res': str(e)}
+            res['host'] = conf.get('hostname')
+            res['cost'] = round(time.perf_counter() - start, 6)
+            return res
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(confs) or 1))) as executor:
+            return list(executor.map(_run, confs))
+
+
+class ShellStream:
+    """ShellUtil.stream 的返回值，迭代得到 (名称, 数据)，迭代结束后可以取 exit_status
+    迭代期间占用（借出）连接，不迭代时需调用 close 归还
+    """
+
+    def __init__(self, channel, cmd: str, timeout: float, callback, lines: bool, get_pty: bool, chunk_size: int, release=None):
+        self.channel, self.timeout, self.callback = channel, timeout, callback
+        self._release = release
+        self.lines, self.chunk_size = lines, chunk_size
+        # 命令退出码，超时或提前结束时为 None
+        self.exit_status = None
+        self.timed_out = False
+        if get_pty:
+            channel.get_pty()
+        channel.exec_command(cmd)
+
+    def __iter__(self):
+        chan = self.channel
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        readers = {
+            'stdout': (chan.recv_ready, chan.recv),
+            'stderr': (chan.recv_stderr_ready, chan.recv_stderr),
+        }
+        decoders = {name: codecs.getincrementaldecoder('utf-8')(errors='replace') for name in readers}
+        pending = {name: '' for name in readers}
+        try:
+            while True:
+                # 每轮都检查超时，命令持续输出时也会按时结束
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.timed_out = True
+                    return
+                got = False
+                for name, (ready, recv) in readers.items():
+                    if not ready():
+                        continue
+                    data = recv(self.chunk_size)
+                    if not data:
+                        continue
+                    got = True
+                    if not self.lines:
+                        yield self._emit(name, data)
+                        continue
+                    parts = (pending[name] + decoders[name].decode(data)).split('\n')
+                    pending[name] = parts.pop()
+                    for line in parts:
+                        # 一块数据可能有很多行，调用方处理得慢时逐行检查超时
+                        if deadline is not None and time.monotonic() >= deadline:
+                            self.timed_out = True
+                            return
+                        yield self._emit(name, line.rstrip('\r'))
+                if got:
+                    continue
+                if chan.exit_status_ready() and not chan.recv_ready() and not chan.recv_stderr_ready():
+                    break
+                # 没有数据时等待通道可读，最多等到超时
+                wait = 0.1 if deadline is None else max(0, min(0.1, deadline - time.monotonic()))
+                select.select([chan], [], [], wait)
+            if self.lines:
+                for name in readers:
+                    rest = pending[name] + decoders[name].decode(b'', final=True)
+                    if rest:
+                        yield self._emit(name, rest.rstrip('\r'))
+            self.exit_status = chan.recv_exit_status()
+        finally:
+            self.close()
+
+    def close(self):
+        """关闭通道并归还连接，可重复调用"""
+        self.channel.close()
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def _emit(self, name: str, data):
+        if self.callback:
+            self.callback(name, data)
+        return name, data
+
+
+ShellUtil.REGISTRY = ConnRegistry(ShellUtil._create, lambda client: client.close(), capacity=256, idle_timeout=600)
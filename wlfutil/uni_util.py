@@ -0,0 +1,165 @@
+import time
+import platform
+import uuid
+from functools import wraps
+
+
+class UniUtil:
+    """统一处理工具类"""
+
+    @staticmethod
+    def get_uuid(params: dict):
+        """基于名字的MD5散列值，同一命名空间的同一名字生成相同的uuid"""
+        p1 = sorted(params.items(), key=lambda x: x[0])
+        p2 = [str(p) for p in p1]
+        p3 = '|'.join(p2)
+        return str(uuid.uuid3(uuid.NAMESPACE_OID, p3))
+
+    @staticmethod
+    def time_cost(fn):
+        """这个装饰器用于统计函数运行耗时，每次调用打印一行耗时，同时记录到 MetricsUtil 的 time_cost_seconds{fn=函数名}"""
+        from wlfutil.metrics_util import MetricsUtil
+        timer = MetricsUtil.timer('time_cost_seconds', 'UniUtil.time_cost latency', fn=fn.__qualname__)
+
+        @wraps(fn)
+        def _timer(*args, **kwargs):
+            from wlfutil.log_util import LogUtil
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                cost = time.perf_counter() - start
+                timer.observe(cost)
+                LogUtil.info('cost', f'{fn.__name__} {_fmt(cost)}')
+
+        def _fmt(sec):
+            """格式化打印时间，大于60秒打印分钟，大于60分钟打印小时"""
+            return f'{round(sec, 2)}s' if sec <= 60 else f'{round(sec / 60, 2)}m' if sec <= 3600 else f'{round(sec / 3600, 2)}h'
+
+        return _timer
+
+    @staticmethod
+    def range_partition(max, partitions=10, min=0):
+        """根据数据范围划分区间
+        :param min 最小值，默认值0
+        :param max 最大值
+        :param partitions 划分的区间数
+        :return 返回划分后的区间集合 ['区间1', '区间2', '区间3', ...]
+        """
+        res = []
+        interval = max / partitions
+        while len(res) < partitions:
+            start, end = min, min + interval
+            res.append(f'{start:.1f} ~ {end:.1f}') if end < max else res.append(f'>= {min:.1f}')
+            min += interval
+        return res
+
+    @staticmethod
+    def range_histogram(values, max, partitions=10, min=0, sums=False, chunk_size=1000000):
+        """按 range_partition 的区间统计每个区间内的数据个数（以及总和）
+        :param values 数据，numpy 数组、list 或任意可迭代对象，可迭代对象按 chunk_size 分块处理，不会一次性载入内存
+        :param sums 是否同时统计每个区间的数据总和
+        :return RangeHistogram，labels 与 range_partition 的返回值一致
+        """
+        hist = RangeHistogram(max, partitions, min, sums)
+        if hasattr(values, '__len__'):
+            hist.add(values)
+        else:
+            from itertools import islice
+            it = iter(values)
+            while True:
+                chunk = list(islice(it, chunk_size))
+                if not chunk:
+                    break
+                hist.add(chunk)
+        return hist
+
+    @staticmethod
+    def date_partition(freq, start_time, end_time):
+        """根据数据频率划分时间区间
+        :param freq 数据频率
+        :return 返回划分后的时间区间集合 {}
+        """
+        from dateutil.relativedelta import relativedelta
+        from wlfutil.dt_util import DtUtil
+        res = {}
+        begin = DtUtil.day_start_of_date_str(start_time)
+        end = DtUtil.day_end_of_date_str(end_time)
+        while begin < end:
+            res[begin] = None
+            begin = begin + relativedelta(seconds=freq)
+        return res
+
+    @staticmethod
+    def del_none(li):
+        """删除list中None"""
+        return [e for e in li if e]
+
+    @staticmethod
+    def get_os():
+        """获取当前操作系统"""
+        return platform.system()
+
+    @staticmethod
+    def to_str(bytes_or_str):
+        """
+        把byte类型转换为str
+        :param bytes_or_str:
+        :return:
+        """
+        if isinstance(bytes_or_str, bytes):
+            value = bytes_or_str.decode('utf-8')
+        else:
+            value = bytes_or_str
+        return value
+
+
+class RangeHistogram:
+    """与 UniUtil.range_partition 使用相同区间的直方图，需要 numpy
+
+    区间 k 为 [start_k, start_k + interval)，结束值 >= max 的区间（标签为 '>= start'）不设上限，小于 min 的数据计入 underflow
+    多个 worker 可以各自统计后用 merge 合并
+    """
+
+    def __init__(self, max, partitions=10, min=0, sums=False):
+        import numpy as np
+        self.labels = UniUtil.range_partition(max, partitions, min)
+        # 与 range_partition 相同的累加方式计算区间起点，保证边界完全一致
+        starts, interval = [], max / partitions
+        while len(starts) < partitions:
+            starts.append(min)
+            min += interval
+        self.starts = np.array(starts, dtype=np.float64)
+        self.counts = np.zeros(partitions, dtype=np.int64)
+        self.sums = np.zeros(partitions, dtype=np.float64) if sums else None
+        self.underflow = 0
+
+    def add(self, values, return_indices=False):
+        """统计一批数据，一次向量化的二分查找完成分区
+        :param return_indices 为 True 时返回每个数据所在区间的下标，小于 min 或 nan 为 -1
+        """
+        import numpy as np
+        values = np.asarray(values, dtype=np.float64).ravel()
+        idx = np.searchsorted(self.starts, values, side='right') - 1
+        idx[np.isnan(values)] = -1
+        valid = idx >= 0
+        self.underflow += int(np.count_nonzero(values[~valid] < self.starts[0]))
+        self.counts += np.bincount(idx[valid], minlength=len(self.counts))
+        if self.sums is not None:
+            self.sums += np.bincount(idx[valid], weights=values[valid], minlength=len(self.sums))
+        return idx if return_indices else None
+
+    def merge(self, other):
+        """合并另一个区间相同的直方图，返回自身"""
+        import numpy as np
+        if not np.array_equal(self.starts, other.starts):
+            raise ValueError('cannot merge histograms with different partitions')
+        self.counts += other.counts
+        if self.sums is not None and other.sums is not None:
+            self.sums += other.sums
+        self.underflow += other.underflow
+        return self
+
+    def to_dict(self):
+        """{区间标签: 个数}"""
+        return dict(zip(self.labels, self.counts.tolist()))